@@ -0,0 +1,125 @@
+"""
+Caché de asignaciones de jueces por competencia (CompetitionJudge).
+Las asignaciones de cada competencia se guardan en la caché de Django
+(compartida entre procesos) y en una copia local de vida corta en cada proceso.
+Se invalidan al guardar o eliminar un CompetitionJudge y al reasignar jueces.
+"""
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Tiempo de vida en la caché de Django (segundos)
+ASSIGNMENT_CACHE_TIMEOUT = 60 * 60
+
+# Copia local por proceso: {competition_id: (expira, {judge_id: is_head_judge})}
+_local_lock = threading.Lock()
+_local_assignments: Dict[int, tuple] = {}
+
+
+def _assignments_key(competition_id: int) -> str:
+    return f'competition:{competition_id}:judges'
+
+
+def _local_ttl() -> float:
+    """Segundos que un proceso reutiliza su copia local sin consultar la caché compartida"""
+    return getattr(settings, 'JUDGE_ASSIGNMENT_LOCAL_TTL', 5)
+
+
+def get_competition_judges(competition_id: int) -> Dict[int, bool]:
+    """
+    Devuelve los jueces asignados a una competencia.
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        Dict[int, bool]: {judge_id: is_head_judge}
+    """
+    competition_id = int(competition_id)
+    now = time.monotonic()
+
+    with _local_lock:
+        entry = _local_assignments.get(competition_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    assignments = cache.get(_assignments_key(competition_id))
+    if assignments is None:
+        from .models import CompetitionJudge
+
+        assignments = dict(
+            CompetitionJudge.objects.filter(
+                competition_id=competition_id
+            ).values_list('judge_id', 'is_head_judge')
+        )
+        cache.set(_assignments_key(competition_id), assignments, ASSIGNMENT_CACHE_TIMEOUT)
+
+    with _local_lock:
+        _local_assignments[competition_id] = (now + _local_ttl(), assignments)
+
+    return assignments
+
+
+def is_assigned_judge(competition_id: int, judge_id: int) -> bool:
+    """
+    Indica si un usuario es juez asignado a una competencia.
+
+    Args:
+        competition_id: ID de la competencia
+        judge_id: ID del usuario
+
+    Returns:
+        bool: True si está asignado
+    """
+    return int(judge_id) in get_competition_judges(competition_id)
+
+
+def is_head_judge(competition_id: int, judge_id: int) -> bool:
+    """
+    Indica si un usuario es el juez principal de una competencia.
+
+    Args:
+        competition_id: ID de la competencia
+        judge_id: ID del usuario
+
+    Returns:
+        bool: True si es juez principal
+    """
+    return get_competition_judges(competition_id).get(int(judge_id), False)
+
+
+def clear_competition_judges(competition_id: Optional[int] = None):
+    """
+    Elimina de inmediato las asignaciones en caché (de una competencia o todas las locales).
+
+    Args:
+        competition_id: ID de la competencia (opcional)
+    """
+    with _local_lock:
+        if competition_id is None:
+            _local_assignments.clear()
+        else:
+            _local_assignments.pop(int(competition_id), None)
+
+    if competition_id is not None:
+        cache.delete(_assignments_key(int(competition_id)))
+
+
+def invalidate_competition_judges(competition_id: int):
+    """
+    Invalida las asignaciones en caché de una competencia.
+    Se borran ahora y de nuevo al confirmarse la transacción, para que ninguna
+    lectura concurrente deje en caché datos anteriores al commit.
+
+    Args:
+        competition_id: ID de la competencia
+    """
+    clear_competition_judges(competition_id)
+    transaction.on_commit(lambda: clear_competition_judges(competition_id))
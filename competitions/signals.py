@@ -0,0 +1,16 @@
+"""
+Señales de la aplicación de competencias.
+Mantienen al día la caché de asignaciones de jueces.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .assignments import invalidate_competition_judges
+from .models import CompetitionJudge
+
+
+@receiver(post_save, sender=CompetitionJudge)
+@receiver(post_delete, sender=CompetitionJudge)
+def invalidate_judge_assignments(sender, instance, **kwargs):
+    """Invalida la caché de asignaciones de la competencia del juez"""
+    invalidate_competition_judges(instance.competition_id)
@@ -16,6 +16,7 @@ from .serializers import (
     RiderSerializer, HorseSerializer, ParticipantSerializer,
     ParticipantAssignmentSerializer
 )
+from .assignments import invalidate_competition_judges
 
 from users.models import User
 
@@ -114,6 +115,9 @@ class CompetitionViewSet(viewsets.ModelViewSet):
                     judge=judge,
                     is_head_judge=is_head
                 )
+            
+            # Invalidar la caché de asignaciones (también si no quedó ningún juez)
+            invalidate_competition_judges(competition.id)
         
         # Devolver competencia actualizada
         serializer = self.get_serializer(competition)
@@ -243,7 +247,25 @@ class ParticipantViewSet(viewsets.ModelViewSet):
 @permission_classes([IsAuthenticated])
 def competition_participants(request, competition_id):
     """Obtener participantes de una competencia"""
+    from django.db.models import Count, Max
+    from judging.conditional import make_etag, not_modified, set_etag
+    
     competition = get_object_or_404(Competition, pk=competition_id)
     participants = Participant.objects.filter(competition=competition)
-    serializer = ParticipantSerializer(participants, many=True)
-    return Response(serializer.data)
\ No newline at end of file
+    
+    # Versión de la lista: última modificación de participantes, jinetes y caballos
+    version = participants.aggregate(
+        count=Count('id'),
+        participant=Max('updated_at'),
+        rider=Max('rider__updated_at'),
+        horse=Max('horse__updated_at')
+    )
+    etag = make_etag('participants', competition.id, *sorted(version.items()))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    
+    serializer = ParticipantSerializer(
+        participants.select_related('rider', 'horse', 'category'), many=True
+    )
+    return set_etag(Response(serializer.data), etag)
\ No newline at end of file
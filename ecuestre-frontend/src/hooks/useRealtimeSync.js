@@ -158,14 +158,7 @@ export const useRealtimeSync = () => {
         
         updateFirebaseScore(competitionId, participantId, judgeId, firebaseData);
         
-        // Actualizar WebSocket
-        if (isWebSocketConnected) {
-          scoreWebSocket.updateScore({
-            type: 'score_update',
-            judge_id: judgeId,
-            ...scoreData
-          });
-        }
+        // Los clientes WebSocket reciben la calificación desde el servidor tras guardarse
       })
       .catch(error => {
         console.error('Error al enviar calificación:', error);
@@ -3,7 +3,6 @@
 import { useState, useCallback } from 'react';
 import useOffline from './useOffline';
 import { updateScore as updateFirebaseScore } from '../services/firebase';
-import { scoreWebSocket } from '../services/websockets';
 
 /**
  * Hook para gestionar el guardado de calificaciones (online u offline)
@@ -58,17 +57,7 @@ const useSaveScore = (competitionId, participantId, judgeId) => {
         try {
           // Actualizar en Firebase
           updateFirebaseScore(competitionId, participantId, judgeId, firebaseData);
-          
-          // Enviar por WebSocket si está disponible
-          try {
-            scoreWebSocket.updateScore({
-              type: 'score_update',
-              judge_id: judgeId,
-              parameters: firebaseData
-            });
-          } catch (wsError) {
-            console.warn('Error al enviar por WebSocket:', wsError);
-          }
+          // Los clientes WebSocket reciben la calificación desde el servidor tras guardarse
         } catch (syncError) {
           console.warn('Error al sincronizar con servicios en tiempo real:', syncError);
         }
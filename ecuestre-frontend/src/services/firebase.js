@@ -20,17 +20,47 @@ const app = initializeApp(firebaseConfig);
 const database = getDatabase(app);
 
 // Función para suscribirse a actualizaciones de rankings
+// Los datos cambiantes están en rankings/{id} y los datos del participante
+// (jinete, caballo, categoría) en participants/{id}; se combinan aquí
 export const subscribeToRankings = (competitionId, callback) => {
   const rankingsRef = ref(database, `rankings/${competitionId}`);
+  const participantsRef = ref(database, `participants/${competitionId}`);
+  
+  let rankings = null;
+  let participants = {};
+  
+  const emit = () => {
+    if (!rankings) {
+      callback(rankings);
+      return;
+    }
+    
+    const merged = {};
+    Object.keys(rankings).forEach((participantId) => {
+      merged[participantId] = {
+        ...(participants[participantId] || {}),
+        ...rankings[participantId]
+      };
+    });
+    callback(merged);
+  };
   
   // Escuchar cambios en tiempo real
+  onValue(participantsRef, (snapshot) => {
+    participants = snapshot.val() || {};
+    if (rankings) emit();
+  });
+  
   onValue(rankingsRef, (snapshot) => {
-    const data = snapshot.val();
-    callback(data);
+    rankings = snapshot.val();
+    emit();
   });
   
   // Devolver función para desuscribirse
-  return () => off(rankingsRef);
+  return () => {
+    off(rankingsRef);
+    off(participantsRef);
+  };
 };
 
 // Función para suscribirse a actualizaciones de calificaciones
@@ -178,41 +178,87 @@ class WebSocketService {
  * Servicio para WebSocket de calificaciones
  */
 export class ScoreWebSocketService extends WebSocketService {
+  constructor() {
+    super();
+    // Calificaciones actuales del participante: {juez: {parameters: {parámetro: datos}}}
+    this.scores = {};
+    this.scoresListeners = [];
+    
+    this.onMessageType('current_scores', data => this.replaceScores(data));
+    this.onMessageType('scores_update', data => this.applyScoresUpdate(data));
+  }
+
   /**
    * Conecta al WebSocket de calificaciones
    * @param {number} competitionId - ID de la competencia
    * @param {number} participantId - ID del participante
    */
   connectToScores(competitionId, participantId) {
+    this.scores = {};
     this.connect(`/ws/scores/${competitionId}/${participantId}/`);
   }
   
   /**
-   * Solicita las calificaciones actuales
+   * Reemplaza las calificaciones locales por las recibidas al conectar
+   * @param {Object} data - Mensaje current_scores
    */
-  requestScores() {
-    this.send({
-      type: 'request_scores'
+  replaceScores(data) {
+    this.scores = {};
+    Object.entries(data.scores || {}).forEach(([judgeId, judge]) => {
+      this.scores[judgeId] = { name: judge.name, parameters: { ...judge.scores } };
+    });
+    this.notifyScores();
+  }
+  
+  /**
+   * Aplica un lote de calificaciones guardadas y eliminadas
+   * @param {Object} data - Mensaje scores_update
+   */
+  applyScoresUpdate(data) {
+    (data.scores || []).forEach(score => {
+      const judge = this.scores[score.judge_id] || { parameters: {} };
+      judge.parameters = { ...judge.parameters, [score.parameter_id]: score };
+      this.scores = { ...this.scores, [score.judge_id]: judge };
+    });
+    
+    (data.deleted || []).forEach(({ judge_id, parameter_id }) => {
+      const judge = this.scores[judge_id];
+      if (!judge) return;
+      const { [parameter_id]: removed, ...parameters } = judge.parameters;
+      this.scores = { ...this.scores, [judge_id]: { ...judge, parameters } };
     });
+    
+    this.notifyScores();
   }
   
   /**
-   * Envía una actualización de calificación
-   * @param {Object} scoreData - Datos de la calificación
+   * Notifica las calificaciones actuales a los callbacks registrados
    */
-  updateScore(scoreData) {
+  notifyScores() {
+    this.scoresListeners.forEach(callback => callback(this.scores));
+  }
+  
+  /**
+   * Solicita las calificaciones actuales
+   */
+  requestScores() {
     this.send({
-      type: 'score_update',
-      ...scoreData
+      type: 'request_scores'
     });
   }
   
   /**
-   * Registra un callback para actualizaciones de calificaciones
+   * Registra un callback para actualizaciones de calificaciones.
+   * Recibe todas las calificaciones del participante por juez, una vez por lote.
    * @param {Function} callback - Función a llamar con los datos
    */
   onScoreUpdate(callback) {
-    return this.onMessageType('score_update', callback);
+    this.scoresListeners.push(callback);
+    
+    // Devolver función para cancelar la suscripción
+    return () => {
+      this.scoresListeners = this.scoresListeners.filter(cb => cb !== callback);
+    };
   }
   
   /**
@@ -224,18 +270,138 @@ export class ScoreWebSocketService extends WebSocketService {
   }
 }
 
+/**
+ * Servicio para el WebSocket de jueces (envío de calificaciones)
+ */
+export class JudgeWebSocketService extends WebSocketService {
+  constructor() {
+    super();
+    // Envíos pendientes de confirmación por request_id
+    this.pending = new Map();
+    this.nextRequestId = 1;
+    
+    this.onMessageType('score_ack', data => this.resolveRequest(data, true));
+    this.onMessageType('score_error', data => this.resolveRequest(data, false));
+  }
+
+  /**
+   * Conecta al WebSocket de jueces de una competencia
+   * @param {number} competitionId - ID de la competencia
+   * @param {string} token - Token de autenticación de la API
+   */
+  connectToJudging(competitionId, token) {
+    this.connect(`/ws/judging/${competitionId}/?token=${encodeURIComponent(token)}`);
+  }
+  
+  /**
+   * Envía una calificación y espera su confirmación
+   * @param {Object} scoreData - participant_id, parameter_id, value, comments, edit_reason
+   * @returns {Promise<Object>} Calificación guardada
+   */
+  submitScore(scoreData) {
+    const requestId = this.nextRequestId++;
+    
+    return new Promise((resolve, reject) => {
+      this.pending.set(requestId, { resolve, reject });
+      this.send({
+        type: 'score_update',
+        request_id: requestId,
+        ...scoreData
+      });
+    });
+  }
+  
+  /**
+   * Resuelve un envío pendiente con la respuesta del servidor
+   * @param {Object} data - Mensaje score_ack o score_error
+   * @param {boolean} success - Si la calificación se guardó
+   */
+  resolveRequest(data, success) {
+    const request = this.pending.get(data.request_id);
+    if (!request) return;
+    
+    this.pending.delete(data.request_id);
+    if (success) {
+      request.resolve(data.score);
+    } else {
+      request.reject(new Error(data.message));
+    }
+  }
+}
+
 /**
  * Servicio para WebSocket de rankings
  */
 export class RankingWebSocketService extends WebSocketService {
+  constructor() {
+    super();
+    // Último ranking completo recibido y su versión
+    this.rankings = [];
+    this.version = null;
+    this.rankingsListeners = [];
+    
+    this.onMessageType('current_rankings', data => this.replaceRankings(data));
+    this.onMessageType('rankings_update', data => this.replaceRankings(data));
+    this.onMessageType('rankings_delta', data => this.applyRankingsDelta(data));
+  }
+
   /**
    * Conecta al WebSocket de rankings
    * @param {number} competitionId - ID de la competencia
    */
   connectToRankings(competitionId) {
+    this.rankings = [];
+    this.version = null;
     this.connect(`/ws/rankings/${competitionId}/`);
   }
   
+  /**
+   * Reemplaza el ranking local por uno completo
+   * @param {Object} data - Mensaje con version y rankings
+   */
+  replaceRankings(data) {
+    this.rankings = data.rankings || [];
+    this.version = data.version ?? null;
+    this.notifyRankings();
+  }
+  
+  /**
+   * Aplica un mensaje delta sobre el ranking local.
+   * Si falta alguna versión intermedia se pide el ranking completo.
+   * @param {Object} data - Mensaje con version, base_version, changed y removed
+   */
+  applyRankingsDelta(data) {
+    if (this.version === null || data.base_version !== this.version) {
+      this.requestRankings();
+      return;
+    }
+    
+    const removed = new Set(data.removed || []);
+    const rows = new Map();
+    this.rankings.forEach(row => {
+      if (!removed.has(row.participant_id)) {
+        rows.set(row.participant_id, row);
+      }
+    });
+    (data.changed || []).forEach(row => rows.set(row.participant_id, row));
+    
+    this.rankings = Array.from(rows.values()).sort((a, b) => a.position - b.position);
+    this.version = data.version;
+    this.notifyRankings();
+  }
+  
+  /**
+   * Notifica el ranking completo actual a los callbacks registrados
+   */
+  notifyRankings() {
+    const message = {
+      type: 'rankings_update',
+      version: this.version,
+      rankings: this.rankings
+    };
+    this.rankingsListeners.forEach(callback => callback(message));
+  }
+  
   /**
    * Solicita los rankings actuales
    */
@@ -246,11 +412,17 @@ export class RankingWebSocketService extends WebSocketService {
   }
   
   /**
-   * Registra un callback para actualizaciones de rankings
+   * Registra un callback para actualizaciones de rankings.
+   * Recibe siempre el ranking completo, ya aplicados los mensajes delta.
    * @param {Function} callback - Función a llamar con los datos
    */
   onRankingsUpdate(callback) {
-    return this.onMessageType('rankings_update', callback);
+    this.rankingsListeners.push(callback);
+    
+    // Devolver función para cancelar la suscripción
+    return () => {
+      this.rankingsListeners = this.rankingsListeners.filter(cb => cb !== callback);
+    };
   }
   
   /**
@@ -265,8 +437,10 @@ export class RankingWebSocketService extends WebSocketService {
 // Instancias singleton para uso en toda la aplicación
 export const scoreWebSocket = new ScoreWebSocketService();
 export const rankingWebSocket = new RankingWebSocketService();
+export const judgeWebSocket = new JudgeWebSocketService();
 
 export default {
   scoreWebSocket,
-  rankingWebSocket
+  rankingWebSocket,
+  judgeWebSocket
 };
\ No newline at end of file
@@ -5,8 +5,7 @@ ASGI config for ecuestre_project project.
 import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-from django.urls import path
+from django.urls import path, re_path
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecuestre_project.settings')
 
@@ -14,13 +13,17 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecuestre_project.settings')
 django_asgi_app = get_asgi_application()
 
 # Importar después de configurar DJANGO_SETTINGS_MODULE
-from judging.routing import websocket_urlpatterns
+from judging.routing import websocket_urlpatterns, http_urlpatterns
+from judging.middleware import TokenAuthMiddlewareStack
 
 # Configuración del protocolo para ASGI
 # Configuración del protocolo para ASGI
 application = ProtocolTypeRouter({
-    "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
+    # Streams SSE de rankings; el resto de peticiones va a Django
+    "http": URLRouter(
+        http_urlpatterns + [re_path(r'', django_asgi_app)]
+    ),
+    "websocket": TokenAuthMiddlewareStack(
         URLRouter(
             websocket_urlpatterns
         )
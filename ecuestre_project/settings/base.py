@@ -133,7 +133,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -145,6 +145,10 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Firebase Configuration
 FIREBASE_CREDENTIALS = None  # Se establecerá en los archivos de configuración específicos
+# 'firebase' usa Firebase Realtime Database; 'stub' usa una base local en memoria (pruebas sin conexión)
+FIREBASE_BACKEND = env('FIREBASE_BACKEND', default='firebase')
+# 'delta' envía solo los cambios respecto al último ranking enviado; 'full' reemplaza el nodo completo
+FIREBASE_RANKINGS_SYNC_MODE = 'delta'
 
 # Configuración de modelo personalizado de usuario
 AUTH_USER_MODEL = 'users.User'
@@ -152,7 +156,7 @@ AUTH_USER_MODEL = 'users.User'
 # Configuración para REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -162,6 +166,9 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Segundos que se reutiliza un token resuelto (users.authentication.CachedTokenAuthentication)
+TOKEN_AUTH_CACHE_TTL = 60
+
 # Configuración para CORS
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = [
@@ -176,7 +183,15 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
-# Configuración para Channels (WebSockets)
+# Caché (rankings versionados). En producción se usa Redis
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Configuración para Channels (WebSockets). InMemoryChannelLayer solo llega a
+# los clientes del mismo proceso; con varios procesos web usar channels_redis
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels.layers.InMemoryChannelLayer"
@@ -186,3 +201,30 @@ CHANNEL_LAYERS = {
 # Permitir que Django Channels maneje el mecanismo de ASGI
 ASGI_APPLICATION = 'ecuestre_project.asgi.application'
 
+# Ventana (segundos) para agrupar eventos de cambio de calificaciones en un
+# único recálculo de rankings por competencia. 0 recalcula de inmediato.
+RANKING_RECALC_WINDOW = 0.25
+
+# Segundos (además de la ventana) tras los que el worker de sincronización
+# ejecuta un recálculo que el proceso web no completó (p. ej. por un reinicio)
+RANKING_RECALC_RECOVERY_DELAY = 30
+
+# Ventana (segundos) para agrupar las calificaciones enviadas a los WebSocket
+# de cada participante en un solo mensaje. 0 las envía de inmediato.
+SCORE_BROADCAST_WINDOW = 0.1
+
+# Segundos que cada proceso reutiliza su copia local de las asignaciones de
+# jueces antes de volver a leer la caché compartida
+JUDGE_ASSIGNMENT_LOCAL_TTL = 5
+
+# Competencias cuyo cálculo de rankings se traza en el logger judging.tracing
+# (IDs, o '*' para todas). También se puede activar en tiempo de ejecución
+# con judging.tracing.enable_ranking_trace.
+RANKING_TRACE_COMPETITIONS = ()
+
+
+# Cola persistente de sincronización (Firebase y WebSocket)
+SYNC_TASK_MAX_ATTEMPTS = 8       # Intentos antes de marcar una tarea como fallida
+SYNC_TASK_RETRY_BASE = 2         # Espera inicial (segundos) entre reintentos, se duplica en cada intento
+SYNC_TASK_RETRY_MAX = 300        # Espera máxima (segundos) entre reintentos
+SYNC_TASK_TIMEOUT = 300          # Segundos tras los que una tarea "en proceso" se considera abandonada
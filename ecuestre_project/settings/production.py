@@ -43,6 +43,14 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Caché compartida con Redis (rankings versionados entre procesos)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f"redis://{os.environ.get('REDIS_HOST', 'localhost')}:{os.environ.get('REDIS_PORT', 6379)}/1",
+    }
+}
+
 # Firebase settings for production
 FIREBASE_CREDENTIALS = os.environ.get('FIREBASE_CREDENTIALS_PATH')
 FIREBASE_DATABASE_URL = os.environ.get('FIREBASE_DATABASE_URL')
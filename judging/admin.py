@@ -2,7 +2,8 @@
 from django.contrib import admin
 from .models import (
     EvaluationParameter, CompetitionParameter, Score, ScoreEdit, 
-    Ranking, FirebaseSync, OfflineData
+    Ranking, FirebaseSync, OfflineData, SyncTask, JudgeParticipantAggregate,
+    FinalResults
 )
 
 @admin.register(EvaluationParameter)
@@ -56,5 +57,24 @@ class OfflineDataAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     autocomplete_fields = ['judge', 'competition', 'participant']
 
+@admin.register(SyncTask)
+class SyncTaskAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'competition', 'status', 'attempts', 'available_at', 'updated_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('competition__name',)
+    date_hierarchy = 'created_at'
+    readonly_fields = ('kind', 'competition', 'payload', 'dedup_key', 'attempts', 'last_error', 'created_at', 'updated_at')
+
+@admin.register(JudgeParticipantAggregate)
+class JudgeParticipantAggregateAdmin(admin.ModelAdmin):
+    list_display = ('competition', 'participant', 'judge', 'total', 'count')
+    list_filter = ('competition',)
+    readonly_fields = ('competition', 'participant', 'judge', 'total', 'count')
+
+@admin.register(FinalResults)
+class FinalResultsAdmin(admin.ModelAdmin):
+    list_display = ('competition', 'frozen_at', 'frozen_by', 'checksum')
+    readonly_fields = ('competition', 'data', 'checksum', 'frozen_at', 'frozen_by')
+
 # Registrar CompetitionParameter
 admin.site.register(CompetitionParameter, CompetitionParameterAdmin)
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Sumas y conteos de calculated_result por (competencia, participante, juez).
+La tabla JudgeParticipantAggregate se actualiza en la misma transacción que
+cada calificación guardada o eliminada, con expresiones F (sin leer y volver a
+escribir), de modo que los rankings leen una fila por juez y participante en
+lugar de recorrer todas las calificaciones.
+"""
+import logging
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+logger = logging.getLogger(__name__)
+
+# (competition_id, participant_id, judge_id)
+AggregateKey = Tuple[int, int, int]
+
+
+def apply_score_delta(competition_id: int, participant_id: int, judge_id: int,
+                      total: Decimal, count: int):
+    """
+    Suma un cambio de calificaciones al agregado del juez y participante.
+
+    Args:
+        competition_id: ID de la competencia
+        participant_id: ID del participante
+        judge_id: ID del juez
+        total: Cambio en la suma de calculated_result (negativo al eliminar)
+        count: Cambio en la cantidad de calificaciones (1, 0 o -1)
+    """
+    from .models import JudgeParticipantAggregate
+
+    if not total and not count:
+        return
+
+    rows = JudgeParticipantAggregate.objects.filter(
+        competition_id=competition_id, participant_id=participant_id, judge_id=judge_id
+    )
+    if rows.update(total=F('total') + total, count=F('count') + count) or count < 0:
+        return
+
+    try:
+        with transaction.atomic():
+            JudgeParticipantAggregate.objects.create(
+                competition_id=competition_id, participant_id=participant_id,
+                judge_id=judge_id, total=total, count=count
+            )
+    except IntegrityError:
+        # Otra transacción creó la fila al mismo tiempo
+        rows.update(total=F('total') + total, count=F('count') + count)
+
+
+def get_judge_totals(competition_id: int,
+                     participant_id: Optional[int] = None) -> Dict[int, Dict[int, Tuple[Decimal, int]]]:
+    """
+    Devuelve las sumas y conteos por participante y juez.
+
+    Args:
+        competition_id: ID de la competencia
+        participant_id: ID del participante (opcional, para uno solo)
+
+    Returns:
+        Dict: {participant_id: {judge_id: (suma de calculated_result, cantidad)}}
+    """
+    from .models import JudgeParticipantAggregate
+
+    rows = JudgeParticipantAggregate.objects.filter(competition_id=competition_id, count__gt=0)
+    if participant_id is not None:
+        rows = rows.filter(participant_id=participant_id)
+
+    totals = {}
+    for participant, judge, total, count in rows.values_list('participant_id', 'judge_id', 'total', 'count'):
+        totals.setdefault(participant, {})[judge] = (total, count)
+    return totals
+
+
+def _score_totals(competition_id: Optional[int] = None) -> Dict[AggregateKey, Tuple[Decimal, int]]:
+    """Sumas y conteos calculados directamente desde Score"""
+    from .models import Score
+
+    scores = Score.objects.all()
+    if competition_id is not None:
+        scores = scores.filter(competition_id=competition_id)
+
+    return {
+        (row['competition_id'], row['participant_id'], row['judge_id']): (row['total'], row['count'])
+        for row in scores.values('competition_id', 'participant_id', 'judge_id').annotate(
+            total=Sum('calculated_result'), count=Count('id')
+        ).order_by()
+    }
+
+
+def check_judge_aggregates(competition_id: Optional[int] = None) -> List[Dict]:
+    """
+    Compara la tabla de agregados con las calificaciones.
+
+    Args:
+        competition_id: ID de la competencia (opcional, todas si se omite)
+
+    Returns:
+        List[Dict]: Diferencias encontradas (clave, esperado y guardado)
+    """
+    from .models import JudgeParticipantAggregate
+
+    expected = _score_totals(competition_id)
+
+    rows = JudgeParticipantAggregate.objects.filter(count__gt=0)
+    if competition_id is not None:
+        rows = rows.filter(competition_id=competition_id)
+    stored = {
+        (competition, participant, judge): (total, count)
+        for competition, participant, judge, total, count in rows.values_list(
+            'competition_id', 'participant_id', 'judge_id', 'total', 'count'
+        )
+    }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        if expected.get(key) != stored.get(key):
+            mismatches.append({
+                'key': key,
+                'expected': expected.get(key),
+                'stored': stored.get(key)
+            })
+    return mismatches
+
+
+@transaction.atomic
+def rebuild_judge_aggregates(competition_id: Optional[int] = None) -> int:
+    """
+    Reconstruye la tabla de agregados desde las calificaciones.
+
+    Args:
+        competition_id: ID de la competencia (opcional, todas si se omite)
+
+    Returns:
+        int: Número de filas creadas
+    """
+    from .models import JudgeParticipantAggregate
+
+    rows = JudgeParticipantAggregate.objects.all()
+    if competition_id is not None:
+        rows = rows.filter(competition_id=competition_id)
+    rows.delete()
+
+    created = JudgeParticipantAggregate.objects.bulk_create([
+        JudgeParticipantAggregate(
+            competition_id=competition, participant_id=participant, judge_id=judge,
+            total=total, count=count
+        )
+        for (competition, participant, judge), (total, count) in _score_totals(competition_id).items()
+    ], batch_size=1000)
+
+    logger.info(f"Agregados por juez reconstruidos: {len(created)} filas")
+    return len(created)
@@ -0,0 +1,147 @@
+"""
+Guardado en bloque de la planilla de un juez.
+Carga los parámetros y las calificaciones existentes en dos consultas, calcula
+los resultados FEI en memoria y escribe con bulk_create/bulk_update y un solo
+bulk_create de ScoreEdit. Como las escrituras en bloque no pasan por
+Score.save() ni por sus señales, el agregado por juez y el aviso de cambio
+(un solo recálculo de rankings) se actualizan aquí.
+"""
+import logging
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from .aggregates import apply_score_delta
+from .pipeline import score_changed
+from .processors import fei_processor, to_tenths
+
+logger = logging.getLogger(__name__)
+
+# Campos que cambia una planilla sobre calificaciones existentes
+SCORECARD_UPDATE_FIELDS = ['value', 'calculated_result', 'comments', 'is_edited', 'edit_reason', 'updated_at']
+
+
+# Sin savepoint propio: dentro de la transacción de la vista un error revierte todo
+@transaction.atomic(savepoint=False)
+def save_scorecard(competition_id: int, participant_id: int, judge, entries: Iterable[Dict[str, Any]],
+                   edit_reason: str = '', skip_unknown: bool = False) -> List:
+    """
+    Crea o actualiza las calificaciones de un juez para un participante.
+
+    Args:
+        competition_id: ID de la competencia
+        participant_id: ID del participante
+        judge: Juez que califica (también queda como editor de las ediciones)
+        entries: Calificaciones {'parameter_id', 'value', 'comments'} con
+                 parameter_id del parámetro de evaluación
+        edit_reason: Razón registrada en las calificaciones modificadas
+        skip_unknown: Si es True, ignora parámetros que no son de la competencia
+
+    Returns:
+        List[Score]: Calificaciones guardadas, en el orden recibido
+
+    Raises:
+        CompetitionParameter.DoesNotExist: Si un parámetro no es de la competencia
+            (solo con skip_unknown=False)
+    """
+    from .models import CompetitionParameter, Score, ScoreEdit
+
+    # Un parámetro repetido cuenta una sola vez, con su último valor
+    entries = list({entry['parameter_id']: entry for entry in entries}.values())
+
+    # Parámetros de la competencia con su definición (una consulta)
+    parameters = {
+        parameter.parameter_id: parameter
+        for parameter in CompetitionParameter.objects.filter(
+            competition_id=competition_id,
+            parameter_id__in={entry['parameter_id'] for entry in entries}
+        ).select_related('parameter')
+    }
+    unknown = [entry['parameter_id'] for entry in entries if entry['parameter_id'] not in parameters]
+    if unknown and not skip_unknown:
+        raise CompetitionParameter.DoesNotExist(
+            f"Parámetros que no pertenecen a la competencia {competition_id}: {unknown}"
+        )
+    entries = [entry for entry in entries if entry['parameter_id'] in parameters]
+    if not entries:
+        return []
+
+    # Calificaciones existentes del juez para el participante (una consulta)
+    existing = {
+        score.parameter_id: score
+        for score in Score.objects.filter(
+            competition_id=competition_id, participant_id=participant_id, judge_id=judge.id,
+            parameter_id__in=[parameter.id for parameter in parameters.values()]
+        )
+    }
+
+    # Resultados FEI de toda la planilla en memoria
+    values = [Decimal(str(entry['value'])) for entry in entries]
+    results = fei_processor.calculate_results_batch(
+        [to_tenths(value) for value in values],
+        [parameters[entry['parameter_id']].effective_coefficient for entry in entries]
+    )
+
+    now = timezone.now()
+    scores, to_create, to_update, edits = [], [], [], []
+    total_delta, count_delta = Decimal('0'), 0
+    for entry, value, result in zip(entries, values, results):
+        parameter = parameters[entry['parameter_id']]
+        result = Decimal(result)
+        comments = entry.get('comments', '')
+        score = existing.get(parameter.id)
+
+        if score is None:
+            score = Score(
+                competition_id=competition_id, participant_id=participant_id,
+                judge=judge, parameter=parameter,
+                value=value, calculated_result=result, comments=comments
+            )
+            to_create.append(score)
+            total_delta += result
+            count_delta += 1
+        else:
+            # Relaciones ya cargadas: la respuesta no vuelve a consultarlas
+            score.parameter = parameter
+            score.judge = judge
+            # Si hay cambio en el valor, registrar la edición
+            if score.value != value:
+                edits.append(ScoreEdit(
+                    score=score, editor=judge,
+                    previous_value=score.value, previous_result=score.calculated_result,
+                    edit_reason=edit_reason
+                ))
+                total_delta += result - score.calculated_result
+                score.value = value
+                score.calculated_result = result
+                score.is_edited = True
+                score.edit_reason = edit_reason
+            score.comments = comments
+            # bulk_update no aplica auto_now
+            score.updated_at = now
+            to_update.append(score)
+        scores.append(score)
+
+    if to_create:
+        Score.objects.bulk_create(to_create)
+    if to_update:
+        Score.objects.bulk_update(to_update, SCORECARD_UPDATE_FIELDS)
+    if edits:
+        ScoreEdit.objects.bulk_create(edits)
+
+    # Suma y conteo del juez (Score.save() no se ejecuta en las escrituras en bloque)
+    apply_score_delta(competition_id, participant_id, judge.id, total_delta, count_delta)
+
+    for score in scores:
+        score._aggregate_state = score.get_aggregate_state()
+
+    # Una sola tarea de sincronización y un solo recálculo para toda la planilla
+    score_changed(competition_id, participant_id, judge.id, score_ids=[score.id for score in scores])
+
+    logger.debug(
+        f"Planilla guardada: competencia {competition_id}, participante {participant_id}, "
+        f"juez {judge.id} ({len(to_create)} nuevas, {len(to_update)} actualizadas, {len(edits)} ediciones)"
+    )
+    return scores
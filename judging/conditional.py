@@ -0,0 +1,99 @@
+"""
+Peticiones condicionales (ETag / If-None-Match) para las vistas de la API.
+Los clientes que sondean (tabletas de jueces, pantallas de resultados)
+reciben 304 sin cuerpo cuando los datos no cambiaron.
+"""
+import hashlib
+from typing import Optional
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+
+
+def make_etag(*parts) -> str:
+    """
+    Construye un ETag a partir de los valores que identifican la versión de un recurso.
+
+    Args:
+        *parts: Valores (fechas, versiones, IDs) que cambian cuando cambia el recurso
+
+    Returns:
+        str: ETag entre comillas
+    """
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return quote_etag(digest)
+
+
+def not_modified(request, etag: str) -> Optional[HttpResponseNotModified]:
+    """
+    Devuelve 304 si el cliente ya tiene la versión indicada.
+
+    Args:
+        request: Petición
+        etag: ETag actual del recurso
+
+    Returns:
+        HttpResponseNotModified o None si hay que enviar el recurso
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return None
+
+    etags = parse_etags(header)
+    if '*' in etags or etag in etags or etag.strip('"') in etags:
+        response = HttpResponseNotModified()
+        set_etag(response, etag)
+        return response
+    return None
+
+
+def set_etag(response, etag: str):
+    """
+    Añade el ETag a la respuesta.
+    Las respuestas dependen del usuario autenticado: no se comparten entre usuarios.
+
+    Args:
+        response: Respuesta
+        etag: ETag del recurso
+    """
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ('Authorization', 'Cookie'))
+    return response
+
+
+def ranking_etag(request, competition_id, *parts) -> str:
+    """
+    ETag de un recurso derivado del ranking de una competencia: cambia con la
+    versión del ranking en caché (sin consultar la base de datos).
+
+    Args:
+        request: Petición (los parámetros de la URL forman parte del ETag)
+        competition_id: ID de la competencia
+        *parts: Valores adicionales que identifican el recurso
+
+    Returns:
+        str: ETag entre comillas
+    """
+    from .snapshots import get_ranking_version
+
+    return make_etag(
+        'rankings', competition_id, get_ranking_version(int(competition_id)),
+        sorted(request.GET.lists()), *parts
+    )
+
+
+def set_immutable(response, etag: str, max_age: int):
+    """
+    Añade el ETag a una respuesta que no cambia (resultados congelados):
+    el cliente la reutiliza sin volver a consultar durante max_age segundos.
+
+    Args:
+        response: Respuesta
+        etag: ETag del recurso
+        max_age: Segundos de validez en el cliente
+    """
+    set_etag(response, etag)
+    response['Cache-Control'] = f'private, max-age={max_age}'
+    return response
@@ -8,17 +8,41 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+
+def encode_frame(message_type, **data):
+    """
+    Codifica una sola vez un mensaje que se difundirá a todo un grupo.
+    El evento del channel layer lleva el texto ya codificado en 'text' y
+    cada consumidor lo reenvía sin llamar a json.dumps.
+    
+    Ejemplo de uso:
+        async_to_sync(channel_layer.group_send)(group, {
+            'type': 'score_message',
+            'text': encode_frame('score_update', score=score_data)
+        })
+    """
+    return json.dumps({'type': message_type, **data})
+
+
 class ScoreConsumer(AsyncWebsocketConsumer):
     """
-    Consumidor para actualizaciones en tiempo real de calificaciones.
+    Consumidor para las calificaciones en tiempo real de un participante.
+    
+    Canal de solo lectura; los jueces envían calificaciones con JudgeScoreConsumer.
+    
+    Protocolo:
+        current_scores: todas las calificaciones del participante por juez
+        scores_update: calificaciones guardadas ('scores') y eliminadas
+            ('deleted') durante la última ventana de difusión
     """
     
     async def connect(self):
-        # Obtener ID de competencia de la URL
-        self.competition_id = self.scope['url_route']['kwargs']['competition_id']
+        # Obtener IDs de competencia y participante de la URL
+        self.competition_id = int(self.scope['url_route']['kwargs']['competition_id'])
+        self.participant_id = int(self.scope['url_route']['kwargs']['participant_id'])
         
-        # Crear nombre de grupo único para esta competencia
-        self.room_group_name = f'rankings_{self.competition_id}'
+        # Grupo de las calificaciones de este participante
+        self.room_group_name = f'scores_{self.competition_id}_{self.participant_id}'
         
         # Unirse al grupo
         await self.channel_layer.group_add(
@@ -27,7 +51,7 @@ class ScoreConsumer(AsyncWebsocketConsumer):
         )
         
         await self.accept()
-        await self.send_current_rankings()
+        await self.send_current_scores()
     
     async def disconnect(self, close_code):
         # Salir del grupo al desconectar
@@ -47,9 +71,11 @@ class ScoreConsumer(AsyncWebsocketConsumer):
             message_type = data.get('type')
             
             if message_type == 'score_update':
-                # Verificar permisos (esto debería ser mejorado en producción)
-                # En esta implementación básica, cualquier cliente puede enviar actualizaciones
-                await self.update_score(data)
+                # Este canal es de solo lectura: los jueces envían por ws/judging/<competencia>/
+                await self.send(text_data=json.dumps({
+                    'type': 'error',
+                    'message': 'Las calificaciones se envían por el canal de jueces'
+                }))
             
             elif message_type == 'request_scores':
                 # El cliente solicita datos actuales
@@ -60,80 +86,6 @@ class ScoreConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             logger.error(f"Error en receive: {e}")
     
-    @database_sync_to_async
-    def update_score(self, data):
-        """
-        Actualizar calificación en la base de datos
-        """
-        from judging.models import Score, CompetitionParameter
-        from django.contrib.auth import get_user_model
-        
-        try:
-            User = get_user_model()
-            
-            judge_id = data.get('judge_id')
-            parameter_id = data.get('parameter_id')
-            value = data.get('value')
-            
-            # Validar datos básicos
-            if not all([judge_id, parameter_id, value is not None]):
-                logger.warning(f"Datos incompletos: {data}")
-                return False
-            
-            # Obtener parámetro de competencia
-            parameter = CompetitionParameter.objects.get(
-                competition_id=self.competition_id,
-                parameter_id=parameter_id
-            )
-            
-            # Obtener juez
-            judge = User.objects.get(id=judge_id)
-            
-            # Actualizar o crear calificación
-            score, created = Score.objects.update_or_create(
-                competition_id=self.competition_id,
-                participant_id=self.participant_id,
-                judge=judge,
-                parameter=parameter,
-                defaults={
-                    'value': value,
-                    'comments': data.get('comments', ''),
-                    'is_edited': data.get('is_edited', False),
-                    'edit_reason': data.get('edit_reason', 'Actualización vía WebSocket')
-                }
-            )
-            
-            # Notificar a todos los clientes en el grupo
-            self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'score_message',
-                    'score': {
-                        'id': score.id,
-                        'judge_id': judge_id,
-                        'parameter_id': parameter_id,
-                        'value': float(score.value),
-                        'calculated_result': float(score.calculated_result),
-                        'is_edited': score.is_edited,
-                        'updated_at': score.updated_at.isoformat()
-                    }
-                }
-            )
-            
-            # Actualizar rankings
-            from judging.services import update_participant_rankings
-            update_participant_rankings(self.competition_id)
-            
-            # Sincronizar con Firebase
-            from judging.firebase import sync_participant_scores
-            sync_participant_scores(self.competition_id, self.participant_id, judge_id)
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error al actualizar calificación: {e}")
-            return False
-    
     @database_sync_to_async
     def get_current_scores(self):
         """
@@ -178,22 +130,221 @@ class ScoreConsumer(AsyncWebsocketConsumer):
         
         await self.send(text_data=json.dumps({
             'type': 'current_scores',
+            'competition_id': self.competition_id,
+            'participant_id': self.participant_id,
             'scores': scores
         }))
     
     async def score_message(self, event):
         """
-        Enviar actualización de calificación a los clientes WebSocket
+        Enviar actualización de calificaciones a los clientes WebSocket
         """
+        # Mensaje ya codificado por quien difunde
+        if 'text' in event:
+            await self.send(text_data=event['text'])
+            return
+        
         await self.send(text_data=json.dumps({
             'type': 'score_update',
             'score': event['score']
         }))
 
 
+class JudgeScoreConsumer(AsyncWebsocketConsumer):
+    """
+    Canal de escritura de calificaciones para los jueces de una competencia.
+    El usuario se autentica con el token de la API REST y su asignación
+    (CompetitionJudge) se comprueba una sola vez al conectar. Cada calificación
+    se confirma con 'score_ack' tras el commit; el recálculo de rankings, la
+    sincronización y la difusión quedan diferidos en el pipeline de cambios.
+    
+    Protocolo:
+        cliente -> {'type': 'score_update', 'request_id', 'participant_id',
+                    'parameter_id', 'value', 'comments', 'edit_reason'}
+        servidor -> {'type': 'score_ack', 'request_id', 'score'}
+                    {'type': 'score_error', 'request_id', 'message'}
+    """
+    
+    # Códigos de cierre cuando se rechaza la conexión
+    CLOSE_UNAUTHENTICATED = 4401
+    CLOSE_FORBIDDEN = 4403
+    
+    async def connect(self):
+        self.competition_id = int(self.scope['url_route']['kwargs']['competition_id'])
+        self.user = self.scope.get('user')
+        
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=self.CLOSE_UNAUTHENTICATED)
+            return
+        
+        if not await self.load_assignment():
+            logger.warning(f"Usuario {self.user.id} no asignado a la competencia {self.competition_id}")
+            await self.close(code=self.CLOSE_FORBIDDEN)
+            return
+        
+        await self.accept()
+    
+    async def disconnect(self, close_code):
+        pass
+    
+    @database_sync_to_async
+    def load_assignment(self):
+        """
+        Comprueba que el usuario es juez de la competencia y carga los
+        parámetros evaluables para no consultarlos en cada mensaje.
+        """
+        from competitions.assignments import is_assigned_judge
+        from judging.models import CompetitionParameter
+        
+        if not is_assigned_judge(self.competition_id, self.user.id):
+            return False
+        
+        self.parameters = {
+            parameter.parameter_id: parameter
+            for parameter in CompetitionParameter.objects.filter(
+                competition_id=self.competition_id
+            ).select_related('parameter')
+        }
+        self.participant_ids = set()
+        return True
+    
+    async def receive(self, text_data):
+        """
+        Recibir mensaje desde WebSocket
+        """
+        try:
+            data = json.loads(text_data)
+        except json.JSONDecodeError:
+            logger.error(f"Error al decodificar JSON: {text_data}")
+            return
+        
+        if data.get('type') != 'score_update':
+            return
+        
+        request_id = data.get('request_id')
+        try:
+            score = await self.save_score(data)
+        except ValueError as e:
+            await self.send(text_data=encode_frame('score_error', request_id=request_id, message=str(e)))
+            return
+        except Exception as e:
+            logger.error(f"Error al guardar calificación vía WebSocket: {e}")
+            await self.send(text_data=encode_frame(
+                'score_error', request_id=request_id, message='Error al guardar la calificación'
+            ))
+            return
+        
+        await self.send(text_data=encode_frame('score_ack', request_id=request_id, score=score))
+    
+    @database_sync_to_async
+    def save_score(self, data):
+        """
+        Guarda una calificación del juez conectado.
+        Al salir de la transacción ya está confirmada; el pipeline solo registra
+        el trabajo diferido (rankings, Firebase y difusión).
+        
+        Returns:
+            Dict: Calificación guardada
+        
+        Raises:
+            ValueError: Si los datos no son válidos
+        """
+        from decimal import Decimal, InvalidOperation
+        from django.db import transaction
+        from competitions.models import Competition
+        from judging.models import Score, ScoreEdit
+        from judging.parameters import get_competition_parameters
+        from judging.score_stream import serialize_score
+        
+        try:
+            participant_id = int(data['participant_id'])
+            parameter_id = int(data['parameter_id'])
+            value = Decimal(str(data['value']))
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            raise ValueError("Se requiere participant_id, parameter_id y value")
+        
+        parameter = self.parameters.get(parameter_id)
+        if parameter is None:
+            raise ValueError(f"Parámetro {parameter_id} no evaluable en esta competencia")
+        
+        # Valor máximo efectivo desde la caché de parámetros (refleja cambios
+        # hechos después de conectar)
+        max_value = next(
+            (param['max_value'] for param in get_competition_parameters(self.competition_id)['parameters']
+             if param['id'] == parameter_id),
+            parameter.effective_max_value
+        )
+        if not Decimal('0') <= value <= Decimal(max_value):
+            raise ValueError(f"La calificación debe estar entre 0 y {max_value}")
+        
+        if participant_id not in self.participant_ids:
+            from competitions.models import Participant
+            if not Participant.objects.filter(id=participant_id, competition_id=self.competition_id).exists():
+                raise ValueError(f"Participante {participant_id} no encontrado")
+            self.participant_ids.add(participant_id)
+        
+        comments = data.get('comments', '')
+        edit_reason = data.get('edit_reason', '')
+        
+        with transaction.atomic():
+            # La competencia puede finalizar con la conexión abierta
+            if Competition.objects.filter(id=self.competition_id, status='completed').exists():
+                raise ValueError("La competencia está finalizada: no se pueden modificar sus calificaciones")
+            
+            score = Score.objects.filter(
+                competition_id=self.competition_id,
+                participant_id=participant_id,
+                judge_id=self.user.id,
+                parameter=parameter
+            ).first()
+            
+            if score is None:
+                score = Score(
+                    competition_id=self.competition_id,
+                    participant_id=participant_id,
+                    judge=self.user,
+                    parameter=parameter,
+                    value=value,
+                    comments=comments
+                )
+                score.save()
+            elif score.value != value:
+                previous_value = score.value
+                previous_result = score.calculated_result
+                
+                score.parameter = parameter
+                score.value = value
+                score.comments = comments
+                score.is_edited = True
+                score.edit_reason = edit_reason
+                score.save()
+                
+                # Registro de edición
+                ScoreEdit.objects.create(
+                    score=score,
+                    editor=self.user,
+                    previous_value=previous_value,
+                    previous_result=previous_result,
+                    edit_reason=edit_reason
+                )
+            else:
+                score.parameter = parameter
+                score.comments = comments
+                score.save(update_fields=['comments', 'updated_at'])
+        
+        return serialize_score(score)
+
+
 class RankingConsumer(AsyncWebsocketConsumer):
     """
     Consumidor para actualizaciones en tiempo real de rankings.
+    
+    Protocolo (todos los mensajes llevan la versión del ranking):
+        current_rankings / rankings_update: ranking completo
+        rankings_delta: filas nuevas o modificadas ('changed') y participantes
+            eliminados ('removed') respecto a 'base_version'. Si el cliente no
+            tiene esa versión envía {'type': 'request_rankings'} para recibir
+            el ranking completo.
     """
     
     async def connect(self):
@@ -237,56 +388,26 @@ class RankingConsumer(AsyncWebsocketConsumer):
             }))
     
     @database_sync_to_async
-    def get_current_rankings(self):
-        from judging.models import Ranking
-        
-        rankings = Ranking.objects.filter(
-            competition_id=self.competition_id
-        ).select_related(
-            'participant', 'participant__rider', 'participant__horse'
-        ).order_by('position')
-        
-        result = []
-        for ranking in rankings:
-            participant = ranking.participant
-            rider = participant.rider
-            horse = participant.horse
-            
-            result.append({
-                'id': ranking.id,
-                'participant_id': participant.id,
-                'position': ranking.position,
-                'average': float(ranking.average_score),
-                'percentage': float(ranking.percentage),
-                'rider': {
-                    'id': rider.id,
-                    'name': f"{rider.first_name} {rider.last_name}",
-                    'nationality': rider.nationality or ''
-                },
-                'horse': {
-                    'id': horse.id,
-                    'name': horse.name,
-                    'breed': horse.breed or ''
-                }
-            })
-        
-        return result
+    def get_current_rankings_frame(self):
+        from judging.snapshots import get_ranking_frame
+        return get_ranking_frame(self.competition_id, 'current_rankings')
     
     async def send_current_rankings(self):
         """
         Enviar rankings actuales al cliente
         """
-        rankings = await self.get_current_rankings()
-        
-        await self.send(text_data=json.dumps({
-            'type': 'current_rankings',
-            'rankings': rankings
-        }))
+        frame = await self.get_current_rankings_frame()
+        await self.send(text_data=frame)
     
     async def rankings_update(self, event):
         """
         Enviar actualización de rankings a los clientes WebSocket
         """
+        # Mensaje ya codificado por quien difunde
+        if 'text' in event:
+            await self.send(text_data=event['text'])
+            return
+        
         await self.send(text_data=json.dumps({
             'type': 'rankings_update',
             'rankings': event['rankings']
@@ -306,46 +427,23 @@ def notify_rankings_update(competition_id, rankings_data=None):
     from asgiref.sync import async_to_sync
     
     try:
-        # Si no se proporciona data, obtener rankings actuales
+        # Codificar el mensaje una sola vez: delta respecto a la última
+        # difusión si no se proporciona data
         if rankings_data is None:
-            from judging.models import Ranking
-            
-            rankings = Ranking.objects.filter(
-                competition_id=competition_id
-            ).select_related(
-                'participant', 'participant__rider', 'participant__horse'
-            ).order_by('position')
-            
-            # Formatear para enviar por WebSocket
-            rankings_data = []
-            for ranking in rankings:
-                participant = ranking.participant
-                rider = participant.rider
-                horse = participant.horse
-                
-                rankings_data.append({
-                    'id': ranking.id,
-                    'participant_id': participant.id,
-                    'position': ranking.position,
-                    'average': float(ranking.average_score),
-                    'percentage': float(ranking.percentage),
-                    'rider': {
-                        'id': rider.id,
-                        'name': f"{rider.first_name} {rider.last_name}"
-                    },
-                    'horse': {
-                        'id': horse.id,
-                        'name': horse.name
-                    }
-                })
+            from judging.snapshots import get_ranking_broadcast_frame
+            version, frame = get_ranking_broadcast_frame(competition_id)
+        else:
+            version, frame = None, encode_frame('rankings_update', rankings=rankings_data)
         
-        # Enviar actualización a todos los clientes conectados
+        # Enviar actualización a todos los clientes conectados (WebSocket y SSE);
+        # la versión sirve de identificador de evento para reanudar el stream SSE
         channel_layer = get_channel_layer()
         async_to_sync(channel_layer.group_send)(
             f'rankings_{competition_id}',
             {
                 'type': 'rankings_update',
-                'rankings': rankings_data
+                'text': frame,
+                'version': version
             }
         )
         
@@ -0,0 +1,380 @@
+"""
+Exportación de resultados (CSV y XLSX) de una competencia.
+Las filas se generan por bloques de participantes (`.iterator(chunk_size=...)`)
+y se envían con StreamingHttpResponse: la memoria no crece con el tamaño de la
+competencia y la cabecera llega al cliente antes de terminar las consultas.
+
+StreamingHttpResponse (Django 4.2) acumula en memoria un iterador síncrono
+servido por ASGI, y uno asíncrono servido por WSGI. Por eso bajo ASGI (Daphne)
+se entrega aiter_export, que pide cada bloque con sync_to_async, y bajo WSGI
+el generador síncrono.
+Las competencias finalizadas se sirven desde un archivo generado una sola vez.
+"""
+import csv
+import hashlib
+import logging
+import tempfile
+import zipfile
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Tuple
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Participantes leídos por consulta
+EXPORT_CHUNK_SIZE = 200
+
+# Bytes acumulados antes de enviar un bloque del XLSX
+XLSX_FLUSH_SIZE = 64 * 1024
+
+# Carpeta (en default_storage) de los archivos de competencias finalizadas
+EXPORT_DIRECTORY = 'exports/results'
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def get_export_columns(competition_id: int) -> Tuple[List[Tuple[int, str]], List[Dict[str, Any]], List[str]]:
+    """
+    Jueces, parámetros y cabecera de la exportación.
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        Tuple: ([(judge_id, nombre)], [parámetros], cabecera)
+    """
+    from competitions.models import CompetitionJudge
+    from .models import CompetitionParameter
+
+    judges = [
+        (judge_id, f"{first_name} {last_name}".strip())
+        for judge_id, first_name, last_name in CompetitionJudge.objects.filter(
+            competition_id=competition_id
+        ).order_by('id').values_list('judge_id', 'judge__first_name', 'judge__last_name')
+    ]
+    parameters = list(
+        CompetitionParameter.objects.filter(
+            competition_id=competition_id
+        ).order_by('order').values('id', 'parameter__name')
+    )
+
+    header = ['Posición', 'Dorsal', 'Jinete', 'Caballo', 'Categoría']
+    for _, judge_name in judges:
+        header.extend(f"{judge_name} - {parameter['parameter__name']}" for parameter in parameters)
+        header.append(f"{judge_name} - Total")
+    header.extend(['Promedio', 'Porcentaje'])
+
+    return judges, parameters, header
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_result_rows(competition_id: int, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """
+    Genera la cabecera y una fila por participante en orden de posición, con la
+    calificación de cada juez en cada parámetro, el total por juez y el resultado final.
+
+    Args:
+        competition_id: ID de la competencia
+        chunk_size: Participantes leídos por consulta
+
+    Yields:
+        List: Valores de cada fila
+    """
+    from .models import Ranking, Score
+
+    judges, parameters, header = get_export_columns(competition_id)
+    yield header
+
+    rankings = Ranking.objects.filter(competition_id=competition_id).order_by('position').values_list(
+        'participant_id', 'position', 'participant__number',
+        'participant__rider__first_name', 'participant__rider__last_name',
+        'participant__horse__name', 'participant__category__name',
+        'average_score', 'percentage'
+    ).iterator(chunk_size=chunk_size)
+
+    for chunk in _chunks(rankings, chunk_size):
+        # Matriz de calificaciones solo de los participantes del bloque
+        values = {}
+        totals = {}
+        for participant_id, judge_id, parameter_id, value, result in Score.objects.filter(
+            competition_id=competition_id,
+            participant_id__in=[row[0] for row in chunk]
+        ).values_list('participant_id', 'judge_id', 'parameter_id', 'value', 'calculated_result'):
+            values[(participant_id, judge_id, parameter_id)] = value
+            totals[(participant_id, judge_id)] = totals.get((participant_id, judge_id), 0) + result
+
+        for participant_id, position, number, first_name, last_name, horse, category, average, percentage in chunk:
+            row = [position, number, f"{first_name} {last_name}".strip(), horse, category]
+            for judge_id, _ in judges:
+                row.extend(values.get((participant_id, judge_id, parameter['id'])) for parameter in parameters)
+                row.append(totals.get((participant_id, judge_id)))
+            row.extend([average, percentage])
+            yield row
+
+
+class _Echo:
+    """Destino de csv.writer que devuelve cada línea en lugar de guardarla"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows: Iterable[List[Any]], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Codifica las filas como CSV (UTF-8 con BOM para Excel).
+
+    Args:
+        rows: Filas a exportar
+        chunk_size: Filas por bloque enviado
+
+    Yields:
+        bytes: Bloques del archivo
+    """
+    writer = csv.writer(_Echo())
+    first = True
+    for chunk in _chunks(rows, chunk_size):
+        data = ''.join(writer.writerow(['' if value is None else value for value in row]) for row in chunk)
+        if first:
+            data = '\ufeff' + data
+            first = False
+        yield data.encode('utf-8')
+
+
+class _StreamBuffer:
+    """
+    Archivo no posicionable para zipfile: acumula lo escrito hasta recogerlo.
+    Sin seek(), zipfile escribe los tamaños al final de cada entrada y el ZIP
+    se puede enviar a medida que se genera.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+        self.size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        self.size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+XLSX_STATIC_PARTS = (
+    ('[Content_Types].xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ('_rels/.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+     'Target="xl/workbook.xml"/>'
+     '</Relationships>'),
+    ('xl/workbook.xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+     '<sheets><sheet name="Resultados" sheetId="1" r:id="rId1"/></sheets>'
+     '</workbook>'),
+    ('xl/_rels/workbook.xml.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+     'Target="worksheets/sheet1.xml"/>'
+     '</Relationships>'),
+)
+
+
+def _xlsx_cell(value) -> str:
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float)) or hasattr(value, 'as_tuple'):
+        return f'<c><v>{value}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def iter_xlsx(rows: Iterable[List[Any]]) -> Iterator[bytes]:
+    """
+    Codifica las filas como una hoja XLSX mínima (sin dependencias externas).
+
+    Args:
+        rows: Filas a exportar
+
+    Yields:
+        bytes: Bloques del archivo
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS:
+            archive.writestr(name, content)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            for row in rows:
+                sheet.write(f"<row>{''.join(_xlsx_cell(value) for value in row)}</row>".encode('utf-8'))
+                if buffer.size >= XLSX_FLUSH_SIZE:
+                    yield buffer.pop()
+            sheet.write(b'</sheetData></worksheet>')
+
+    yield buffer.pop()
+
+
+def iter_export(competition_id: int, file_format: str) -> Iterator[bytes]:
+    """Genera el archivo de resultados en el formato pedido"""
+    rows = iter_result_rows(competition_id)
+    if file_format == 'xlsx':
+        return iter_xlsx(rows)
+    return iter_csv(rows)
+
+
+async def aiter_export(competition_id: int, file_format: str) -> AsyncIterator[bytes]:
+    """
+    Versión asíncrona de iter_export para ASGI: cada bloque se genera con
+    sync_to_async (en el mismo hilo, que conserva la conexión y el cursor) y se
+    envía antes de pedir el siguiente.
+    """
+    iterator = iter_export(competition_id, file_format)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(iterator, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        # Cliente desconectado o fin del archivo: liberar el cursor
+        await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+def get_export_fingerprint(competition_id: int) -> str:
+    """
+    Identifica el estado de los resultados (cambia si cambian calificaciones,
+    rankings o participantes).
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        str: Huella corta
+    """
+    from django.db.models import Count, Max
+    from competitions.models import Participant
+    from .models import Ranking, Score
+
+    parts = [
+        Score.objects.filter(competition_id=competition_id).aggregate(count=Count('id'), last=Max('updated_at')),
+        Ranking.objects.filter(competition_id=competition_id).aggregate(count=Count('id'), last=Max('updated_at')),
+        Participant.objects.filter(competition_id=competition_id).aggregate(count=Count('id'), last=Max('updated_at')),
+    ]
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def get_cached_export(competition_id: int, file_format: str) -> str:
+    """
+    Devuelve el archivo de resultados de una competencia finalizada, generándolo
+    si no existe para el estado actual. Los archivos anteriores se eliminan.
+
+    Args:
+        competition_id: ID de la competencia
+        file_format: 'csv' o 'xlsx'
+
+    Returns:
+        str: Nombre del archivo en default_storage
+    """
+    prefix = f"competition_{competition_id}_"
+    name = f"{EXPORT_DIRECTORY}/{prefix}{get_export_fingerprint(competition_id)}.{file_format}"
+    if default_storage.exists(name):
+        return name
+
+    with tempfile.TemporaryFile() as temporary:
+        for chunk in iter_export(competition_id, file_format):
+            temporary.write(chunk)
+        temporary.seek(0)
+        saved_name = default_storage.save(name, File(temporary))
+
+    # Eliminar los archivos de estados anteriores
+    try:
+        _, files = default_storage.listdir(EXPORT_DIRECTORY)
+        for file_name in files:
+            path = f"{EXPORT_DIRECTORY}/{file_name}"
+            if file_name.startswith(prefix) and file_name.endswith(f".{file_format}") and path != saved_name:
+                default_storage.delete(path)
+    except (NotImplementedError, OSError) as e:
+        logger.warning(f"No se pudieron limpiar las exportaciones anteriores de la competencia {competition_id}: {e}")
+
+    logger.info(f"Exportación {file_format} de la competencia {competition_id} generada: {saved_name}")
+    return saved_name
+
+
+def export_response(competition, file_format: str, asynchronous: bool = False):
+    """
+    Respuesta con los resultados de una competencia: archivo en caché si está
+    finalizada, generación en streaming en cualquier otro caso.
+
+    Args:
+        competition: Competencia
+        file_format: 'csv' o 'xlsx'
+        asynchronous: Si es True (petición ASGI), el contenido es un iterador
+            asíncrono; si no, uno síncrono (WSGI)
+
+    Returns:
+        HttpResponse: FileResponse o StreamingHttpResponse
+    """
+    filename = f"resultados_competencia_{competition.id}.{file_format}"
+    content_type = EXPORT_FORMATS[file_format]
+
+    if competition.status == 'completed':
+        name = get_cached_export(competition.id, file_format)
+        response = FileResponse(
+            default_storage.open(name, 'rb'), as_attachment=True,
+            filename=filename, content_type=content_type
+        )
+        response['Cache-Control'] = 'private, max-age=3600'
+        return response
+
+    content = (aiter_export if asynchronous else iter_export)(competition.id, file_format)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-cache'
+    # Evitar que un proxy acumule la respuesta completa antes de enviarla
+    response['X-Accel-Buffering'] = 'no'
+    return response
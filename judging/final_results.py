@@ -0,0 +1,309 @@
+"""
+Resultados finales congelados de las competencias finalizadas.
+Al finalizar una competencia se materializa una sola vez el ranking, la
+comparación por juez (sumas, promedios y matriz de calificaciones) y los
+parámetros en una fila FinalResults. Las vistas de lectura sirven esa copia
+inmutable con cabeceras de caché de larga duración y los recálculos dejan de
+aplicarse a la competencia.
+"""
+import hashlib
+import json
+import logging
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Segundos que se conserva en caché la copia (o su ausencia) de cada competencia
+FINAL_RESULTS_CACHE_TIMEOUT = 60 * 60
+
+# Segundos que los clientes pueden reutilizar una respuesta congelada
+FINAL_RESULTS_MAX_AGE = 60 * 60 * 24
+
+
+class CompetitionNotCompleted(Exception):
+    """La competencia no está finalizada y sus resultados no se pueden congelar"""
+
+
+class CompetitionClosed(Exception):
+    """La competencia está finalizada y sus calificaciones ya no se pueden modificar"""
+
+
+def ensure_scores_editable(competition):
+    """
+    Comprueba que se puedan guardar o eliminar calificaciones de una competencia.
+    Una competencia finalizada sirve sus resultados congelados: un cambio tardío
+    actualizaría el ranking en vivo y Firebase sin coincidir con la API.
+
+    Args:
+        competition: Competencia
+
+    Raises:
+        CompetitionClosed: Si la competencia está finalizada
+    """
+    if competition.is_completed:
+        raise CompetitionClosed(
+            f"La competencia {competition.id} está finalizada: no se pueden modificar sus calificaciones"
+        )
+
+
+def _final_results_key(competition_id: int) -> str:
+    return f'competition:{competition_id}:final_results'
+
+
+def _as_json(data: Any) -> Any:
+    """Normaliza fechas y decimales tal como los envía la API"""
+    return json.loads(json.dumps(data, cls=JSONEncoder))
+
+
+def build_judge_comparisons(competition_id: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Construye la comparación por juez de todos los participantes en un número
+    fijo de consultas (mismo formato que services.compare_judge_scores).
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        Dict: {participant_id (str): comparación}
+    """
+    from competitions.models import CompetitionJudge, Participant
+    from .aggregates import get_judge_totals
+    from .models import CompetitionParameter, Score
+    from .processors import fei_processor, to_tenths
+
+    judges = list(CompetitionJudge.objects.filter(
+        competition_id=competition_id
+    ).select_related('judge').order_by('id'))
+    parameters = list(CompetitionParameter.objects.filter(
+        competition_id=competition_id
+    ).select_related('parameter').order_by('order'))
+
+    # Matriz de calificaciones {participante: {juez: {parámetro: valor}}}
+    matrix = {}
+    for participant_id, judge_id, parameter_id, value in Score.objects.filter(
+        competition_id=competition_id
+    ).values_list('participant_id', 'judge_id', 'parameter__parameter_id', 'value'):
+        matrix.setdefault(participant_id, {}).setdefault(judge_id, {})[parameter_id] = value
+
+    totals = get_judge_totals(competition_id)
+
+    comparisons = {}
+    for participant_id in Participant.objects.filter(
+        competition_id=competition_id
+    ).values_list('id', flat=True):
+        if not judges:
+            comparisons[str(participant_id)] = {
+                'judges': [], 'parameters': [], 'judges_count': 0, 'parameters_count': 0
+            }
+            continue
+
+        judge_scores = matrix.get(participant_id, {})
+        judge_totals = totals.get(participant_id, {})
+        judge_averages = fei_processor.calculate_totals_batch({
+            judge_id: (to_tenths(total), count) for judge_id, (total, count) in judge_totals.items()
+        })
+
+        judges_data = []
+        for judge in judges:
+            total, count = judge_totals.get(judge.judge_id, (Decimal('0'), 0))
+            average = judge_averages.get(judge.judge_id, {}).get('average', Decimal('0'))
+            judges_data.append({
+                'id': judge.judge.id,
+                'name': f"{judge.judge.first_name} {judge.judge.last_name}",
+                'is_head_judge': judge.is_head_judge,
+                'scores': {
+                    parameter_id: float(value)
+                    for parameter_id, value in judge_scores.get(judge.judge_id, {}).items()
+                },
+                'total': float(total),
+                'scores_count': count,
+                'average': float(average)
+            })
+
+        parameters_data = []
+        for param in parameters:
+            values = [
+                scores[param.parameter_id] for scores in judge_scores.values()
+                if param.parameter_id in scores
+            ]
+            parameters_data.append({
+                'id': param.parameter.id,
+                'name': param.parameter.name,
+                'coefficient': param.effective_coefficient,
+                'order': param.order,
+                'average': float(sum(values) / len(values)) if values else 0
+            })
+
+        comparisons[str(participant_id)] = {
+            'judges': judges_data,
+            'parameters': parameters_data,
+            'judges_count': len(judges_data),
+            'parameters_count': len(parameters_data)
+        }
+
+    return comparisons
+
+
+def build_final_results(competition_id: int) -> Dict[str, Any]:
+    """
+    Construye los resultados finales de una competencia desde la base de datos.
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        Dict: 'rankings' (formato API), 'live' (formato WebSocket/Firebase),
+              'parameters' y 'comparisons' por participante
+    """
+    from .models import CompetitionParameter
+    from .serializers import CompetitionParameterSerializer
+    from .snapshots import build_ranking_snapshot
+
+    parameters = CompetitionParameter.objects.filter(
+        competition_id=competition_id
+    ).select_related('parameter').order_by('order')
+
+    return _as_json({
+        'rankings': build_ranking_snapshot(competition_id, 'api'),
+        'live': build_ranking_snapshot(competition_id, 'live'),
+        'parameters': CompetitionParameterSerializer(parameters, many=True).data,
+        'comparisons': build_judge_comparisons(competition_id)
+    })
+
+
+def get_final_results(competition_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Devuelve los resultados congelados de una competencia.
+    La ausencia de resultados también se guarda en caché, de modo que las
+    competencias en curso no agregan consultas a las vistas de rankings.
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        Dict con 'checksum', 'frozen_at' y 'data', o None si no están congelados
+    """
+    from .models import FinalResults
+
+    key = _final_results_key(competition_id)
+    entry = cache.get(key)
+    if entry is None:
+        row = FinalResults.objects.filter(
+            competition_id=competition_id
+        ).values('checksum', 'frozen_at', 'data').first()
+        entry = row or False
+        cache.set(key, entry, FINAL_RESULTS_CACHE_TIMEOUT)
+    return entry or None
+
+
+def invalidate_final_results(competition_id: int):
+    """
+    Descarta la copia en caché, ahora y al confirmarse la transacción.
+
+    Args:
+        competition_id: ID de la competencia
+    """
+    key = _final_results_key(competition_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+@transaction.atomic
+def freeze_competition_results(competition_id: int, user=None, force: bool = False):
+    """
+    Congela los resultados de una competencia finalizada.
+    Recalcula el ranking una última vez y guarda los resultados; si ya estaban
+    congelados los devuelve sin cambios (salvo con force=True).
+
+    Args:
+        competition_id: ID de la competencia
+        user: Usuario que congela los resultados (opcional)
+        force: Si es True, vuelve a materializar resultados ya congelados
+
+    Returns:
+        FinalResults: Resultados congelados
+
+    Raises:
+        CompetitionNotCompleted: Si la competencia no está finalizada
+    """
+    from competitions.models import Competition
+    from .models import FinalResults
+    from .services import update_participant_rankings
+
+    competition = Competition.objects.select_for_update().get(id=competition_id)
+    if not competition.is_completed:
+        raise CompetitionNotCompleted(
+            f"La competencia {competition_id} no está finalizada (estado: {competition.status})"
+        )
+
+    existing = FinalResults.objects.filter(competition_id=competition_id).first()
+    if existing is not None and not force:
+        return existing
+
+    update_participant_rankings(competition_id)
+    data = build_final_results(competition_id)
+    checksum = hashlib.sha1(
+        json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    ).hexdigest()
+
+    if existing is not None:
+        existing.delete()
+    final_results = FinalResults.objects.create(
+        competition_id=competition_id, data=data, checksum=checksum,
+        frozen_by=user if user is not None and user.is_authenticated else None
+    )
+    invalidate_final_results(competition_id)
+
+    logger.info(
+        f"Resultados congelados para competencia {competition_id}: "
+        f"{len(data['rankings'])} participantes"
+    )
+    return final_results
+
+
+def unfreeze_competition_results(competition_id: int) -> bool:
+    """
+    Elimina los resultados congelados (p. ej. si la competencia se reabre).
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        bool: True si había resultados congelados
+    """
+    from .models import FinalResults
+
+    deleted, _ = FinalResults.objects.filter(competition_id=competition_id).delete()
+    invalidate_final_results(competition_id)
+    if deleted:
+        logger.info(f"Resultados finales descongelados para competencia {competition_id}")
+    return bool(deleted)
+
+
+def final_response(request, final: Dict[str, Any], payload: Any, *parts):
+    """
+    Respuesta de la API para datos congelados: ETag derivado de la suma de
+    verificación y caché de larga duración en el cliente.
+
+    Args:
+        request: Petición
+        final: Resultados congelados (ver get_final_results)
+        payload: Datos de la respuesta, o función que construye la Response
+        *parts: Valores adicionales que identifican el recurso
+
+    Returns:
+        Response o 304 si el cliente ya tiene esa versión
+    """
+    from rest_framework.response import Response
+    from .conditional import make_etag, not_modified, set_immutable
+
+    etag = make_etag('final', final['checksum'], sorted(request.GET.lists()), *parts)
+    response = not_modified(request, etag)
+    if response is None:
+        response = payload() if callable(payload) else Response(payload)
+    return set_immutable(response, etag, FINAL_RESULTS_MAX_AGE)
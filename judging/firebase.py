@@ -4,6 +4,8 @@ Implementa sincronización bidireccional para calificaciones y rankings en tiemp
 """
 import os
 import json
+import time
+import threading
 import firebase_admin
 from firebase_admin import credentials, db
 from typing import Dict, List, Any, Optional, Union
@@ -17,12 +19,37 @@ logger = logging.getLogger(__name__)
 _firebase_initialized = False
 _firebase_app = None
 
+# Métricas de los lotes de calificaciones enviados
+_score_sync_lock = threading.Lock()
+_score_sync_metrics = {
+    'batches': 0,
+    'nodes': 0,
+    'errors': 0,
+    'last_latency_ms': None,
+    'max_latency_ms': None,
+    'total_latency_ms': 0.0
+}
+
+
+def use_firebase_stub() -> bool:
+    """
+    Indica si se debe usar la base de datos local en memoria en lugar de Firebase.
+    
+    Returns:
+        bool: True si FIREBASE_BACKEND = 'stub'
+    """
+    return getattr(settings, 'FIREBASE_BACKEND', 'firebase') == 'stub'
+
+
 def initialize_firebase():
     """
     Inicializa la conexión con Firebase si no está ya inicializada.
     """
     global _firebase_initialized, _firebase_app
     
+    if use_firebase_stub():
+        return True
+    
     if not _firebase_initialized:
         cred_path = getattr(settings, 'FIREBASE_CREDENTIALS', None)
         
@@ -66,6 +93,10 @@ def get_firebase_ref(path: str):
         Exception: Si no se puede obtener la referencia
     """
     try:
+        if use_firebase_stub():
+            from .firebase_stub import firebase_stub
+            return firebase_stub.reference(path)
+        
         initialize_firebase()
         return db.reference(path)
     except Exception as e:
@@ -93,13 +124,160 @@ def decimal_to_float(obj):
         return obj
 
 
-def sync_rankings(competition_id: int, rankings: Optional[List[Dict[str, Any]]] = None) -> bool:
+def build_ranking_nodes(rankings: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Separa los rankings en datos cambiantes (posición, puntuación) y metadatos
+    estáticos del participante (jinete, caballo, categoría, dorsal).
+    
+    Args:
+        rankings: Lista de rankings con el participante
+    
+    Returns:
+        Dict: {'rankings': {participant_id: datos}, 'participants': {participant_id: metadatos}}
+    """
+    ranking_nodes = {}
+    participant_nodes = {}
+    
+    for ranking in rankings:
+        participant = ranking.get('participant')
+        participant_id = ranking.get('participant_id') or (participant.id if participant else None)
+        
+        if not participant_id:
+            continue
+        
+        node = {
+            'average': decimal_to_float(ranking.get('average')),
+            'percentage': decimal_to_float(ranking.get('percentage')),
+            'position': ranking.get('position', 0),
+            'previousPosition': ranking.get('previous_position'),
+        }
+        
+        if hasattr(participant, 'rider') and hasattr(participant, 'horse'):
+            rider = participant.rider
+            horse = participant.horse
+            category = participant.category
+            
+            node['withdrawn'] = participant.is_withdrawn
+            participant_nodes[str(participant_id)] = {
+                'rider': {
+                    'id': rider.id,
+                    'firstName': rider.first_name,
+                    'lastName': rider.last_name,
+                    'nationality': rider.nationality or '',
+                    'fullName': f"{rider.first_name} {rider.last_name}"
+                },
+                'horse': {
+                    'id': horse.id,
+                    'name': horse.name,
+                    'breed': horse.breed or '',
+                    'color': horse.color or ''
+                },
+                'category': {
+                    'id': category.id,
+                    'name': category.name,
+                    'code': category.code
+                } if category else {},
+                'number': participant.number,
+                'order': participant.order
+            }
+        elif isinstance(ranking.get('rider'), dict):
+            # Entrada del ranking en caché (judging.snapshots, formato 'live')
+            rider = ranking['rider']
+            
+            node['withdrawn'] = ranking.get('withdrawn', False)
+            participant_nodes[str(participant_id)] = {
+                'rider': {
+                    'id': rider['id'],
+                    'firstName': rider['first_name'],
+                    'lastName': rider['last_name'],
+                    'nationality': rider['nationality'],
+                    'fullName': rider['name']
+                },
+                'horse': ranking['horse'],
+                'category': ranking.get('category') or {},
+                'number': ranking.get('number'),
+                'order': ranking.get('order')
+            }
+        
+        ranking_nodes[str(participant_id)] = node
+    
+    return {'rankings': ranking_nodes, 'participants': participant_nodes}
+
+
+def flatten_node(node: Any, prefix: str = '') -> Dict[str, Any]:
+    """
+    Convierte un árbol en un diccionario {ruta: hoja}.
+    Los valores None y los diccionarios vacíos no existen en Firebase y se omiten.
+    
+    Args:
+        node: Árbol a aplanar
+        prefix: Ruta base
+    
+    Returns:
+        Dict: Hojas del árbol indexadas por ruta
+    """
+    if isinstance(node, dict):
+        leaves = {}
+        for key, value in node.items():
+            path = f"{prefix}/{key}" if prefix else str(key)
+            leaves.update(flatten_node(value, path))
+        return leaves
+    
+    if node is None:
+        return {}
+    
+    return {prefix: node}
+
+
+def diff_nodes(previous: Dict[str, Any], current: Dict[str, Any], prefix: str) -> Dict[str, Any]:
+    """
+    Calcula las hojas que cambiaron entre dos árboles, listas para un update() multi-ruta.
+    Un participante que ya no está se elimina con un único None en su nodo.
+    
+    Args:
+        previous: Árbol enviado anteriormente
+        current: Árbol nuevo
+        prefix: Ruta del árbol en Firebase
+    
+    Returns:
+        Dict: {ruta: valor} con las hojas nuevas o modificadas y las eliminadas (None)
+    """
+    changes = {}
+    
+    for key in previous.keys() - current.keys():
+        changes[f"{prefix}/{key}"] = None
+    
+    for key, node in current.items():
+        old_leaves = flatten_node(previous.get(key), f"{prefix}/{key}")
+        new_leaves = flatten_node(node, f"{prefix}/{key}")
+        
+        for path in old_leaves.keys() - new_leaves.keys():
+            changes[path] = None
+        
+        for path, value in new_leaves.items():
+            if old_leaves.get(path) != value:
+                changes[path] = value
+    
+    return changes
+
+
+def sync_rankings(competition_id: int, rankings: Optional[List[Dict[str, Any]]] = None, full: bool = False) -> bool:
     """
     Sincroniza los rankings con Firebase.
     
+    Los datos cambiantes se guardan en `rankings/{competition_id}` y los metadatos
+    de cada participante en `participants/{competition_id}`. En modo 'delta'
+    (FIREBASE_RANKINGS_SYNC_MODE) se compara con el último estado enviado y solo
+    se envían las hojas modificadas en un único update() multi-ruta.
+    
+    El registro FirebaseSync se bloquea solo para calcular las diferencias; el
+    envío se hace sin bloqueo y el nuevo estado se guarda si snapshot_version
+    no cambió entretanto (si cambió, se encola un envío completo).
+    
     Args:
         competition_id: ID de la competencia
         rankings: Lista de rankings precalculados (opcional)
+        full: Si es True, reemplaza los nodos completos con set()
     
     Returns:
         bool: True si la sincronización fue exitosa
@@ -108,108 +286,94 @@ def sync_rankings(competition_id: int, rankings: Optional[List[Dict[str, Any]]]
         logger.warning("Firebase no inicializado. No se sincronizarán los rankings.")
         return False
     
+    from django.db import transaction
+    from django.db.models import F
+    from django.utils import timezone
+    from .models import FirebaseSync
+    
     try:
-        # Obtener datos si no fueron proporcionados
+        # Obtener datos si no fueron proporcionados (caché versionada)
         if not rankings:
-            from .models import Ranking
-            from competitions.models import Participant
-            
-            rankings_queryset = Ranking.objects.filter(
+            from .snapshots import get_ranking_snapshot
+            rankings = get_ranking_snapshot(competition_id)['rankings']
+        
+        snapshot = build_ranking_nodes(rankings)
+        delta_mode = getattr(settings, 'FIREBASE_RANKINGS_SYNC_MODE', 'delta') == 'delta'
+        
+        with transaction.atomic():
+            # Bloquear el registro solo mientras se calculan las diferencias
+            sync_record = FirebaseSync.objects.select_for_update().filter(
                 competition_id=competition_id
-            ).select_related(
-                'participant', 
-                'participant__rider', 
-                'participant__horse',
-                'participant__category'
-            ).order_by('position')
+            ).first()
+            if sync_record is None:
+                sync_record = FirebaseSync.objects.create(competition_id=competition_id)
+            previous = sync_record.rankings_snapshot
+            version = sync_record.snapshot_version
             
-            rankings = []
-            for rank in rankings_queryset:
-                participant = rank.participant
-                rankings.append({
-                    'participant': participant,
-                    'participant_id': participant.id,
-                    'average': rank.average_score,
-                    'percentage': rank.percentage,
-                    'position': rank.position
-                })
-        
-        # Preparar datos para Firebase
-        firebase_data = {}
-        for ranking in rankings:
-            participant = ranking.get('participant')
-            participant_id = ranking.get('participant_id') or participant.id if participant else None
+            # Sin posición anterior explícita se deduce del último envío
+            previous_rankings = (previous or {}).get('rankings', {})
+            for participant_key, node in snapshot['rankings'].items():
+                last_sent = previous_rankings.get(participant_key)
+                if node['previousPosition'] is None and last_sent:
+                    if last_sent.get('position') != node['position']:
+                        node['previousPosition'] = last_sent.get('position')
+                    else:
+                        node['previousPosition'] = last_sent.get('previousPosition')
             
-            if not participant_id:
-                continue
-                
-            if hasattr(participant, 'rider') and hasattr(participant, 'horse'):
-                rider = participant.rider
-                horse = participant.horse
-                category = participant.category
-                
-                firebase_data[str(participant_id)] = {
-                    'rider': {
-                        'id': rider.id,
-                        'firstName': rider.first_name,
-                        'lastName': rider.last_name,
-                        'nationality': rider.nationality or '',
-                        'fullName': f"{rider.first_name} {rider.last_name}"
-                    },
-                    'horse': {
-                        'id': horse.id,
-                        'name': horse.name,
-                        'breed': horse.breed or '',
-                        'color': horse.color or ''
-                    },
-                    'category': {
-                        'id': category.id,
-                        'name': category.name,
-                        'code': category.code
-                    } if category else {},
-                    'number': participant.number,
-                    'order': participant.order,
-                    'average': decimal_to_float(ranking.get('average')),
-                    'percentage': decimal_to_float(ranking.get('percentage')),
-                    'position': ranking.get('position', 0),
-                    'previousPosition': getattr(participant, 'previous_position', None),
-                    'withdrawn': participant.is_withdrawn
-                }
+            if full or not delta_mode or not previous:
+                changes = None
             else:
-                # Datos simplificados si no hay relaciones cargadas
-                firebase_data[str(participant_id)] = {
-                    'participant_id': participant_id,
-                    'average': decimal_to_float(ranking.get('average')),
-                    'percentage': decimal_to_float(ranking.get('percentage')),
-                    'position': ranking.get('position', 0)
-                }
-        
-        # Subir a Firebase
-        rankings_ref = get_firebase_ref(f'rankings/{competition_id}')
-        rankings_ref.set(firebase_data)
-        
-        # Actualizar estado de sincronización
-        from .models import FirebaseSync
-        FirebaseSync.objects.update_or_create(
-            competition_id=competition_id,
-            defaults={
-                'is_synced': True,
-                'error_message': None
-            }
+                changes = diff_nodes(previous.get('rankings', {}), snapshot['rankings'], f'rankings/{competition_id}')
+                
+                # Los metadatos solo se envían la primera vez o si cambian
+                previous_participants = previous.get('participants', {})
+                if not snapshot['participants']:
+                    # Rankings sin relaciones cargadas: conservar los metadatos enviados
+                    snapshot['participants'] = previous_participants
+                changes.update(diff_nodes(previous_participants, snapshot['participants'], f'participants/{competition_id}'))
+        
+        # Envío a Firebase fuera de la transacción (sin bloquear el registro)
+        if changes is None:
+            # Envío completo: reemplaza ambos nodos
+            get_firebase_ref(f'rankings/{competition_id}').set(snapshot['rankings'])
+            if snapshot['participants']:
+                get_firebase_ref(f'participants/{competition_id}').set(snapshot['participants'])
+        elif changes:
+            get_firebase_ref('/').update(changes)
+        
+        # Guardar el nuevo estado solo si nadie lo cambió mientras se enviaba
+        saved = FirebaseSync.objects.filter(
+            id=sync_record.id, snapshot_version=version
+        ).update(
+            is_synced=True,
+            error_message=None,
+            rankings_snapshot=snapshot,
+            snapshot_version=F('snapshot_version') + 1,
+            last_sync=timezone.now()
         )
+        if not saved:
+            # Otro worker envió en paralelo y no se sabe cuál escritura quedó
+            # última: descartar la base y encolar un envío completo
+            logger.warning(
+                f"Snapshot de rankings modificado durante el envío (competencia {competition_id}); "
+                f"se encola una sincronización completa"
+            )
+            FirebaseSync.objects.filter(id=sync_record.id).update(
+                rankings_snapshot=None, snapshot_version=F('snapshot_version') + 1
+            )
+            from .tasks import enqueue_sync_task
+            enqueue_sync_task('sync_rankings', competition_id)
         
-        # Notificar a los clientes WebSocket
-        from .consumers import notify_rankings_update
-        notify_rankings_update(competition_id)
-        
-        logger.info(f"Rankings sincronizados para competencia {competition_id}: {len(rankings)} participantes")
+        if changes is None:
+            logger.info(f"Rankings sincronizados para competencia {competition_id}: {len(rankings)} participantes")
+        else:
+            logger.info(f"Rankings sincronizados para competencia {competition_id}: {len(changes)} cambios")
         return True
         
     except Exception as e:
         logger.error(f"Error al sincronizar rankings con Firebase: {e}")
         
         # Registrar error
-        from .models import FirebaseSync
         FirebaseSync.objects.update_or_create(
             competition_id=competition_id,
             defaults={
@@ -222,6 +386,113 @@ def sync_rankings(competition_id: int, rankings: Optional[List[Dict[str, Any]]]
         return False
 
 
+def score_node_path(competition_id: int, participant_id: int, judge_id: int, parameter_id: int) -> str:
+    """Ruta del nodo de una calificación: scores/{comp}/{participante}/{juez}/{parámetro}"""
+    return f'scores/{competition_id}/{participant_id}/{judge_id}/{parameter_id}'
+
+
+def build_score_node(score) -> Dict[str, Any]:
+    """
+    Prepara los datos de una calificación para Firebase.
+    
+    Args:
+        score: Calificación con juez y parámetro cargados
+    
+    Returns:
+        Dict: Datos del nodo
+    """
+    return {
+        'id': score.id,
+        'judgeId': score.judge.id,
+        'judgeName': f"{score.judge.first_name} {score.judge.last_name}",
+        'parameterId': score.parameter.parameter.id,
+        'parameterName': score.parameter.parameter.name,
+        'coefficient': score.parameter.effective_coefficient,
+        'value': float(score.value),
+        'calculatedResult': float(score.calculated_result),
+        'comments': score.comments or '',
+        'isEdited': score.is_edited,
+        'updatedAt': score.updated_at.isoformat() if score.updated_at else None
+    }
+
+
+def get_score_sync_metrics() -> Dict[str, Any]:
+    """
+    Devuelve las métricas de los lotes de calificaciones enviados a Firebase.
+    
+    Returns:
+        Dict: Lotes, nodos, errores y latencias (ms)
+    """
+    with _score_sync_lock:
+        metrics = dict(_score_sync_metrics)
+    
+    if metrics['batches']:
+        metrics['avg_latency_ms'] = round(metrics['total_latency_ms'] / metrics['batches'], 2)
+    else:
+        metrics['avg_latency_ms'] = None
+    return metrics
+
+
+def sync_score_batch(competition_id: int, score_ids: Optional[List[int]] = None,
+                     deleted: Optional[List[str]] = None, scores: Optional[List[Any]] = None) -> Dict[str, Any]:
+    """
+    Sincroniza un lote de calificaciones con un único update() multi-ruta.
+    
+    Args:
+        competition_id: ID de la competencia
+        score_ids: IDs de las calificaciones a enviar (si no se pasan objetos)
+        deleted: Rutas 'participante/juez/parámetro' de calificaciones eliminadas
+        scores: Calificaciones ya cargadas con juez y parámetro (opcional)
+    
+    Returns:
+        Dict: Nodos enviados y latencia de la escritura en ms
+    
+    Raises:
+        Exception: Si falla la escritura en Firebase
+    """
+    if scores is None:
+        from .models import Score
+        
+        scores = Score.objects.filter(
+            competition_id=competition_id,
+            id__in=score_ids or []
+        ).select_related('judge', 'parameter', 'parameter__parameter')
+    
+    updates = {}
+    for score in scores:
+        path = score_node_path(competition_id, score.participant_id, score.judge_id, score.parameter.parameter_id)
+        updates[path] = build_score_node(score)
+    
+    # Una calificación eliminada y vuelta a crear conserva el nodo nuevo
+    for path in deleted or []:
+        updates.setdefault(f'scores/{competition_id}/{path}', None)
+    
+    if not updates:
+        return {'nodes': 0, 'latency_ms': 0.0}
+    
+    start = time.monotonic()
+    try:
+        get_firebase_ref('/').update(updates)
+    except Exception as e:
+        with _score_sync_lock:
+            _score_sync_metrics['errors'] += 1
+        logger.error(f"Error al sincronizar lote de calificaciones con Firebase: {e}")
+        raise
+    
+    latency_ms = round((time.monotonic() - start) * 1000, 2)
+    with _score_sync_lock:
+        _score_sync_metrics['batches'] += 1
+        _score_sync_metrics['nodes'] += len(updates)
+        _score_sync_metrics['last_latency_ms'] = latency_ms
+        _score_sync_metrics['max_latency_ms'] = max(_score_sync_metrics['max_latency_ms'] or 0, latency_ms)
+        _score_sync_metrics['total_latency_ms'] += latency_ms
+    
+    logger.info(
+        f"Lote de {len(updates)} calificaciones sincronizado para competencia {competition_id} en {latency_ms} ms"
+    )
+    return {'nodes': len(updates), 'latency_ms': latency_ms}
+
+
 def sync_scores(score_id: int) -> bool:
     """
     Sincroniza una calificación específica con Firebase.
@@ -236,28 +507,10 @@ def sync_scores(score_id: int) -> bool:
         from .models import Score
         
         score = Score.objects.select_related(
-            'judge', 'participant', 'competition', 'parameter', 'parameter__parameter'
+            'judge', 'parameter', 'parameter__parameter'
         ).get(id=score_id)
         
-        # Preparar datos para Firebase
-        score_data = {
-            'id': score.id,
-            'judgeId': score.judge.id,
-            'judgeName': f"{score.judge.first_name} {score.judge.last_name}",
-            'parameterId': score.parameter.parameter.id,
-            'parameterName': score.parameter.parameter.name,
-            'value': float(score.value),
-            'calculatedResult': float(score.calculated_result),
-            'comments': score.comments or '',
-            'isEdited': score.is_edited,
-            'updatedAt': score.updated_at.isoformat() if score.updated_at else None
-        }
-        
-        # Subir a Firebase
-        scores_ref = get_firebase_ref(
-            f'scores/{score.competition.id}/{score.participant.id}/{score.judge.id}/{score.parameter.parameter.id}'
-        )
-        scores_ref.set(score_data)
+        sync_score_batch(score.competition_id, scores=[score])
         
         logger.info(f"Calificación {score_id} sincronizada con Firebase")
         return True
@@ -270,7 +523,7 @@ def sync_scores(score_id: int) -> bool:
 
 def sync_participant_scores(competition_id: int, participant_id: int, judge_id: Optional[int] = None) -> bool:
     """
-    Sincroniza todas las calificaciones de un participante.
+    Sincroniza todas las calificaciones de un participante en un solo lote.
     
     Args:
         competition_id: ID de la competencia
@@ -295,33 +548,7 @@ def sync_participant_scores(competition_id: int, participant_id: int, judge_id:
         if judge_id:
             scores_query = scores_query.filter(judge_id=judge_id)
         
-        # Agrupar por juez
-        judge_scores = {}
-        for score in scores_query:
-            if score.judge_id not in judge_scores:
-                judge_scores[score.judge_id] = {
-                    'judgeId': score.judge_id,
-                    'judgeName': f"{score.judge.first_name} {score.judge.last_name}",
-                    'parameters': {}
-                }
-            
-            judge_scores[score.judge_id]['parameters'][score.parameter.parameter.id] = {
-                'id': score.id,
-                'value': float(score.value),
-                'calculatedResult': float(score.calculated_result),
-                'parameterName': score.parameter.parameter.name,
-                'coefficient': score.parameter.effective_coefficient,
-                'comments': score.comments or '',
-                'isEdited': score.is_edited,
-                'updatedAt': score.updated_at.isoformat() if score.updated_at else None
-            }
-        
-        # Subir a Firebase
-        for judge_id, judge_data in judge_scores.items():
-            scores_ref = get_firebase_ref(
-                f'scores/{competition_id}/{participant_id}/{judge_id}'
-            )
-            scores_ref.set(judge_data)
+        sync_score_batch(competition_id, scores=list(scores_query))
         
         logger.info(f"Calificaciones sincronizadas para participante {participant_id} en competencia {competition_id}")
         return True
@@ -399,10 +626,6 @@ def update_score_from_firebase(data: Dict[str, Any]) -> bool:
             f"juez {judge_id}, parámetro {parameter_id}"
         )
         
-        # Actualizar rankings
-        from .services import update_participant_rankings
-        update_participant_rankings(competition_id)
-        
         return True
     
     except Exception as e:
@@ -458,10 +681,21 @@ def delete_competition_data(competition_id: int) -> bool:
         rankings_ref = get_firebase_ref(f'rankings/{competition_id}')
         rankings_ref.delete()
         
+        # Eliminar metadatos de participantes
+        participants_ref = get_firebase_ref(f'participants/{competition_id}')
+        participants_ref.delete()
+        
         # Eliminar calificaciones
         scores_ref = get_firebase_ref(f'scores/{competition_id}')
         scores_ref.delete()
         
+        # El próximo envío de rankings debe ser completo
+        from django.db.models import F
+        from .models import FirebaseSync
+        FirebaseSync.objects.filter(competition_id=competition_id).update(
+            rankings_snapshot=None, snapshot_version=F('snapshot_version') + 1
+        )
+        
         logger.info(f"Datos eliminados de Firebase para competencia {competition_id}")
         return True
     except Exception as e:
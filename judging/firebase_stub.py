@@ -0,0 +1,160 @@
+"""
+Sustituto local en memoria de Firebase Realtime Database.
+Permite probar la cola de sincronización sin conexión ni credenciales
+(FIREBASE_BACKEND = 'stub').
+"""
+import copy
+import threading
+from typing import Any, Dict, List
+
+
+class LocalFirebaseStub:
+    """
+    Base de datos en memoria con la misma interfaz básica que firebase_admin.db
+    (reference, set, update, get, delete, listen). Registra cada escritura en
+    `operations` para poder verificarlas en las pruebas.
+    """
+
+    def __init__(self):
+        """Inicializar base de datos vacía"""
+        self._lock = threading.Lock()
+        self.data: Dict[str, Any] = {}
+        self.operations: List[Dict[str, Any]] = []
+        self._listeners: List[Dict[str, Any]] = []
+
+    def reference(self, path: str = '/'):
+        """
+        Obtiene una referencia a un nodo.
+
+        Args:
+            path: Ruta en la base de datos
+
+        Returns:
+            LocalReference: Referencia al nodo
+        """
+        return LocalReference(self, path)
+
+    def reset(self):
+        """Elimina todos los datos, operaciones y escuchas registrados"""
+        with self._lock:
+            self.data = {}
+            self.operations = []
+            self._listeners = []
+
+    @staticmethod
+    def _split(path: str) -> List[str]:
+        """Divide una ruta en sus segmentos"""
+        return [segment for segment in str(path).split('/') if segment]
+
+    def _get(self, segments: List[str]) -> Any:
+        """Lee el valor de un nodo (None si no existe)"""
+        node = self.data
+        for segment in segments:
+            if not isinstance(node, dict) or segment not in node:
+                return None
+            node = node[segment]
+        return node
+
+    def _set(self, segments: List[str], value: Any):
+        """Escribe el valor de un nodo creando los intermedios necesarios"""
+        if not segments:
+            self.data = value if isinstance(value, dict) else {}
+            return
+
+        node = self.data
+        for segment in segments[:-1]:
+            if not isinstance(node.get(segment), dict):
+                node[segment] = {}
+            node = node[segment]
+
+        if value is None:
+            node.pop(segments[-1], None)
+        else:
+            node[segments[-1]] = value
+
+    def _record(self, op: str, path: str, value: Any):
+        """Registra una operación y notifica a las escuchas afectadas"""
+        self.operations.append({'op': op, 'path': path, 'value': copy.deepcopy(value)})
+
+        for listener in list(self._listeners):
+            if path.startswith(listener['path']) or listener['path'].startswith(path):
+                listener['callback'](LocalEvent(op, path, copy.deepcopy(value)))
+
+
+class LocalReference:
+    """Referencia a un nodo de LocalFirebaseStub"""
+
+    def __init__(self, stub: LocalFirebaseStub, path: str):
+        self._stub = stub
+        self.path = '/' + '/'.join(stub._split(path))
+
+    def child(self, path: str):
+        """Obtiene una referencia a un nodo hijo"""
+        return LocalReference(self._stub, f"{self.path}/{path}")
+
+    def get(self) -> Any:
+        """Lee una copia del valor del nodo"""
+        with self._stub._lock:
+            return copy.deepcopy(self._stub._get(self._stub._split(self.path)))
+
+    def set(self, value: Any):
+        """Reemplaza el valor del nodo"""
+        with self._stub._lock:
+            self._stub._set(self._stub._split(self.path), copy.deepcopy(value))
+        self._stub._record('set', self.path, value)
+
+    def update(self, value: Dict[str, Any]):
+        """
+        Actualiza varios hijos del nodo en una sola operación.
+        Las claves pueden ser rutas relativas ('a/b/c') como en Firebase.
+        """
+        base = self._stub._split(self.path)
+        with self._stub._lock:
+            for key, child_value in value.items():
+                self._stub._set(base + self._stub._split(key), copy.deepcopy(child_value))
+        self._stub._record('update', self.path, value)
+
+    def delete(self):
+        """Elimina el nodo"""
+        with self._stub._lock:
+            self._stub._set(self._stub._split(self.path), None)
+        self._stub._record('delete', self.path, None)
+
+    def listen(self, callback):
+        """
+        Registra una función que se llamará con cada escritura bajo el nodo.
+
+        Returns:
+            LocalListenerRegistration: Registro que permite dejar de escuchar
+        """
+        listener = {'path': self.path, 'callback': callback}
+        with self._stub._lock:
+            self._stub._listeners.append(listener)
+        return LocalListenerRegistration(self._stub, listener)
+
+
+class LocalEvent:
+    """Evento de cambio equivalente a firebase_admin.db.Event"""
+
+    def __init__(self, event_type: str, path: str, data: Any):
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class LocalListenerRegistration:
+    """Registro de una escucha activa"""
+
+    def __init__(self, stub: LocalFirebaseStub, listener: Dict[str, Any]):
+        self._stub = stub
+        self._listener = listener
+
+    def close(self):
+        """Deja de escuchar cambios"""
+        with self._stub._lock:
+            if self._listener in self._stub._listeners:
+                self._stub._listeners.remove(self._listener)
+
+
+# Instancia compartida usada cuando FIREBASE_BACKEND = 'stub'
+firebase_stub = LocalFirebaseStub()
@@ -0,0 +1,117 @@
+"""
+Mide el tiempo de difusión de un ranking a N consumidores WebSocket en el
+channel layer en memoria, comparando el mensaje con la lista de rankings
+(json.dumps en cada consumidor) con el mensaje ya codificado.
+
+Uso:
+    python manage.py benchmark_broadcast
+    python manage.py benchmark_broadcast --consumers 1,100,1000 --participants 80
+"""
+import asyncio
+import json
+import time
+
+from channels.layers import InMemoryChannelLayer
+from django.core.management.base import BaseCommand
+
+from judging.consumers import encode_frame
+
+
+def build_sample_rankings(participants):
+    """Rankings de ejemplo con el mismo formato que el snapshot 'live'"""
+    return [
+        {
+            'id': index,
+            'participant_id': index,
+            'position': index,
+            'average': 7.25,
+            'percentage': 72.5,
+            'rider': {
+                'id': index,
+                'first_name': 'Jinete',
+                'last_name': f'Número {index}',
+                'name': f'Jinete Número {index}',
+                'nationality': 'BOL'
+            },
+            'horse': {'id': index, 'name': f'Caballo {index}', 'breed': 'Criollo', 'color': 'Alazán'},
+            'category': {'id': 1, 'name': 'Adultos', 'code': 'ADU'},
+            'number': index,
+            'order': index,
+            'withdrawn': False
+        }
+        for index in range(1, participants + 1)
+    ]
+
+
+async def measure_fanout(consumers, message, forward):
+    """
+    Difunde un mensaje a un grupo de N canales y lo entrega en cada uno.
+
+    Args:
+        consumers: Número de consumidores conectados al grupo
+        message: Evento enviado con group_send
+        forward: Función que convierte el evento en el texto enviado al socket
+
+    Returns:
+        float: Segundos desde group_send hasta la última entrega
+    """
+    layer = InMemoryChannelLayer(capacity=10)
+    channels = [await layer.new_channel() for _ in range(consumers)]
+    for channel in channels:
+        await layer.group_add('rankings_benchmark', channel)
+
+    start = time.perf_counter()
+    await layer.group_send('rankings_benchmark', message)
+    for channel in channels:
+        forward(await layer.receive(channel))
+    return time.perf_counter() - start
+
+
+def forward_legacy(event):
+    """Consumidor anterior: codifica la lista de rankings en cada socket"""
+    return json.dumps({'type': 'rankings_update', 'rankings': event['rankings']})
+
+
+def forward_encoded(event):
+    """Consumidor actual: reenvía el texto ya codificado"""
+    return event['text']
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de difusión de rankings a 1, 100 y 1000 consumidores WebSocket'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumers', default='1,100,1000', help='Números de consumidores separados por comas')
+        parser.add_argument('--participants', type=int, default=50, help='Participantes en el ranking')
+        parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por medición (se toma la mejor)')
+
+    def handle(self, *args, **options):
+        counts = [int(value) for value in options['consumers'].split(',') if value.strip()]
+        repeat = max(options['repeat'], 1)
+        rankings = build_sample_rankings(options['participants'])
+
+        self.stdout.write(
+            f"Ranking de {options['participants']} participantes "
+            f"({len(encode_frame('rankings_update', rankings=rankings))} bytes)"
+        )
+        self.stdout.write(f"{'Consumidores':>12} {'Por consumidor (ms)':>20} {'Precodificado (ms)':>20} {'Mejora':>8}")
+
+        for consumers in counts:
+            legacy = min(
+                asyncio.run(measure_fanout(
+                    consumers, {'type': 'rankings_update', 'rankings': rankings}, forward_legacy
+                ))
+                for _ in range(repeat)
+            )
+            encoded = min(
+                asyncio.run(measure_fanout(
+                    consumers,
+                    {'type': 'rankings_update', 'text': encode_frame('rankings_update', rankings=rankings)},
+                    forward_encoded
+                ))
+                for _ in range(repeat)
+            )
+            speedup = legacy / encoded if encoded else 0
+            self.stdout.write(
+                f"{consumers:>12} {legacy * 1000:>20.2f} {encoded * 1000:>20.2f} {speedup:>7.1f}x"
+            )
@@ -0,0 +1,215 @@
+"""
+Mide las consultas frecuentes de Score y Ranking con y sin los índices
+compuestos de la migración 0005. Genera una exhibición sintética grande dentro
+de una transacción que se revierte, muestra el plan (EXPLAIN) y el tiempo
+medio de cada consulta, elimina los índices (también dentro de la transacción)
+y repite la medición. Funciona con SQLite y PostgreSQL.
+
+Uso:
+    python manage.py benchmark_indexes
+    python manage.py benchmark_indexes --competitions 20 --participants 100 --repeat 50
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Sum
+
+from competitions.models import Category, Competition, CompetitionJudge, Horse, Participant, Rider
+from judging.models import CompetitionParameter, EvaluationParameter, Ranking, Score
+from judging.processors import fei_processor
+
+# Índices añadidos por la migración 0005
+BENCHMARK_INDEXES = (
+    'score_comp_part_judge_result',
+    'score_judge_competition',
+    'ranking_comp_position',
+    'ranking_comp_percentage',
+)
+
+
+def seed_show(competitions, participants, judges, parameters, seed=0):
+    """
+    Crea competencias con jueces, parámetros, participantes, calificaciones y rankings.
+
+    Returns:
+        Dict: IDs de la competencia, participante y juez usados en las consultas
+    """
+    User = get_user_model()
+    rng = random.Random(seed)
+
+    creator = User.objects.create_user(
+        email='benchmark-admin@apsan.org', password='benchmark',
+        first_name='Benchmark', last_name='Admin', role='admin'
+    )
+    category = Category.objects.create(name='Benchmark', code='BENCH')
+    judge_users = [
+        User.objects.create_user(
+            email=f'benchmark-juez{i}@apsan.org', password='benchmark',
+            first_name='Juez', last_name=str(i), role='judge'
+        )
+        for i in range(judges)
+    ]
+    evaluation_parameters = [
+        EvaluationParameter.objects.create(name=f'Benchmark {i}', coefficient=1 + i % 3)
+        for i in range(parameters)
+    ]
+
+    target = None
+    for c in range(competitions):
+        competition = Competition.objects.create(
+            name=f'Benchmark {c}', location='La Paz',
+            start_date='2025-05-01', end_date='2025-05-02',
+            status='active', creator=creator
+        )
+        CompetitionJudge.objects.bulk_create([
+            CompetitionJudge(competition=competition, judge=judge) for judge in judge_users
+        ])
+        competition_parameters = CompetitionParameter.objects.bulk_create([
+            CompetitionParameter(competition=competition, parameter=parameter, order=i + 1)
+            for i, parameter in enumerate(evaluation_parameters)
+        ])
+
+        riders = Rider.objects.bulk_create([
+            Rider(first_name='Jinete', last_name=f'{c}-{i}') for i in range(participants)
+        ])
+        horses = Horse.objects.bulk_create([
+            Horse(name=f'Caballo {c}-{i}') for i in range(participants)
+        ])
+        show_participants = Participant.objects.bulk_create([
+            Participant(
+                competition=competition, rider=rider, horse=horse,
+                category=category, number=i + 1, order=i + 1
+            )
+            for i, (rider, horse) in enumerate(zip(riders, horses))
+        ])
+
+        scores = []
+        for participant in show_participants:
+            for judge in judge_users:
+                for parameter, evaluation_parameter in zip(competition_parameters, evaluation_parameters):
+                    value = Decimal(rng.randint(0, 20)) / 2
+                    scores.append(Score(
+                        competition=competition, participant=participant,
+                        judge=judge, parameter=parameter, value=value,
+                        calculated_result=Decimal(fei_processor.calculate_result(value, evaluation_parameter.coefficient))
+                    ))
+        Score.objects.bulk_create(scores, batch_size=2000)
+
+        Ranking.objects.bulk_create([
+            Ranking(
+                competition=competition, participant=participant, position=position,
+                average_score=Decimal(rng.randint(0, 1000)) / 100,
+                percentage=Decimal(rng.randint(0, 10000)) / 100
+            )
+            for position, participant in enumerate(show_participants, 1)
+        ])
+
+        # Las consultas se miden sobre la competencia central
+        if c == competitions // 2:
+            target = {
+                'competition_id': competition.id,
+                'participant_id': show_participants[len(show_participants) // 2].id,
+                'judge_id': judge_users[0].id,
+            }
+
+    return target
+
+
+def build_queries(competition_id, participant_id, judge_id):
+    """Consultas frecuentes de los rankings, las planillas y las estadísticas"""
+    return [
+        ('Rankings: sumas por participante y juez', Score.objects.filter(
+            competition_id=competition_id
+        ).values('participant_id', 'judge_id').annotate(
+            total=Sum('calculated_result'), count=Count('id')
+        ).order_by()),
+        ('Ranking incremental de un participante', Score.objects.filter(
+            competition_id=competition_id, participant_id=participant_id
+        ).values('judge_id').annotate(
+            total=Sum('calculated_result'), count=Count('id')
+        ).order_by()),
+        ('Planilla de un juez', Score.objects.filter(
+            competition_id=competition_id, participant_id=participant_id, judge_id=judge_id
+        ).values('id', 'value', 'calculated_result')),
+        ('Estadísticas de un juez', Score.objects.filter(
+            judge_id=judge_id, competition_id=competition_id
+        ).values('judge_id').annotate(avg=Avg('value'), count=Count('id')).order_by()),
+        ('Ranking por posición', Ranking.objects.filter(
+            competition_id=competition_id
+        ).order_by('position').values('participant_id', 'position')),
+        ('Ranking por porcentaje', Ranking.objects.filter(
+            competition_id=competition_id
+        ).order_by('-percentage').values('participant_id', 'percentage')),
+    ]
+
+
+def analyze():
+    """Actualiza las estadísticas del planificador"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'ANALYZE {Score._meta.db_table}, {Ranking._meta.db_table}')
+        else:
+            cursor.execute('ANALYZE')
+
+
+def drop_benchmark_indexes():
+    """Elimina los índices de la migración 0005 (se restauran al revertir la transacción)"""
+    with connection.cursor() as cursor:
+        for name in BENCHMARK_INDEXES:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+
+class Command(BaseCommand):
+    help = 'Compara planes y tiempos de las consultas de Score y Ranking con y sin índices compuestos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--competitions', type=int, default=10, help='Competencias generadas')
+        parser.add_argument('--participants', type=int, default=80, help='Participantes por competencia')
+        parser.add_argument('--judges', type=int, default=5, help='Jueces por competencia')
+        parser.add_argument('--parameters', type=int, default=15, help='Parámetros por competencia')
+        parser.add_argument('--repeat', type=int, default=20, help='Ejecuciones por consulta')
+
+    def handle(self, *args, **options):
+        repeat = max(options['repeat'], 1)
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            target = seed_show(
+                max(options['competitions'], 1), max(options['participants'], 1),
+                max(options['judges'], 1), max(options['parameters'], 1)
+            )
+            self.stdout.write(
+                f"Base de datos: {connection.vendor}. "
+                f"{Score.objects.count()} calificaciones generadas en {time.perf_counter() - start:.1f} s"
+            )
+
+            results = {}
+            for label in ('con índices', 'sin índices'):
+                if label == 'sin índices':
+                    drop_benchmark_indexes()
+                analyze()
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label} =="))
+                for name, queryset in build_queries(**target):
+                    self.stdout.write(self.style.MIGRATE_LABEL(name))
+                    self.stdout.write(queryset.explain())
+
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        list(queryset.all())
+                    results.setdefault(name, {})[label] = (time.perf_counter() - start) / repeat
+
+            self.stdout.write(self.style.MIGRATE_HEADING('\n== Tiempo medio por consulta =='))
+            self.stdout.write(f"{'Consulta':<42} {'Con índices':>12} {'Sin índices':>12} {'Mejora':>8}")
+            for name, timings in results.items():
+                with_indexes, without_indexes = timings['con índices'], timings['sin índices']
+                self.stdout.write(
+                    f"{name:<42} {with_indexes * 1000:>10.2f}ms {without_indexes * 1000:>10.2f}ms "
+                    f"{without_indexes / with_indexes:>7.1f}x"
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,127 @@
+"""
+Prueba de carga del stream SSE de rankings con clientes locales simulados.
+Conecta N espectadores a la aplicación ASGI (sin servidor HTTP), difunde
+varias actualizaciones por el channel layer y mide la conexión, la entrega
+y la memoria usada por espectador.
+
+Uso:
+    python manage.py benchmark_sse
+    python manage.py benchmark_sse --clients 5000 --updates 5
+"""
+import asyncio
+import time
+import tracemalloc
+
+from asgiref.testing import ApplicationCommunicator
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from django.core.management.base import BaseCommand
+
+from judging.consumers import encode_frame
+from judging.management.commands.benchmark_broadcast import build_sample_rankings
+from judging.routing import http_urlpatterns
+from judging.snapshots import get_ranking_version
+
+
+class StubClient:
+    """Espectador simulado: abre el stream y cuenta los eventos recibidos"""
+
+    def __init__(self, application, competition_id, last_event_id):
+        self.communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'method': 'GET',
+            'path': f'/sse/rankings/{competition_id}/',
+            'query_string': b'',
+            'headers': [(b'last-event-id', str(last_event_id).encode())],
+        })
+        self.events = 0
+
+    async def connect(self):
+        """Envía la petición y espera la cabecera y el primer bloque del stream"""
+        await self.communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await self.communicator.receive_output(timeout=10)
+        if start.get('status') != 200:
+            raise RuntimeError(f"Respuesta inesperada: {start}")
+        await self.communicator.receive_output(timeout=10)
+
+    async def receive_event(self):
+        """Espera el siguiente evento del stream"""
+        message = await self.communicator.receive_output(timeout=30)
+        if b'data: ' in message.get('body', b''):
+            self.events += 1
+
+    async def close(self):
+        await self.communicator.send_input({'type': 'http.disconnect'})
+        await self.communicator.wait(timeout=10)
+
+
+async def run_load_test(clients, updates, participants, competition_id):
+    """
+    Ejecuta la prueba de carga.
+
+    Returns:
+        Dict: Tiempos (segundos), memoria por cliente (bytes) y eventos recibidos
+    """
+    application = URLRouter(http_urlpatterns)
+    channel_layer = get_channel_layer()
+    last_event_id = get_ranking_version(competition_id)
+
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+
+    start = time.perf_counter()
+    stubs = [StubClient(application, competition_id, last_event_id) for _ in range(clients)]
+    await asyncio.gather(*(stub.connect() for stub in stubs))
+    connect_time = time.perf_counter() - start
+
+    memory_per_client = (tracemalloc.get_traced_memory()[0] - memory_before) / clients
+    tracemalloc.stop()
+
+    frame = encode_frame('rankings_update', rankings=build_sample_rankings(participants))
+    delivery_times = []
+    for update in range(updates):
+        start = time.perf_counter()
+        await channel_layer.group_send(f'rankings_{competition_id}', {
+            'type': 'rankings_update',
+            'text': frame,
+            'version': last_event_id + update + 1
+        })
+        await asyncio.gather(*(stub.receive_event() for stub in stubs))
+        delivery_times.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(stub.close() for stub in stubs))
+
+    return {
+        'connect': connect_time,
+        'memory_per_client': memory_per_client,
+        'delivery': delivery_times,
+        'events': sum(stub.events for stub in stubs)
+    }
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga del stream SSE de rankings con espectadores simulados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000, help='Espectadores conectados')
+        parser.add_argument('--updates', type=int, default=3, help='Actualizaciones difundidas')
+        parser.add_argument('--participants', type=int, default=50, help='Participantes en el ranking')
+        parser.add_argument('--competition', type=int, default=0, help='ID de competencia usado en el grupo')
+
+    def handle(self, *args, **options):
+        clients = max(options['clients'], 1)
+        result = asyncio.run(run_load_test(
+            clients, max(options['updates'], 1), options['participants'], options['competition']
+        ))
+
+        delivery = result['delivery']
+        self.stdout.write(f"Espectadores: {clients}")
+        self.stdout.write(f"Conexión de todos: {result['connect'] * 1000:.1f} ms")
+        self.stdout.write(f"Memoria por espectador: {result['memory_per_client'] / 1024:.1f} KiB")
+        self.stdout.write(
+            f"Entrega a todos por actualización: media {sum(delivery) / len(delivery) * 1000:.1f} ms, "
+            f"máxima {max(delivery) * 1000:.1f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Eventos recibidos: {result['events']} de {clients * len(delivery)}"
+        ))
@@ -0,0 +1,36 @@
+"""
+Genera el archivo de resultados de una competencia finalizada, para que la
+primera descarga no tenga que esperar a construirlo.
+
+Uso:
+    python manage.py export_results 12
+    python manage.py export_results 12 --format xlsx
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from competitions.models import Competition
+from judging.exports import EXPORT_FORMATS, get_cached_export
+
+
+class Command(BaseCommand):
+    help = 'Genera los archivos de resultados de una competencia finalizada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('competition_id', type=int, help='ID de la competencia')
+        parser.add_argument(
+            '--format', choices=list(EXPORT_FORMATS), action='append',
+            help='Formato a generar (por defecto todos)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            competition = Competition.objects.get(id=options['competition_id'])
+        except Competition.DoesNotExist:
+            raise CommandError(f"La competencia {options['competition_id']} no existe")
+
+        if competition.status != 'completed':
+            raise CommandError("Solo se generan archivos de competencias finalizadas")
+
+        for file_format in options['format'] or list(EXPORT_FORMATS):
+            name = get_cached_export(competition.id, file_format)
+            self.stdout.write(self.style.SUCCESS(f"{file_format}: {name}"))
@@ -0,0 +1,54 @@
+"""
+Congela (o descongela) los resultados finales de una competencia finalizada.
+Los resultados se congelan automáticamente al finalizar la competencia; este
+comando sirve para competencias finalizadas antes de existir la tabla o para
+volver a materializarlos tras una corrección.
+
+Uso:
+    python manage.py freeze_results 12
+    python manage.py freeze_results 12 --force
+    python manage.py freeze_results 12 --unfreeze
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from competitions.models import Competition
+from judging.final_results import (
+    CompetitionNotCompleted, freeze_competition_results, unfreeze_competition_results
+)
+
+
+class Command(BaseCommand):
+    help = 'Congela los resultados finales de una competencia finalizada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('competition_id', type=int, help='ID de la competencia')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Vuelve a materializar los resultados aunque ya estén congelados'
+        )
+        parser.add_argument(
+            '--unfreeze', action='store_true',
+            help='Elimina los resultados congelados'
+        )
+
+    def handle(self, *args, **options):
+        competition_id = options['competition_id']
+        if not Competition.objects.filter(id=competition_id).exists():
+            raise CommandError(f"La competencia {competition_id} no existe")
+
+        if options['unfreeze']:
+            if unfreeze_competition_results(competition_id):
+                self.stdout.write(self.style.SUCCESS("Resultados descongelados"))
+            else:
+                self.stdout.write("La competencia no tenía resultados congelados")
+            return
+
+        try:
+            final_results = freeze_competition_results(competition_id, force=options['force'])
+        except CompetitionNotCompleted as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Resultados congelados el {final_results.frozen_at:%Y-%m-%d %H:%M} "
+            f"({len(final_results.data['rankings'])} participantes, {final_results.checksum})"
+        ))
@@ -0,0 +1,51 @@
+"""
+Comprueba la tabla de agregados por juez (JudgeParticipantAggregate) contra
+las calificaciones y la reconstruye si hay diferencias.
+
+Uso:
+    python manage.py rebuild_judge_aggregates
+    python manage.py rebuild_judge_aggregates --competition 12
+    python manage.py rebuild_judge_aggregates --check
+    python manage.py rebuild_judge_aggregates --force
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from judging.aggregates import check_judge_aggregates, rebuild_judge_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Comprueba y reconstruye las sumas de resultados por juez y participante'
+
+    # Diferencias que se muestran como máximo
+    MAX_REPORTED = 20
+
+    def add_arguments(self, parser):
+        parser.add_argument('--competition', type=int, help='ID de la competencia (todas si se omite)')
+        parser.add_argument('--check', action='store_true', help='Solo comprobar; falla si hay diferencias')
+        parser.add_argument('--force', action='store_true', help='Reconstruir aunque no haya diferencias')
+
+    def handle(self, *args, **options):
+        competition_id = options['competition']
+
+        mismatches = check_judge_aggregates(competition_id)
+        for mismatch in mismatches[:self.MAX_REPORTED]:
+            competition, participant, judge = mismatch['key']
+            self.stdout.write(
+                f"Competencia {competition}, participante {participant}, juez {judge}: "
+                f"esperado {mismatch['expected']}, guardado {mismatch['stored']}"
+            )
+        if len(mismatches) > self.MAX_REPORTED:
+            self.stdout.write(f"... y {len(mismatches) - self.MAX_REPORTED} diferencias más")
+
+        if options['check']:
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} agregados no coinciden con las calificaciones")
+            self.stdout.write(self.style.SUCCESS("Los agregados coinciden con las calificaciones"))
+            return
+
+        if not mismatches and not options['force']:
+            self.stdout.write(self.style.SUCCESS("Los agregados coinciden con las calificaciones"))
+            return
+
+        created = rebuild_judge_aggregates(competition_id)
+        self.stdout.write(self.style.SUCCESS(f"Agregados reconstruidos: {created} filas"))
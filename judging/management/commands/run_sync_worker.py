@@ -0,0 +1,87 @@
+"""
+Worker que drena la cola persistente de sincronización con Firebase.
+Las notificaciones WebSocket se envían desde el proceso web; si el worker
+difunde algo (tareas antiguas 'notify_rankings') necesita un channel layer
+compartido entre procesos (channels_redis).
+
+Uso:
+    python manage.py run_sync_worker --workers 4
+    python manage.py run_sync_worker --once
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from judging.firebase import get_score_sync_metrics
+from judging.tasks import process_sync_tasks, purge_finished_tasks
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas pendientes de sincronización con Firebase'
+
+    # Segundos entre limpiezas de tareas completadas
+    PURGE_INTERVAL = 600
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Hilos que ejecutan tareas en paralelo')
+        parser.add_argument('--batch', type=int, default=50, help='Tareas reservadas por lote')
+        parser.add_argument('--interval', type=float, default=0.5, help='Espera (segundos) cuando la cola está vacía')
+        parser.add_argument('--once', action='store_true', help='Procesar la cola una vez y salir')
+        parser.add_argument('--keep-hours', type=int, default=24, help='Horas que se conservan las tareas completadas')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        batch = max(options['batch'], 1)
+        self.check_channel_layer()
+
+        if options['once']:
+            totals = {'processed': 0, 'completed': 0, 'failed': 0}
+            while True:
+                result = process_sync_tasks(limit=batch, workers=workers)
+                for key in totals:
+                    totals[key] += result[key]
+                if result['processed'] < batch:
+                    break
+            self.stdout.write(self.style.SUCCESS(
+                f"Tareas procesadas: {totals['processed']} "
+                f"(completadas: {totals['completed']}, con error: {totals['failed']})"
+            ))
+            self.write_score_sync_metrics()
+            return
+
+        self.stdout.write(f"Worker de sincronización iniciado con {workers} hilos")
+        last_purge = 0
+
+        try:
+            while True:
+                if time.monotonic() - last_purge > self.PURGE_INTERVAL:
+                    purge_finished_tasks(options['keep_hours'])
+                    last_purge = time.monotonic()
+
+                result = process_sync_tasks(limit=batch, workers=workers)
+
+                # Si el lote vino lleno hay más trabajo: seguir sin esperar
+                if result['processed'] < batch:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.write_score_sync_metrics()
+            self.stdout.write("Worker de sincronización detenido")
+    
+    def check_channel_layer(self):
+        """Advierte si las difusiones de este proceso no pueden llegar a los clientes"""
+        from channels.layers import InMemoryChannelLayer, get_channel_layer
+
+        if isinstance(get_channel_layer(), InMemoryChannelLayer):
+            self.stderr.write(self.style.WARNING(
+                "CHANNEL_LAYERS usa InMemoryChannelLayer: los mensajes WebSocket enviados por "
+                "el worker no llegan a los clientes del servidor web (use channels_redis)"
+            ))
+    
+    def write_score_sync_metrics(self):
+        """Muestra la latencia de los lotes de calificaciones enviados a Firebase"""
+        metrics = get_score_sync_metrics()
+        if metrics['batches']:
+            self.stdout.write(
+                f"Lotes de calificaciones: {metrics['batches']} ({metrics['nodes']} nodos), "
+                f"latencia media {metrics['avg_latency_ms']} ms, máxima {metrics['max_latency_ms']} ms"
+            )
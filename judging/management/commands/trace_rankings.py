@@ -0,0 +1,35 @@
+"""
+Activa o desactiva la traza del cálculo de rankings de una competencia.
+Los mensajes se registran en el logger judging.tracing (nivel INFO).
+
+Uso:
+    python manage.py trace_rankings 12
+    python manage.py trace_rankings 12 --minutes 10
+    python manage.py trace_rankings 12 --off
+"""
+from django.core.management.base import BaseCommand
+
+from judging.tracing import disable_ranking_trace, enable_ranking_trace
+
+
+class Command(BaseCommand):
+    help = 'Activa o desactiva la traza del cálculo de rankings de una competencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('competition_id', type=int, help='ID de la competencia')
+        parser.add_argument('--minutes', type=int, default=60, help='Minutos que la traza permanece activa')
+        parser.add_argument('--off', action='store_true', help='Desactivar la traza')
+
+    def handle(self, *args, **options):
+        competition_id = options['competition_id']
+
+        if options['off']:
+            disable_ranking_trace(competition_id)
+            self.stdout.write(self.style.SUCCESS(f"Traza de rankings desactivada para la competencia {competition_id}"))
+            return
+
+        enable_ranking_trace(competition_id, timeout=max(options['minutes'], 1) * 60)
+        self.stdout.write(self.style.SUCCESS(
+            f"Traza de rankings activada para la competencia {competition_id} "
+            f"durante {options['minutes']} minutos"
+        ))
@@ -0,0 +1,70 @@
+"""
+Autenticación de WebSockets con el token de la API REST (rest_framework.authtoken).
+El token se envía en la URL (`?token=<clave>`) o en la cabecera
+`Authorization: Token <clave>`; si no hay token se conserva el usuario de la sesión.
+"""
+import logging
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+@database_sync_to_async
+def get_token_user(key):
+    """
+    Obtiene el usuario activo asociado a un token.
+
+    Args:
+        key: Clave del token
+
+    Returns:
+        User o AnonymousUser si el token no es válido
+    """
+    from django.contrib.auth.models import AnonymousUser
+    from rest_framework.authtoken.models import Token
+
+    try:
+        token = Token.objects.select_related('user').get(key=key)
+    except Token.DoesNotExist:
+        return AnonymousUser()
+
+    if not token.user.is_active:
+        return AnonymousUser()
+    return token.user
+
+
+def get_scope_token(scope):
+    """Extrae el token de la URL o de la cabecera Authorization del handshake"""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    if query.get('token'):
+        return query['token'][0]
+
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            keyword, _, key = value.decode('latin-1').partition(' ')
+            if keyword.lower() in ('token', 'bearer') and key:
+                return key.strip()
+    return None
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """
+    Asigna scope['user'] a partir del token de la API REST.
+    Se coloca dentro de AuthMiddlewareStack para que el token tenga prioridad
+    sobre la sesión.
+    """
+
+    async def __call__(self, scope, receive, send):
+        key = get_scope_token(scope)
+        if key:
+            scope['user'] = await get_token_user(key)
+        return await super().__call__(scope, receive, send)
+
+
+def TokenAuthMiddlewareStack(inner):
+    """Sesión de Django y, si se envía, token de la API REST"""
+    return AuthMiddlewareStack(TokenAuthMiddleware(inner))
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0001_initial'),
+        ('judging', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('sync_score', 'Sincronizar calificación'), ('sync_participant_scores', 'Sincronizar calificaciones de participante'), ('sync_rankings', 'Sincronizar rankings'), ('notify_rankings', 'Notificar rankings por WebSocket')], max_length=40, verbose_name='Tipo')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Datos')),
+                ('dedup_key', models.CharField(max_length=255, verbose_name='Clave de agrupación')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En proceso'), ('done', 'Completada'), ('failed', 'Fallida')], default='pending', max_length=20, verbose_name='Estado')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponible desde')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Último error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('competition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_tasks', to='competitions.competition')),
+            ],
+            options={
+                'verbose_name': 'Tarea de Sincronización',
+                'verbose_name_plural': 'Tareas de Sincronización',
+                'ordering': ['available_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='judging_synctask_queue_idx'), models.Index(fields=['dedup_key', 'status'], name='judging_synctask_dedup_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judging', '0002_synctask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='firebasesync',
+            name='rankings_snapshot',
+            field=models.JSONField(blank=True, null=True, verbose_name='Último ranking enviado'),
+        ),
+    ]
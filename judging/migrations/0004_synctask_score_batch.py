@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judging', '0003_firebasesync_rankings_snapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='synctask',
+            name='kind',
+            field=models.CharField(choices=[('sync_score', 'Sincronizar calificación'), ('sync_participant_scores', 'Sincronizar calificaciones de participante'), ('sync_score_batch', 'Sincronizar lote de calificaciones'), ('sync_rankings', 'Sincronizar rankings'), ('notify_rankings', 'Notificar rankings por WebSocket')], max_length=40, verbose_name='Tipo'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judging', '0004_synctask_score_batch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ranking',
+            index=models.Index(fields=['competition', 'position'], name='ranking_comp_position'),
+        ),
+        migrations.AddIndex(
+            model_name='ranking',
+            index=models.Index(fields=['competition', '-percentage'], name='ranking_comp_percentage'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['competition', 'participant', 'judge', 'calculated_result'], name='score_comp_part_judge_result'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['judge', 'competition'], name='score_judge_competition'),
+        ),
+    ]
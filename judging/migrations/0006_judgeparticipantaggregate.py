@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_aggregates(apps, schema_editor):
+    """Calcula los agregados de las calificaciones existentes"""
+    Score = apps.get_model('judging', 'Score')
+    JudgeParticipantAggregate = apps.get_model('judging', 'JudgeParticipantAggregate')
+
+    rows = Score.objects.values('competition_id', 'participant_id', 'judge_id').annotate(
+        total=models.Sum('calculated_result'), count=models.Count('id')
+    ).order_by()
+    JudgeParticipantAggregate.objects.bulk_create([
+        JudgeParticipantAggregate(**row) for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('judging', '0005_score_ranking_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JudgeParticipantAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.DecimalField(decimal_places=1, default=0, max_digits=10, verbose_name='Suma de resultados')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Cantidad de calificaciones')),
+                ('competition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='judge_aggregates', to='competitions.competition')),
+                ('judge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='judge_aggregates', to=settings.AUTH_USER_MODEL)),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='judge_aggregates', to='competitions.participant')),
+            ],
+            options={
+                'verbose_name': 'Agregado por Juez',
+                'verbose_name_plural': 'Agregados por Juez',
+                'unique_together': {('competition', 'participant', 'judge')},
+            },
+        ),
+        migrations.RunPython(populate_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('competitions', '0001_initial'),
+        ('judging', '0006_judgeparticipantaggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinalResults',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField(verbose_name='Resultados')),
+                ('checksum', models.CharField(max_length=40, verbose_name='Suma de verificación')),
+                ('frozen_at', models.DateTimeField(auto_now_add=True, verbose_name='Congelado el')),
+                ('competition', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='final_results', to='competitions.competition')),
+                ('frozen_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='frozen_results', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resultados Finales',
+                'verbose_name_plural': 'Resultados Finales',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('judging', '0008_synctask_recalculate_rankings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='firebasesync',
+            name='snapshot_version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Versión del snapshot'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from competitions.models import Competition, Participant
@@ -8,7 +9,7 @@ Extensiones de modelos para la implementación del sistema FEI (3 celdas).
 Este archivo debe importarse en models.py para añadir los métodos y funcionalidad.
 """
 from decimal import Decimal
-from .processors import fei_processor, ranking_calculator
+from .processors import fei_processor, ranking_calculator, to_tenths
 
 class ScoreExtensionMixin:
     """
@@ -126,7 +127,7 @@ class RankingExtensionMixin:
         Returns:
             Ranking: Objeto Ranking actualizado
         """
-        from .models import Score, Ranking
+        from .models import Ranking
         from competitions.models import Competition, Participant, CompetitionJudge
         
         # Obtener competencia y participante
@@ -138,54 +139,31 @@ class RankingExtensionMixin:
             competition=competition
         ).values_list('judge_id', flat=True)
         
-        # Recopilar calificaciones agrupadas por juez
-        judge_scores = {}
-        scores = Score.objects.filter(
-            competition=competition,
-            participant=participant
-        ).select_related('judge', 'parameter', 'parameter__parameter')
-        
-        for score in scores:
-            if score.judge_id not in judge_scores:
-                judge_scores[score.judge_id] = []
-            judge_scores[score.judge_id].append(score)
-        
-        # Calcular ranking por juez
-        judge_rankings = []
-        for judge_id, scores_list in judge_scores.items():
-            if scores_list:
-                # Convertir a formato requerido por el calculador
-                scores_data = [{
-                    'calculated_result': score.calculated_result
-                } for score in scores_list]
-                
-                judge_ranking = ranking_calculator.calculate_judge_ranking(scores_data)
-                judge_rankings.append(judge_ranking)
+        # Suma (en décimas) y cantidad de resultados de cada juez
+        from .aggregates import get_judge_totals
+        totals = {
+            judge_id: (to_tenths(total), count)
+            for judge_id, (total, count) in get_judge_totals(
+                competition.id, participant.id
+            ).get(participant.id, {}).items()
+        }
+        
+        # Calcular ranking por juez en un solo recorrido
+        judge_rankings = list(fei_processor.calculate_totals_batch(totals).values())
         
         # Calcular ranking final
         final_ranking = ranking_calculator.calculate_final_ranking(judge_rankings)
         
-        # Actualizar o crear objeto Ranking
-        ranking, created = Ranking.objects.update_or_create(
-        competition=competition,
-        participant=participant,
-        defaults={
-            'average_score': final_ranking['average'],
-            'percentage': final_ranking['percentage'],  # Asegúrate de que este valor sea correcto
-            'position': 0  # La posición se actualizará en update_participant_rankings
-        }
-        )
-        # CORRECCIÓN: Verifica que los valores se hayan guardado correctamente
-        import logging
-        logger = logging.getLogger(__name__)
-
-        if float(ranking.percentage) == 0 and float(final_ranking['percentage']) > 0:
-            logger.error(f"Problema al guardar porcentaje: valor original={final_ranking['percentage']}, guardado={ranking.percentage}")
-            # Intentar forzar un valor válido
-            ranking.percentage = final_ranking['percentage']
-            ranking.save(update_fields=['percentage'])
+        # Actualizar o crear objeto Ranking con un único upsert
+        # (la posición se actualizará en update_positions)
+        from .services import save_rankings
+        save_rankings(competition.id, [{
+            'participant_id': participant.id,
+            'average': final_ranking['average'],
+            'percentage': final_ranking['percentage']
+        }], update_fields=('average_score', 'percentage'))
         
-        return ranking
+        return Ranking.objects.get(competition=competition, participant=participant)
     
     @classmethod
     def update_positions(cls, competition_id):
@@ -198,21 +176,12 @@ class RankingExtensionMixin:
         Returns:
             int: Número de rankings actualizados
         """
-        from .models import Ranking
+        from .services import update_ranking_positions
         
-        # Obtener todos los rankings de la competencia ordenados por porcentaje
-        rankings = Ranking.objects.filter(
-            competition_id=competition_id
-        ).order_by('-percentage')
+        # Reordenar en memoria y guardar las posiciones en una sola actualización
+        positions, _ = update_ranking_positions(competition_id)
         
-        # Actualizar posiciones
-        position = 1
-        for ranking in rankings:
-            ranking.position = position
-            ranking.save(update_fields=['position'])
-            position += 1
-        
-        return len(rankings)
+        return len(positions)
     
     def to_firebase_dict(self):
         """
@@ -348,15 +317,74 @@ class Score(models.Model, ScoreExtensionMixin):
         verbose_name = 'Calificación'
         verbose_name_plural = 'Calificaciones'
         unique_together = ('competition', 'participant', 'judge', 'parameter')
+        indexes = [
+            # Sumas por (participante, juez) de los rankings sin leer la tabla
+            models.Index(
+                fields=['competition', 'participant', 'judge', 'calculated_result'],
+                name='score_comp_part_judge_result'
+            ),
+            # Calificaciones y estadísticas de un juez
+            models.Index(fields=['judge', 'competition'], name='score_judge_competition'),
+        ]
         
     def __str__(self):
         return f"Calificación: {self.judge.get_full_name()} - {self.participant} - {self.parameter.parameter.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores guardados, para actualizar los agregados por juez sin releerlos
+        instance._aggregate_state = instance.get_aggregate_state()
+        return instance
+    
+    def get_aggregate_state(self):
+        """
+        Clave del agregado por juez y resultado de la calificación.
+        
+        Returns:
+            tuple: ((competition_id, participant_id, judge_id), calculated_result),
+            o None si algún campo no está cargado
+        """
+        fields = self.__dict__
+        if any(name not in fields for name in ('competition_id', 'participant_id', 'judge_id', 'calculated_result')):
+            return None
+        return (
+            (fields['competition_id'], fields['participant_id'], fields['judge_id']),
+            fields['calculated_result']
+        )
+    
     def save(self, *args, **kwargs):
+        from .aggregates import apply_score_delta
+        
         # Calcular el resultado según la fórmula FEI
         self.calculated_result = self.calculate_result()
         
-        super(Score, self).save(*args, **kwargs)
+        # update_or_create() guarda solo los campos modificados: incluir el resultado
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'calculated_result' not in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'calculated_result'}
+        
+        with transaction.atomic(using=kwargs.get('using')):
+            previous = getattr(self, '_aggregate_state', None)
+            if previous is None and self.pk is not None:
+                # Instancia no leída de la base de datos: consultar los valores guardados
+                saved = Score.objects.filter(pk=self.pk).values_list(
+                    'competition_id', 'participant_id', 'judge_id', 'calculated_result'
+                ).first()
+                previous = (saved[:3], saved[3]) if saved else None
+            
+            super(Score, self).save(*args, **kwargs)
+            
+            # Actualizar la suma y el conteo del juez en la misma transacción
+            current = self.get_aggregate_state()
+            if previous is None:
+                apply_score_delta(*current[0], current[1], 1)
+            elif previous[0] == current[0]:
+                apply_score_delta(*current[0], current[1] - previous[1], 0)
+            else:
+                apply_score_delta(*previous[0], -previous[1], -1)
+                apply_score_delta(*current[0], current[1], 1)
+            self._aggregate_state = current
     
     def clean(self):
         """Validar calificación según normas FEI"""
@@ -364,6 +392,28 @@ class Score(models.Model, ScoreExtensionMixin):
         self.validate_fei_rules()
 
 
+class JudgeParticipantAggregate(models.Model):
+    """
+    Suma y cantidad de resultados de cada juez para cada participante.
+    Se actualiza al guardar o eliminar calificaciones (ver judging.aggregates).
+    """
+    
+    competition = models.ForeignKey(Competition, on_delete=models.CASCADE, related_name='judge_aggregates')
+    participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='judge_aggregates')
+    judge = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='judge_aggregates')
+    
+    total = models.DecimalField('Suma de resultados', max_digits=10, decimal_places=1, default=0)
+    count = models.PositiveIntegerField('Cantidad de calificaciones', default=0)
+    
+    class Meta:
+        verbose_name = 'Agregado por Juez'
+        verbose_name_plural = 'Agregados por Juez'
+        unique_together = ('competition', 'participant', 'judge')
+        
+    def __str__(self):
+        return f"{self.judge_id} - {self.participant_id}: {self.total} ({self.count})"
+
+
 class ScoreEdit(models.Model):
     """Modelo para auditoría de ediciones de calificaciones"""
     
@@ -410,6 +460,10 @@ class Ranking(models.Model, RankingExtensionMixin):
         verbose_name_plural = 'Rankings'
         unique_together = ('competition', 'participant')
         ordering = ['competition', 'position']
+        indexes = [
+            models.Index(fields=['competition', 'position'], name='ranking_comp_position'),
+            models.Index(fields=['competition', '-percentage'], name='ranking_comp_percentage'),
+        ]
         
     def __str__(self):
         return f"Ranking: {self.participant} - Pos: {self.position} ({float(self.percentage):.2f}%)"
@@ -423,6 +477,11 @@ class FirebaseSync(models.Model):
     is_synced = models.BooleanField('Sincronizado', default=False)
     error_message = models.TextField('Mensaje de error', blank=True, null=True)
     
+    # Último estado enviado a Firebase (base para la sincronización por diferencias)
+    rankings_snapshot = models.JSONField('Último ranking enviado', blank=True, null=True)
+    # Se incrementa con cada snapshot guardado (control de concurrencia optimista)
+    snapshot_version = models.PositiveIntegerField('Versión del snapshot', default=0)
+    
     # Metadatos
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -434,6 +493,30 @@ class FirebaseSync(models.Model):
         return f"Sync Firebase: {self.competition.name} - {self.last_sync}"
 
 
+class FinalResults(models.Model):
+    """
+    Resultados finales congelados de una competencia finalizada.
+    Guarda el ranking, la comparación por juez y la matriz de calificaciones
+    tal como se sirven en la API (ver judging.final_results).
+    """
+
+    competition = models.OneToOneField(Competition, on_delete=models.CASCADE, related_name='final_results')
+    data = models.JSONField('Resultados')
+    checksum = models.CharField('Suma de verificación', max_length=40)
+
+    # Metadatos
+    frozen_at = models.DateTimeField('Congelado el', auto_now_add=True)
+    frozen_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                  related_name='frozen_results', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Resultados Finales'
+        verbose_name_plural = 'Resultados Finales'
+
+    def __str__(self):
+        return f"Resultados finales: {self.competition.name} ({self.frozen_at})"
+
+
 class OfflineData(models.Model):
     """Modelo para almacenar datos offline temporales"""
     
@@ -460,4 +543,50 @@ class OfflineData(models.Model):
         verbose_name_plural = 'Datos Offline'
         
     def __str__(self):
-        return f"Datos Offline: {self.judge.get_full_name()} - {self.competition.name}"
\ No newline at end of file
+        return f"Datos Offline: {self.judge.get_full_name()} - {self.competition.name}"
+
+class SyncTask(models.Model):
+    """Cola persistente (outbox) de tareas de sincronización con Firebase"""
+    
+    KIND_CHOICES = (
+        ('sync_score', 'Sincronizar calificación'),
+        ('sync_participant_scores', 'Sincronizar calificaciones de participante'),
+        ('sync_score_batch', 'Sincronizar lote de calificaciones'),
+        ('sync_rankings', 'Sincronizar rankings'),
+        ('notify_rankings', 'Notificar rankings por WebSocket'),
+        ('recalculate_rankings', 'Recalcular rankings'),
+    )
+    
+    STATUS_CHOICES = (
+        ('pending', 'Pendiente'),
+        ('running', 'En proceso'),
+        ('done', 'Completada'),
+        ('failed', 'Fallida'),
+    )
+    
+    kind = models.CharField('Tipo', max_length=40, choices=KIND_CHOICES)
+    competition = models.ForeignKey(Competition, on_delete=models.CASCADE, related_name='sync_tasks')
+    payload = models.JSONField('Datos', default=dict, blank=True)
+    dedup_key = models.CharField('Clave de agrupación', max_length=255)
+    
+    # Estado y reintentos
+    status = models.CharField('Estado', max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField('Intentos', default=0)
+    available_at = models.DateTimeField('Disponible desde', default=timezone.now)
+    last_error = models.TextField('Último error', blank=True, null=True)
+    
+    # Metadatos
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Tarea de Sincronización'
+        verbose_name_plural = 'Tareas de Sincronización'
+        ordering = ['available_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='judging_synctask_queue_idx'),
+            models.Index(fields=['dedup_key', 'status'], name='judging_synctask_dedup_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.competition_id} ({self.get_status_display()})"
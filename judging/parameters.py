@@ -0,0 +1,90 @@
+"""
+Caché de los parámetros de evaluación de cada competencia.
+Los parámetros casi no cambian durante una competencia; se guardan en la
+caché de Django y se invalidan al modificar un CompetitionParameter o un
+EvaluationParameter.
+"""
+import time
+import logging
+from typing import Any, Dict, List
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Tiempo de vida en caché (segundos)
+PARAMETERS_CACHE_TIMEOUT = 60 * 60
+
+
+def _parameters_key(competition_id: int) -> str:
+    return f'competition:{competition_id}:parameters'
+
+
+def get_competition_parameters(competition_id: int) -> Dict[str, Any]:
+    """
+    Devuelve los parámetros de evaluación de una competencia ordenados.
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        Dict: {'version': int, 'parameters': [{'id', 'name', 'description',
+        'coefficient', 'max_value', 'order'}]}
+    """
+    from .models import CompetitionParameter
+
+    competition_id = int(competition_id)
+    entry = cache.get(_parameters_key(competition_id))
+    if entry is not None:
+        return entry
+
+    parameters = CompetitionParameter.objects.filter(
+        competition_id=competition_id
+    ).select_related('parameter').order_by('order')
+
+    entry = {
+        # Cambia cada vez que se reconstruye la lista (se usa en los ETag)
+        'version': int(time.time() * 1000),
+        'parameters': [
+            {
+                'id': param.parameter.id,
+                'name': param.parameter.name,
+                'description': param.parameter.description,
+                'coefficient': param.effective_coefficient,
+                'max_value': param.effective_max_value,
+                'order': param.order
+            } for param in parameters
+        ]
+    }
+    cache.set(_parameters_key(competition_id), entry, PARAMETERS_CACHE_TIMEOUT)
+    return entry
+
+
+def invalidate_competition_parameters(competition_id: int):
+    """
+    Invalida los parámetros en caché de una competencia, ahora y al confirmarse
+    la transacción actual.
+
+    Args:
+        competition_id: ID de la competencia
+    """
+    cache.delete(_parameters_key(competition_id))
+    transaction.on_commit(lambda: cache.delete(_parameters_key(competition_id)))
+
+
+def invalidate_parameter_competitions(parameter_id: int):
+    """
+    Invalida los parámetros en caché de todas las competencias que usan un parámetro.
+
+    Args:
+        parameter_id: ID del parámetro de evaluación
+    """
+    from .models import CompetitionParameter
+
+    competition_ids = CompetitionParameter.objects.filter(
+        parameter_id=parameter_id
+    ).values_list('competition_id', flat=True)
+
+    for competition_id in competition_ids:
+        invalidate_competition_parameters(competition_id)
@@ -0,0 +1,195 @@
+"""
+Punto único de despacho para "una calificación cambió".
+Las tareas de sincronización (outbox) se escriben en la misma transacción que
+las calificaciones, de modo que un cambio confirmado siempre deja su tarea en
+la cola aunque el proceso termine justo después. Al confirmarse solo se
+despacha el trabajo en memoria del proceso: un recálculo de rankings y una
+difusión por competencia.
+"""
+import logging
+import threading
+from typing import Dict, Any, Iterable, Optional, Set
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Lote abierto de la transacción actual (uno por hilo, igual que las conexiones)
+_local = threading.local()
+
+
+class ScoreChangeBatch:
+    """Cambios de calificaciones acumulados durante una transacción"""
+
+    def __init__(self):
+        self.competitions: Dict[int, Dict[str, Any]] = {}
+        # Competencias eliminadas en la transacción (ver competition_deleting)
+        self.deleted_competitions: Set[int] = set()
+        self.flushed = False
+
+    def add(self, competition_id: int, participant_id: Optional[int], judge_id: Optional[int],
+            score_ids: Iterable[int] = (), deleted_node: Optional[str] = None):
+        """Registra un cambio y lo escribe en la cola (los repetidos se ignoran)"""
+        if competition_id in self.deleted_competitions:
+            # Borrado en cascada: no hay nada que sincronizar ni recalcular
+            return
+
+        change = self.competitions.get(competition_id)
+        first = change is None
+        if first:
+            change = self.competitions[competition_id] = {
+                'participants': set(),
+                'scores': set(),
+                'score_ids': set(),
+                'deleted': set(),
+                'batch_task': None
+            }
+        change['participants'].add(participant_id)
+        
+        new_pairs = []
+        batch_changed = False
+        score_ids = set(score_ids) - change['score_ids']
+        if score_ids:
+            change['score_ids'].update(score_ids)
+            batch_changed = True
+        elif deleted_node is not None:
+            batch_changed = deleted_node not in change['deleted']
+            change['deleted'].add(deleted_node)
+        elif participant_id is not None and judge_id is not None:
+            # Sin calificación concreta: sincronizar todas las del juez
+            if (participant_id, judge_id) not in change['scores']:
+                change['scores'].add((participant_id, judge_id))
+                new_pairs.append((participant_id, judge_id))
+        
+        self._persist(competition_id, change, first, new_pairs, batch_changed)
+
+    def _persist(self, competition_id: int, change: Dict[str, Any], first: bool,
+                 new_pairs, batch_changed: bool):
+        """Escribe en la transacción actual las tareas de sincronización del cambio"""
+        from .models import SyncTask
+        from .scheduler import build_dirty_mark
+        from .tasks import build_dedup_key, enqueue_sync_tasks
+
+        new_tasks = []
+        if first:
+            # Marca durable del recálculo (se completa al recalcular en este proceso)
+            dirty_mark = build_dirty_mark(competition_id)
+            if dirty_mark is not None:
+                new_tasks.append(dirty_mark)
+
+        # Las tareas pendientes indican que la competencia no está sincronizada
+        # (ver views.sync_status): no se escribe FirebaseSync en cada cambio
+        if new_pairs:
+            enqueue_sync_tasks([
+                ('sync_participant_scores', competition_id,
+                 {'participant_id': participant_id, 'judge_id': judge_id})
+                for participant_id, judge_id in new_pairs
+            ])
+
+        if batch_changed:
+            # Una sola tarea por transacción con todos los nodos modificados:
+            # se crea con el primer cambio y se amplía con los siguientes
+            payload = {
+                'score_ids': sorted(change['score_ids']),
+                'deleted': sorted(change['deleted'])
+            }
+            dedup_key = build_dedup_key('sync_score_batch', competition_id, payload)
+            task_id = change['batch_task']
+            if task_id is None or not SyncTask.objects.filter(id=task_id).update(
+                payload=payload, dedup_key=dedup_key
+            ):
+                batch_task = SyncTask(
+                    kind='sync_score_batch', competition_id=competition_id,
+                    payload=payload, dedup_key=dedup_key
+                )
+                new_tasks.append(batch_task)
+
+        if new_tasks:
+            SyncTask.objects.bulk_create(new_tasks)
+            if batch_changed and new_tasks[-1].kind == 'sync_score_batch':
+                change['batch_task'] = new_tasks[-1].id
+
+    def flush(self):
+        """Despacha el trabajo en memoria de los cambios confirmados: una vez por competencia"""
+        from .scheduler import ranking_scheduler
+        from .score_stream import score_broadcaster
+
+        self.flushed = True
+
+        for competition_id, change in self.competitions.items():
+            try:
+                # Difundir las calificaciones a los WebSocket de cada participante
+                if change['score_ids'] or change['deleted']:
+                    score_broadcaster.add(competition_id, change['score_ids'], change['deleted'])
+
+                # Un solo recálculo: incremental si cambió un participante, completo si no
+                participants = change['participants']
+                participant_id = next(iter(participants)) if len(participants) == 1 else None
+                ranking_scheduler.mark_dirty(competition_id, participant_id)
+            except Exception as e:
+                logger.error(f"Error al despachar cambios de calificaciones de la competencia {competition_id}: {e}")
+
+
+def _get_open_batch() -> Optional[ScoreChangeBatch]:
+    """
+    Devuelve el lote de la transacción actual si su despacho sigue registrado.
+    Tras un commit o un rollback (incluido el de un savepoint donde se registró)
+    el lote ya no es válido y se debe abrir uno nuevo.
+    """
+    batch = getattr(_local, 'batch', None)
+    if batch is None or batch.flushed:
+        return None
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return None
+
+    if any(callback == batch.flush for _, callback, _ in connection.run_on_commit):
+        return batch
+    return None
+
+
+def _open_batch() -> ScoreChangeBatch:
+    """Lote de la transacción actual; lo abre y registra su despacho si no existe"""
+    batch = _get_open_batch()
+    if batch is None:
+        batch = ScoreChangeBatch()
+        _local.batch = batch
+        transaction.on_commit(batch.flush)
+    return batch
+
+
+def competition_deleting(competition_id: int):
+    """
+    Marca una competencia que se elimina en la transacción actual (pre_delete).
+    Las calificaciones que se borran en cascada no escriben tareas en la cola:
+    apuntarían a la competencia eliminada y la clave foránea fallaría al confirmar.
+
+    Args:
+        competition_id: ID de la competencia
+    """
+    batch = _open_batch()
+    batch.deleted_competitions.add(competition_id)
+    # Los cambios previos de la misma transacción se borran en cascada con ella
+    batch.competitions.pop(competition_id, None)
+
+
+def score_changed(competition_id: int, participant_id: Optional[int] = None, judge_id: Optional[int] = None,
+                  score_id: Optional[int] = None, deleted_node: Optional[str] = None,
+                  score_ids: Iterable[int] = ()):
+    """
+    Registra que cambiaron calificaciones de una competencia.
+    Las tareas de sincronización se escriben en la transacción actual; el
+    recálculo y la difusión se despachan una sola vez al confirmarse (en modo
+    autocommit, de inmediato).
+
+    Args:
+        competition_id: ID de la competencia
+        participant_id: ID del participante afectado (None si afecta a todos)
+        judge_id: ID del juez cuyas calificaciones cambiaron (opcional)
+        score_id: ID de la calificación guardada (opcional)
+        deleted_node: Ruta 'participante/juez/parámetro' de una calificación eliminada (opcional)
+        score_ids: IDs de varias calificaciones guardadas (escrituras en bloque)
+    """
+    score_ids = [*score_ids, score_id] if score_id is not None else list(score_ids)
+    _open_batch().add(competition_id, participant_id, judge_id, score_ids, deleted_node)
@@ -3,11 +3,48 @@ Procesadores de calificación específicos para el sistema FEI (3 celdas).
 Este módulo contiene las clases y funciones para procesar y validar calificaciones.
 """
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Hashable, Optional, Sequence, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def to_tenths(value: Union[int, float, str, Decimal]) -> int:
+    """
+    Convertir una calificación a décimas enteras (7.5 -> 75)
+    
+    Args:
+        value: Calificación con a lo sumo un decimal
+        
+    Returns:
+        int: Calificación en décimas
+        
+    Raises:
+        ValueError: Si el valor no es un número o tiene más de un decimal
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value * 10
+    
+    try:
+        if not isinstance(value, Decimal):
+            value = Decimal(str(value))
+        tenths = value * 10
+        if tenths != tenths.to_integral_value():
+            raise ValueError
+        return int(tenths)
+    except Exception:
+        raise ValueError(f"La calificación no es válida: {value}")
+
+
+def _round_half_up(numerator: int, denominator: int) -> int:
+    """Cociente entero redondeado a la mitad hacia arriba (valores no negativos)"""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def _hundredths_to_decimal(hundredths: int) -> Decimal:
+    """Centésimas enteras a Decimal con 2 decimales (735 -> Decimal('7.35'))"""
+    return Decimal(hundredths).scaleb(-2)
+
 class FEIScoreProcessor:
     """
     Procesador para calificaciones según el sistema FEI de 3 celdas.
@@ -101,8 +138,11 @@ class FEIScoreProcessor:
         if not scores:
             return Decimal('0')
         
-        # Convertir todas las puntuaciones a Decimal
-        decimal_scores = [Decimal(str(score)) for score in scores]
+        # Convertir a Decimal solo las puntuaciones que no lo son
+        decimal_scores = [
+            score if isinstance(score, Decimal) else Decimal(str(score))
+            for score in scores
+        ]
         
         # Calcular promedio
         total = sum(decimal_scores)
@@ -126,6 +166,122 @@ class FEIScoreProcessor:
         
         percentage = (average / Decimal(str(self.max_value))) * Decimal('100')
         return percentage.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    
+    def calculate_results_batch(self,
+                                values: Sequence[int],
+                                coefficients: Sequence[int],
+                                max_values: Optional[Sequence[int]] = None
+                               ) -> List[int]:
+        """
+        Calcular en un solo recorrido los resultados FEI de muchas calificaciones.
+        Trabaja con enteros en décimas: produce exactamente los mismos valores que
+        calculate_result sin convertir cada número a Decimal.
+        
+        Args:
+            values: Calificaciones en décimas (ver to_tenths)
+            coefficients: Coeficiente entero de cada calificación
+            max_values: Valor máximo de cada calificación (por defecto self.max_value)
+            
+        Returns:
+            List[int]: Resultado de cada calificación
+            
+        Raises:
+            ValueError: Si alguna calificación o coeficiente no es válido
+        """
+        if len(values) != len(coefficients) or (max_values is not None and len(max_values) != len(values)):
+            raise ValueError("Las listas de calificaciones, coeficientes y máximos deben tener el mismo largo")
+        
+        if max_values is None:
+            max_values = [self.max_value] * len(values)
+        
+        results = []
+        for value, coefficient, max_value in zip(values, coefficients, max_values):
+            max_tenths = max_value * 10
+            if not 0 <= value <= max_tenths:
+                raise ValueError(f"La calificación debe estar entre 0 y {max_value}")
+            if coefficient <= 0:
+                raise ValueError("El coeficiente debe ser mayor a cero")
+            
+            # min(valor * coeficiente, máximo) redondeado a entero (décimas -> unidades)
+            results.append(_round_half_up(min(value * coefficient, max_tenths), 10))
+        
+        return results
+    
+    def calculate_averages_batch(self,
+                                 results: Sequence[int],
+                                 groups: Sequence[Hashable]
+                                ) -> Dict[Hashable, Dict[str, Any]]:
+        """
+        Calcular promedio y porcentaje de cada grupo (p. ej. cada juez) en un solo recorrido.
+        Equivale a calculate_average y calculate_percentage sobre los resultados de cada grupo.
+        
+        Args:
+            results: Resultados en décimas
+            groups: Grupo al que pertenece cada resultado
+            
+        Returns:
+            Dict: {grupo: {'average', 'percentage', 'count'}}
+        """
+        if len(results) != len(groups):
+            raise ValueError("Las listas de resultados y grupos deben tener el mismo largo")
+        
+        totals = {}
+        for result, group in zip(results, groups):
+            total, count = totals.get(group, (0, 0))
+            totals[group] = (total + result, count + 1)
+        
+        return self.calculate_totals_batch(totals)
+    
+    def calculate_totals_batch(self, totals: Dict[Hashable, tuple]) -> Dict[Hashable, Dict[str, Any]]:
+        """
+        Calcular promedio y porcentaje de cada grupo a partir de su suma y cantidad
+        (p. ej. las filas de JudgeParticipantAggregate).
+        
+        Args:
+            totals: {grupo: (suma de resultados en décimas, cantidad)}
+            
+        Returns:
+            Dict: {grupo: {'average', 'percentage', 'count'}}
+        """
+        averages = {}
+        for group, (total, count) in totals.items():
+            if not count:
+                continue
+            # Promedio en centésimas: (total / 10) / count * 100
+            average = _round_half_up(10 * total, count)
+            # Porcentaje en centésimas: average / max_value * 100
+            percentage = _round_half_up(100 * average, self.max_value)
+            averages[group] = {
+                'average': _hundredths_to_decimal(average),
+                'percentage': _hundredths_to_decimal(percentage),
+                'count': count
+            }
+        
+        return averages
+    
+    def calculate_batch(self,
+                        values: Sequence[int],
+                        coefficients: Sequence[int],
+                        groups: Sequence[Hashable],
+                        max_values: Optional[Sequence[int]] = None
+                       ) -> Dict[str, Any]:
+        """
+        Calcular resultados, promedios y porcentajes por juez de un lote de calificaciones
+        
+        Args:
+            values: Calificaciones en décimas (ver to_tenths)
+            coefficients: Coeficiente entero de cada calificación
+            groups: Juez (u otro grupo) de cada calificación
+            max_values: Valor máximo de cada calificación (opcional)
+            
+        Returns:
+            Dict: {'results': [int], 'judges': {grupo: {'average', 'percentage', 'count'}}}
+        """
+        results = self.calculate_results_batch(values, coefficients, max_values)
+        return {
+            'results': results,
+            'judges': self.calculate_averages_batch([result * 10 for result in results], groups)
+        }
 
 
 class ParticipantRankingCalculator:
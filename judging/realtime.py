@@ -4,8 +4,6 @@ Proporciona funciones para la sincronización bidireccional y manejo de eventos.
 """
 import logging
 import json
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from django.db import transaction
 
 from .models import Score, Ranking, FirebaseSync
@@ -28,29 +26,11 @@ def sync_score_to_all_clients(score):
         from .firebase import sync_scores
         firebase_success = sync_scores(score.id)
         
-        # Notificar a clientes WebSocket
-        channel_layer = get_channel_layer()
-        score_data = {
-            'id': score.id,
-            'judge_id': score.judge_id,
-            'parameter_id': score.parameter.parameter_id,
-            'value': float(score.value),
-            'calculated_result': float(score.calculated_result),
-            'is_edited': score.is_edited,
-            'updated_at': score.updated_at.isoformat() if score.updated_at else None
-        }
-        
-        # Nombre del grupo WebSocket para este participante
-        room_group_name = f'scores_{score.competition_id}_{score.participant_id}'
-        
-        # Enviar mensaje al grupo
-        async_to_sync(channel_layer.group_send)(
-            room_group_name,
-            {
-                'type': 'score_message',
-                'score': score_data
-            }
-        )
+        # Notificar a clientes WebSocket del participante
+        from .score_stream import send_score_frames, serialize_score
+        send_score_frames(score.competition_id, {
+            score.participant_id: {'scores': [serialize_score(score)], 'deleted': []}
+        })
         
         logger.info(f"Calificación {score.id} sincronizada a todos los clientes")
         return True
@@ -75,56 +55,9 @@ def sync_rankings_to_all_clients(competition_id):
         from .firebase import sync_rankings
         firebase_success = sync_rankings(competition_id)
         
-        # Notificar a clientes WebSocket
-        channel_layer = get_channel_layer()
-        
-        # Obtener rankings actuales
-        rankings = Ranking.objects.filter(
-            competition_id=competition_id
-        ).select_related(
-            'participant', 'participant__rider', 'participant__horse'
-        ).order_by('position')
-        
-        # Formatear para enviar por WebSocket
-        rankings_data = []
-        for ranking in rankings:
-            participant = ranking.participant
-            rider = participant.rider
-            horse = participant.horse
-            
-            rankings_data.append({
-                'id': ranking.id,
-                'participant_id': participant.id,
-                'position': ranking.position,
-                'average': float(ranking.average_score),
-                'percentage': float(ranking.percentage),
-                'rider': {
-                    'id': rider.id,
-                    'first_name': rider.first_name,
-                    'last_name': rider.last_name,
-                    'nationality': rider.nationality or ''
-                },
-                'horse': {
-                    'id': horse.id,
-                    'name': horse.name,
-                    'breed': horse.breed or ''
-                },
-                'number': participant.number,
-                'order': participant.order,
-                'withdrawn': participant.is_withdrawn
-            })
-        
-        # Nombre del grupo WebSocket para esta competencia
-        room_group_name = f'rankings_{competition_id}'
-        
-        # Enviar mensaje al grupo
-        async_to_sync(channel_layer.group_send)(
-            room_group_name,
-            {
-                'type': 'rankings_update',
-                'rankings': rankings_data
-            }
-        )
+        # Notificar a clientes WebSocket con el mensaje ya codificado
+        from .consumers import notify_rankings_update
+        notify_rankings_update(competition_id)
         
         logger.info(f"Rankings de competencia {competition_id} sincronizados a todos los clientes")
         return True
@@ -187,7 +120,7 @@ def handle_firebase_ranking_update(competition_id, data):
     try:
         # Actualizar los rankings en la base de datos
         from .services import update_participant_rankings
-        rankings_data = update_participant_rankings(competition_id, recalculate_all=True)
+        rankings_data = update_participant_rankings(competition_id)
         
         # Notificar a clientes WebSocket
         sync_rankings_to_all_clients(competition_id)
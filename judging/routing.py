@@ -3,6 +3,7 @@ Enrutamiento WebSocket para actualizaciones en tiempo real.
 """
 from django.urls import re_path
 from . import consumers
+from .sse import RankingEventStream
 
 # URL patterns para WebSockets
 websocket_urlpatterns = [
@@ -12,9 +13,24 @@ websocket_urlpatterns = [
         consumers.ScoreConsumer.as_asgi()
     ),
     
+    # Para que los jueces asignados envíen calificaciones (requiere token)
+    re_path(
+        r'ws/judging/(?P<competition_id>\d+)/$',
+        consumers.JudgeScoreConsumer.as_asgi()
+    ),
+    
     # Para actualizaciones de rankings por competencia
     re_path(
         r'ws/rankings/(?P<competition_id>\d+)/$',
         consumers.RankingConsumer.as_asgi()
     ),
-]
\ No newline at end of file
+]
+
+# URL patterns HTTP servidos por Channels (streams de larga duración)
+http_urlpatterns = [
+    # Rankings por Server-Sent Events para espectadores (solo lectura)
+    re_path(
+        r'^sse/rankings/(?P<competition_id>\d+)/$',
+        RankingEventStream()
+    ),
+]
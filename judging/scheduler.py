@@ -0,0 +1,224 @@
+"""
+Programador de recálculo de rankings por competencia.
+Agrupa ráfagas de eventos "la competencia X cambió" en un único recálculo
+ejecutado fuera del hilo de la petición.
+
+La agrupación es por proceso: con varios procesos web cada uno recalcula sus
+propios cambios. Para que un reinicio dentro de la ventana no pierda el
+recálculo, cada transacción con cambios deja además una marca durable (una
+tarea 'recalculate_rankings' por competencia en la cola de sincronización)
+que el recálculo en proceso da por completada; si el proceso cae antes, el
+worker la ejecuta pasado RANKING_RECALC_RECOVERY_DELAY.
+"""
+import threading
+import time
+import logging
+from datetime import timedelta
+from typing import Dict, Any, Optional
+
+from django.conf import settings
+from django.db import transaction, close_old_connections, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class RankingRecalculationScheduler:
+    """
+    Acumula eventos de cambio por competencia durante una ventana configurable
+    (RANKING_RECALC_WINDOW, en segundos) y ejecuta un solo recálculo al cerrarla.
+    Con una ventana de 0 el recálculo se ejecuta de inmediato en el hilo actual.
+    """
+
+    def __init__(self, window: Optional[float] = None):
+        """Inicializar programador con la ventana de agrupación (opcional)"""
+        self._window = window
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._metrics = {
+            'events': 0,
+            'merged': 0,
+            'runs': 0,
+            'errors': 0,
+            'last_duration_ms': None,
+            'last_batch_size': None
+        }
+
+    @property
+    def window(self) -> float:
+        """Ventana de agrupación en segundos (sin ventana fija, se lee de settings en cada llamada)"""
+        if self._window is not None:
+            return self._window
+        return getattr(settings, 'RANKING_RECALC_WINDOW', 0.25)
+
+    def mark_dirty(self, competition_id: int, participant_id: Optional[int] = None):
+        """
+        Registra que los rankings de una competencia deben recalcularse.
+
+        Args:
+            competition_id: ID de la competencia
+            participant_id: ID del participante afectado (None para recalcular todos)
+        """
+        with self._lock:
+            self._metrics['events'] += 1
+            entry = self._pending.get(competition_id)
+
+            if entry is not None:
+                # Ya hay un recálculo programado: fusionar el evento
+                self._metrics['merged'] += 1
+                entry['events'] += 1
+                if participant_id is None:
+                    entry['full'] = True
+                else:
+                    entry['participants'].add(participant_id)
+                return
+
+            entry = {
+                'events': 1,
+                'full': participant_id is None,
+                'participants': set() if participant_id is None else {participant_id},
+                'timer': None
+            }
+            self._pending[competition_id] = entry
+
+            if self.window > 0:
+                timer = threading.Timer(self.window, self._run_in_thread, args=(competition_id,))
+                timer.daemon = True
+                entry['timer'] = timer
+                timer.start()
+
+        if entry['timer'] is None:
+            self._run(competition_id)
+
+    def flush(self, competition_id: Optional[int] = None):
+        """
+        Ejecuta de inmediato los recálculos pendientes (todos o de una competencia).
+
+        Args:
+            competition_id: ID de la competencia (opcional)
+        """
+        with self._lock:
+            competition_ids = [competition_id] if competition_id is not None else list(self._pending)
+            for cid in competition_ids:
+                entry = self._pending.get(cid)
+                if entry and entry['timer'] is not None:
+                    entry['timer'].cancel()
+
+        for cid in competition_ids:
+            self._run(cid)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve las métricas del programador.
+
+        Returns:
+            Dict: Eventos recibidos, fusionados, recálculos ejecutados y pendientes
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['pending'] = len(self._pending)
+        metrics['window'] = self.window
+        return metrics
+
+    def _run_in_thread(self, competition_id: int):
+        """Ejecuta el recálculo desde el hilo del temporizador con su propia conexión"""
+        close_old_connections()
+        try:
+            self._run(competition_id)
+        finally:
+            connection.close()
+
+    def _run(self, competition_id: int):
+        """Ejecuta un recálculo para todos los eventos acumulados de una competencia"""
+        with self._lock:
+            entry = self._pending.pop(competition_id, None)
+
+        if entry is None:
+            return
+
+        from .services import update_participant_rankings, update_participant_ranking
+
+        start = time.monotonic()
+        started_at = timezone.now()
+        try:
+            participants = entry['participants']
+            if not entry['full'] and len(participants) == 1:
+                update_participant_ranking(competition_id, next(iter(participants)))
+            else:
+                update_participant_rankings(competition_id)
+            clear_dirty_mark(competition_id, started_at)
+
+            with self._lock:
+                self._metrics['runs'] += 1
+                self._metrics['last_batch_size'] = entry['events']
+        except Exception as e:
+            logger.error(f"Error al recalcular rankings de la competencia {competition_id}: {e}")
+            with self._lock:
+                self._metrics['errors'] += 1
+        finally:
+            with self._lock:
+                self._metrics['last_duration_ms'] = round((time.monotonic() - start) * 1000, 2)
+
+
+def build_dirty_mark(competition_id: int):
+    """
+    Marca durable de "rankings pendientes de recálculo" para la transacción actual.
+    Si ya hay una marca pendiente se posterga (una consulta); si no, devuelve
+    la tarea a crear para que el llamador la inserte junto con otras.
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        SyncTask sin guardar, o None si se reutilizó la marca pendiente
+    """
+    from .models import SyncTask
+    from .tasks import build_dedup_key
+
+    now = timezone.now()
+    window = ranking_scheduler.window
+    due = now + timedelta(seconds=window + getattr(settings, 'RANKING_RECALC_RECOVERY_DELAY', 30))
+
+    if SyncTask.objects.filter(
+        kind='recalculate_rankings', competition_id=competition_id, status='pending'
+    ).update(available_at=due, updated_at=now):
+        return None
+
+    return SyncTask(
+        kind='recalculate_rankings', competition_id=competition_id, payload={},
+        dedup_key=build_dedup_key('recalculate_rankings', competition_id, {}),
+        available_at=due
+    )
+
+
+def clear_dirty_mark(competition_id: int, started_at):
+    """
+    Da por completadas las marcas durables anteriores al inicio de un recálculo.
+
+    Args:
+        competition_id: ID de la competencia
+        started_at: Momento en que empezó el recálculo (lee todo lo confirmado antes)
+    """
+    from .models import SyncTask
+
+    SyncTask.objects.filter(
+        kind='recalculate_rankings', competition_id=competition_id,
+        status='pending', updated_at__lte=started_at
+    ).update(status='done', updated_at=timezone.now())
+
+
+# Instancia compartida para usar en el proyecto
+ranking_scheduler = RankingRecalculationScheduler()
+
+
+def schedule_ranking_update(competition_id: int, participant_id: Optional[int] = None):
+    """
+    Programa el recálculo de rankings cuando la transacción actual se confirme.
+
+    Args:
+        competition_id: ID de la competencia
+        participant_id: ID del participante afectado (opcional)
+    """
+    transaction.on_commit(
+        lambda: ranking_scheduler.mark_dirty(competition_id, participant_id)
+    )
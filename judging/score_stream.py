@@ -0,0 +1,211 @@
+"""
+Difusión de calificaciones a los WebSocket de cada participante
+(grupo `scores_{competencia}_{participante}`).
+Los cambios que llegan durante una ventana corta se envían en un solo mensaje
+'scores_update' por participante, de modo que una hoja completa de un juez
+llega a las pantallas como una única actualización.
+"""
+import threading
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_score(score) -> Dict[str, Any]:
+    """
+    Convierte una calificación al formato enviado por WebSocket.
+
+    Args:
+        score: Objeto Score (con parameter cargado)
+
+    Returns:
+        Dict: Datos de la calificación
+    """
+    return {
+        'id': score.id,
+        'participant_id': score.participant_id,
+        'judge_id': score.judge_id,
+        'parameter_id': score.parameter.parameter_id,
+        'value': float(score.value),
+        'calculated_result': float(score.calculated_result),
+        'is_edited': score.is_edited,
+        'comments': score.comments,
+        'updated_at': score.updated_at.isoformat() if score.updated_at else None
+    }
+
+
+class ScoreStreamBroadcaster:
+    """
+    Acumula por competencia las calificaciones modificadas durante una ventana
+    configurable (SCORE_BROADCAST_WINDOW, en segundos) y al cerrarla envía un
+    mensaje por participante. Con una ventana de 0 se envía de inmediato.
+    """
+
+    def __init__(self, window: Optional[float] = None):
+        """Inicializar difusor con la ventana de agrupación (opcional)"""
+        self._window = window
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._metrics = {
+            'events': 0,
+            'frames': 0,
+            'errors': 0
+        }
+
+    @property
+    def window(self) -> float:
+        """Ventana de agrupación en segundos (sin ventana fija, se lee de settings en cada llamada)"""
+        if self._window is not None:
+            return self._window
+        return getattr(settings, 'SCORE_BROADCAST_WINDOW', 0.1)
+
+    def add(self, competition_id: int, score_ids: Iterable[int] = (), deleted: Iterable[str] = ()):
+        """
+        Registra calificaciones guardadas o eliminadas para difundirlas.
+
+        Args:
+            competition_id: ID de la competencia
+            score_ids: IDs de calificaciones guardadas
+            deleted: Rutas 'participante/juez/parámetro' de calificaciones eliminadas
+        """
+        with self._lock:
+            self._metrics['events'] += 1
+            entry = self._pending.get(competition_id)
+            created = entry is None
+
+            if created:
+                entry = {'score_ids': set(), 'deleted': set(), 'timer': None}
+                self._pending[competition_id] = entry
+
+            entry['score_ids'].update(score_ids)
+            entry['deleted'].update(deleted)
+
+            if not created:
+                return
+
+            if self.window > 0:
+                timer = threading.Timer(self.window, self._run_in_thread, args=(competition_id,))
+                timer.daemon = True
+                entry['timer'] = timer
+                timer.start()
+
+        if entry['timer'] is None:
+            self._run(competition_id)
+
+    def flush(self, competition_id: Optional[int] = None):
+        """
+        Envía de inmediato los cambios pendientes (todos o de una competencia).
+
+        Args:
+            competition_id: ID de la competencia (opcional)
+        """
+        with self._lock:
+            competition_ids = [competition_id] if competition_id is not None else list(self._pending)
+            for cid in competition_ids:
+                entry = self._pending.get(cid)
+                if entry and entry['timer'] is not None:
+                    entry['timer'].cancel()
+
+        for cid in competition_ids:
+            self._run(cid)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve las métricas del difusor.
+
+        Returns:
+            Dict: Eventos recibidos, mensajes enviados, errores y pendientes
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['pending'] = len(self._pending)
+        metrics['window'] = self.window
+        return metrics
+
+    def _run_in_thread(self, competition_id: int):
+        """Envía los cambios desde el hilo del temporizador con su propia conexión"""
+        close_old_connections()
+        try:
+            self._run(competition_id)
+        finally:
+            connection.close()
+
+    def _run(self, competition_id: int):
+        """Envía un mensaje por participante con todos los cambios acumulados"""
+        with self._lock:
+            entry = self._pending.pop(competition_id, None)
+
+        if entry is None:
+            return
+
+        try:
+            frames = build_score_frames(entry['score_ids'], entry['deleted'])
+            send_score_frames(competition_id, frames)
+
+            with self._lock:
+                self._metrics['frames'] += len(frames)
+        except Exception as e:
+            logger.error(f"Error al difundir calificaciones de la competencia {competition_id}: {e}")
+            with self._lock:
+                self._metrics['errors'] += 1
+
+
+def build_score_frames(score_ids: Iterable[int], deleted: Iterable[str] = ()) -> Dict[int, Dict[str, List]]:
+    """
+    Agrupa por participante las calificaciones modificadas.
+
+    Args:
+        score_ids: IDs de calificaciones guardadas
+        deleted: Rutas 'participante/juez/parámetro' de calificaciones eliminadas
+
+    Returns:
+        Dict: {participant_id: {'scores': [...], 'deleted': [...]}}
+    """
+    from .models import Score
+
+    frames: Dict[int, Dict[str, List]] = {}
+
+    score_ids = list(score_ids)
+    if score_ids:
+        scores = Score.objects.filter(id__in=score_ids).select_related('parameter').order_by('id')
+        for score in scores:
+            frame = frames.setdefault(score.participant_id, {'scores': [], 'deleted': []})
+            frame['scores'].append(serialize_score(score))
+
+    for node in sorted(deleted):
+        participant_id, judge_id, parameter_id = (int(part) for part in node.split('/'))
+        frame = frames.setdefault(participant_id, {'scores': [], 'deleted': []})
+        frame['deleted'].append({'judge_id': judge_id, 'parameter_id': parameter_id})
+
+    return frames
+
+
+def send_score_frames(competition_id: int, frames: Dict[int, Dict[str, List]]):
+    """
+    Envía a cada grupo de participante su mensaje 'scores_update' ya codificado.
+
+    Args:
+        competition_id: ID de la competencia
+        frames: Cambios por participante (ver build_score_frames)
+    """
+    from channels.layers import get_channel_layer
+    from asgiref.sync import async_to_sync
+    from .consumers import encode_frame
+
+    channel_layer = get_channel_layer()
+    for participant_id, frame in frames.items():
+        async_to_sync(channel_layer.group_send)(
+            f'scores_{competition_id}_{participant_id}',
+            {
+                'type': 'score_message',
+                'text': encode_frame('scores_update', **frame)
+            }
+        )
+
+
+# Instancia compartida para usar en el proyecto
+score_broadcaster = ScoreStreamBroadcaster()
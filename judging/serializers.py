@@ -139,7 +139,7 @@ class ScoreSerializer(serializers.ModelSerializer):
     
     judge_details = UserSerializer(source='judge', read_only=True)
     parameter_details = CompetitionParameterSerializer(source='parameter', read_only=True)
-    edits = ScoreEditSerializer(source='edits', many=True, read_only=True)
+    edits = ScoreEditSerializer(many=True, read_only=True)
     
     class Meta:
         model = Score
@@ -4,10 +4,13 @@ Implementa los algoritmos de calificación y ranking según normativa ecuestre F
 """
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, List, Tuple, Any, Optional
-from django.db.models import Avg, F, Sum
+from django.db.models import Avg, Count, F
 from django.db import transaction
 import logging
 
+from .aggregates import get_judge_totals
+from .tracing import ranking_span, trace
+
 logger = logging.getLogger(__name__)
 
 def calculate_parameter_score(judge_score: float, coefficient: int, max_value: int = 10) -> int:
@@ -50,7 +53,7 @@ def calculate_average_score(scores: List[Any]) -> Decimal:
         Decimal: Promedio de calificaciones con 2 decimales
     """
     if not scores:
-        print("No hay calificaciones para calcular promedio.")
+        trace(None, "No hay calificaciones para calcular promedio")
         return Decimal('0.00')
     
     # CORRECCIÓN: Extraer explícitamente los valores
@@ -59,43 +62,42 @@ def calculate_average_score(scores: List[Any]) -> Decimal:
         if hasattr(score, 'calculated_result'):
             # Extraer el valor calculated_result
             value = float(score.calculated_result)
-            print(f"Score #{i+1}: valor calculated_result = {value}")
+            trace(None, "Score #%s: valor calculated_result = %s", i + 1, value)
             values.append(value)
         elif hasattr(score, 'value'):
             # Tal vez solo tiene value (sin resultado calculado)
             value = float(score.value)
-            print(f"Score #{i+1}: valor directo = {value}")
+            trace(None, "Score #%s: valor directo = %s", i + 1, value)
             values.append(value)
         elif isinstance(score, (int, float, Decimal)):
             # Es un valor numérico directo
             value = float(score)
-            print(f"Score #{i+1}: valor numérico = {value}")
+            trace(None, "Score #%s: valor numérico = %s", i + 1, value)
             values.append(value)
         else:
             # Desconocido, intenta convertir
             try:
                 value = float(score)
-                print(f"Score #{i+1}: valor convertido = {value}")
+                trace(None, "Score #%s: valor convertido = %s", i + 1, value)
                 values.append(value)
             except (TypeError, ValueError):
-                print(f"Score #{i+1}: No se pudo convertir a número: {score}")
+                logger.warning("Score #%s: no se pudo convertir a número: %s", i + 1, score)
     
     if not values:
-        print("ADVERTENCIA: No se pudieron extraer valores numéricos de los scores")
+        logger.warning("No se pudieron extraer valores numéricos de las calificaciones")
         return Decimal('0.00')
     
     # Calcular promedio
     total = sum(values)
     if len(values) == 0:
-        print("ADVERTENCIA: División por cero al calcular promedio")
+        logger.warning("División por cero al calcular promedio")
         return Decimal('0.00')
     
     avg = Decimal(str(total / len(values)))
-    print(f"Promedio calculado: {float(avg)} (suma: {total}, cantidad: {len(values)})")
+    trace(None, "Promedio calculado: %s (suma: %s, cantidad: %s)", avg, total, len(values))
     
-    # CORRECCIÓN: Agrega logging para depuración
     if avg == 0 and total > 0:
-        print(f"ADVERTENCIA: Promedio calculado como 0 aunque el total es {total} (valores: {values})")
+        logger.warning("Promedio calculado como 0 aunque el total es %s (valores: %s)", total, values)
     
     return avg.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
@@ -159,8 +161,10 @@ def calculate_judge_ranking(judge_id: int, competition_id: int, participant_id:
     # MODIFICACIÓN: Extraer los valores calculated_result explícitamente
     results = [float(score.calculated_result) for score in scores]
     
-    # Imprime los valores para depuración
-    print(f"Valores calculated_result para juez {judge_id}, participante {participant_id}: {results}")
+    trace(
+        competition_id, "Valores calculated_result para juez %s, participante %s: %s",
+        judge_id, participant_id, results
+    )
     
     # Calcular promedio manualmente si es necesario
     if results:
@@ -172,8 +176,10 @@ def calculate_judge_ranking(judge_id: int, competition_id: int, participant_id:
         average = Decimal('0.00')
         percentage = Decimal('0.00')
     
-    # Imprimir los resultados calculados
-    print(f"Juez {judge_id}, Participante {participant_id}: average={float(average)}, percentage={float(percentage)}%")
+    trace(
+        competition_id, "Juez %s, participante %s: average=%s, percentage=%s%%",
+        judge_id, participant_id, average, percentage
+    )
     
     return {
         'judge_id': judge_id,
@@ -217,24 +223,26 @@ def calculate_final_ranking(competition_id: int, participant_id: int) -> Dict[st
             'judge_count': 0
         }
     
-     # MODIFICACIÓN: Calcular promedio de porcentajes de todos los jueces con depuración
+    # Calcular promedio de porcentajes de todos los jueces
     percentages = [jr['percentage'] for jr in judge_rankings]
-    print(f"Porcentajes para participante {participant_id}: {[float(p) for p in percentages]}")
+    trace(competition_id, "Porcentajes para participante %s: %s", participant_id, percentages)
     
     if percentages:
         total_percentage = sum(float(p) for p in percentages)
         avg_percentage = Decimal(str(total_percentage / len(percentages)))
         # Verificar que no sea cero
         if avg_percentage == 0 and any(p > 0 for p in percentages):
-            print(f"ERROR: avg_percentage es 0 aunque hay porcentajes > 0")
+            logger.warning("avg_percentage es 0 aunque hay porcentajes > 0 (participante %s)", participant_id)
     else:
         avg_percentage = Decimal('0.00')
     
     # Convertir de nuevo a promedio (0-10)
     final_average = (avg_percentage / Decimal('100')) * Decimal('10')
     
-    # Imprimir resultado final
-    print(f"Ranking final participante {participant_id}: average={float(final_average)}, percentage={float(avg_percentage)}%")
+    trace(
+        competition_id, "Ranking final participante %s: average=%s, percentage=%s%%",
+        participant_id, final_average, avg_percentage
+    )
     
     return {
         'participant_id': participant_id,
@@ -246,145 +254,366 @@ def calculate_final_ranking(competition_id: int, participant_id: int) -> Dict[st
 
 
 @transaction.atomic
-def update_participant_rankings(competition_id: int, recalculate_all: bool = False) -> List[Dict[str, Any]]:
+def update_participant_rankings(competition_id: int) -> List[Dict[str, Any]]:
     """
     Actualiza los rankings de todos los participantes en una competencia.
+    Recalcula la competencia completa; se usa como operación de reparación
+    (recalcular/forzar sincronización). Para cambios de una calificación usar
+    update_participant_ranking.
     
     Args:
         competition_id: ID de la competencia
-        recalculate_all: Si es True, recalcula todos los rankings incluso si no hay cambios
     
     Returns:
         List[Dict]: Lista de rankings actualizados
     """
-    from .models import Ranking, Score
-    from competitions.models import Competition, Participant, CompetitionJudge
+    from .models import Ranking
+    from competitions.models import Competition
     
     try:
         competition = Competition.objects.get(id=competition_id)
         
-        # Obtener participantes activos (no retirados)
-        participants = Participant.objects.filter(
-            competition=competition, 
-            is_withdrawn=False
-        ).select_related('rider', 'horse', 'category')
+        # Calcular todos los rankings con consultas agrupadas
+        rankings_data = calculate_competition_rankings(competition.id)
         
-        print(f"Procesando {participants.count()} participantes para la competencia {competition.name}")
+        trace(
+            competition.id, "Rankings calculados para %s: %s participantes",
+            competition.name, len(rankings_data)
+        )
         
-        # Obtener jueces asignados
-        judges = CompetitionJudge.objects.filter(
-            competition=competition
-        ).values_list('judge_id', flat=True)
+        with ranking_span(competition.id, 'persist', participants=len(rankings_data)):
+            # Posiciones anteriores para animar los cambios de posición
+            previous_positions = dict(
+                Ranking.objects.filter(competition=competition).values_list('participant_id', 'position')
+            )
+            for ranking_data in rankings_data:
+                ranking_data['previous_position'] = previous_positions.get(ranking_data['participant_id'])
+            
+            # Participantes que ya no tienen calificaciones salen del ranking
+            unscored = set(previous_positions) - {ranking_data['participant_id'] for ranking_data in rankings_data}
+            if unscored:
+                Ranking.objects.filter(
+                    competition=competition, participant_id__in=unscored, participant__is_withdrawn=False
+                ).delete()
+            
+            save_rankings(competition.id, rankings_data)
         
-        print(f"Jueces asignados a la competencia: {len(judges)}")
+        # Encolar sincronización con Firebase y notificación WebSocket
+        from .tasks import enqueue_ranking_sync
+        with ranking_span(competition.id, 'sync'):
+            enqueue_ranking_sync(competition.id)
         
-        rankings_data = []
+        return rankings_data
+    
+    except Exception as e:
+        logger.exception(f"Error al actualizar rankings: {e}")
+        raise
+
+
+def ranking_sort_key(percentage, order: int, participant_id: int) -> Tuple[Decimal, int, int]:
+    """
+    Clave de orden del ranking, común al recálculo completo y al incremental.
+    Compara el porcentaje tal como se guarda (2 decimales) y desempata por el
+    orden de salida y el ID del participante.
+
+    Args:
+        percentage: Porcentaje final del participante
+        order: Orden de salida del participante
+        participant_id: ID del participante
+
+    Returns:
+        Tuple: Clave para ordenar de mejor a peor
+    """
+    rounded = Decimal(str(percentage)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    return (-rounded, order, participant_id)
+
+
+def calculate_competition_rankings(competition_id: int) -> List[Dict[str, Any]]:
+    """
+    Calcula el ranking de todos los participantes activos con calificaciones
+    leyendo las sumas por (participante, juez) de JudgeParticipantAggregate.
+    Produce los mismos valores que calculate_final_ranking participante por participante.
+    
+    Args:
+        competition_id: ID de la competencia
+    
+    Returns:
+        List[Dict]: Rankings ordenados por porcentaje con su posición asignada
+    """
+    from competitions.models import Participant, CompetitionJudge
+    
+    with ranking_span(competition_id, 'load'):
+        participants = list(Participant.objects.filter(
+            competition_id=competition_id,
+            is_withdrawn=False
+        ).select_related('rider', 'horse', 'category'))
+        
+        judge_ids = list(
+            CompetitionJudge.objects.filter(
+                competition_id=competition_id
+            ).order_by('id').values_list('judge_id', flat=True)
+        )
         
-        # Para cada participante, calcular ranking combinando calificaciones de todos los jueces
+        # Suma y cantidad de resultados por participante y juez (tabla de agregados)
+        judge_totals = get_judge_totals(competition_id)
+    
+    with ranking_span(competition_id, 'compute', participants=len(participants)):
+        participant_totals = {}
+        for participant_id, totals in judge_totals.items():
+            participant_totals[participant_id] = (
+                sum((total for total, _ in totals.values()), Decimal('0')),
+                sum(count for _, count in totals.values())
+            )
+        
+        rankings_data = []
         for participant in participants:
-            print(f"\nCalculando ranking para participante: {participant} (ID: {participant.id})")
-            
-            # Guardar posición anterior para determinar cambios de posición
-            try:
-                previous_ranking = Ranking.objects.get(
-                    competition=competition,
-                    participant=participant
-                )
-                previous_position = previous_ranking.position
-                print(f"Posición anterior: {previous_position}")
-            except Ranking.DoesNotExist:
-                previous_position = None
-                print("No hay ranking previo")
-            
-            # Verificar si hay calificaciones para este participante
-            score_count = Score.objects.filter(
-                competition_id=competition_id,
-                participant_id=participant.id
-            ).count()
-            print(f"Calificaciones encontradas: {score_count}")
-            
-            # Calcular ranking final
-            final_ranking = calculate_final_ranking(competition.id, participant.id)
-            
-            print(f"Ranking calculado: promedio={float(final_ranking['average'])}, porcentaje={float(final_ranking['percentage'])}%")
-            
-            # Añadir datos adicionales
+            # Sin calificaciones no hay ranking (ver update_participant_rankings)
+            if not participant_totals.get(participant.id, (0, 0))[1]:
+                continue
+            final_ranking = combine_judge_totals(
+                judge_ids,
+                judge_totals.get(participant.id, {}),
+                participant.id,
+                participant_totals=participant_totals.get(participant.id)
+            )
             final_ranking['participant'] = participant
-            final_ranking['previous_position'] = previous_position
-            
             rankings_data.append(final_ranking)
         
         # Ordenar por porcentaje y asignar posiciones
-        rankings_data.sort(key=lambda x: x['percentage'], reverse=True)
-        
-        print("\nRankings ordenados por porcentaje:")
-        for i, rank in enumerate(rankings_data):
-            print(f"Posición {i+1}: {rank['participant']} - {float(rank['percentage'])}%")
-        
-        # Actualizar posiciones en la base de datos
+        rankings_data.sort(key=lambda x: ranking_sort_key(
+            x['percentage'], x['participant'].order, x['participant_id']
+        ))
         for position, ranking_data in enumerate(rankings_data, 1):
-            participant = ranking_data['participant']
-            percentage = ranking_data.get('percentage', Decimal('0.00'))
-            average = ranking_data.get('average', Decimal('0.00'))
-            
-            print(f"\nGuardando ranking: Participante={participant}, Promedio={float(average)}, Porcentaje={float(percentage)}%")
-            
-            # Verifica que percentage no sea cero si hay calificaciones
-            if float(percentage) == 0:
-                has_scores = Score.objects.filter(
-                    competition_id=competition_id,
-                    participant=participant
-                ).exists()
-                if has_scores:
-                    print(f"ADVERTENCIA: Porcentaje es 0 aunque hay calificaciones para {participant}")
-                    # Recalcular en el momento
-                    scores = Score.objects.filter(
-                        competition_id=competition_id,
-                        participant=participant
-                    )
-                    results = [float(s.calculated_result) for s in scores]
-                    if results:
-                        avg = sum(results) / len(results)
-                        new_percentage = (avg / 10) * 100
-                        percentage = Decimal(str(new_percentage))
-                        print(f"Porcentaje recalculado: {float(percentage)}%")
-            
-            Ranking.objects.update_or_create(
-                competition=competition,
-                participant=participant,
-                defaults={
-                    'average_score': average,
-                    'percentage': percentage,
-                    'position': position
-                }
-            )
-            
-            # Verifica después de guardar
-            saved_ranking = Ranking.objects.get(competition=competition, participant=participant)
-            print(f"Ranking guardado: {saved_ranking}, Porcentaje guardado: {float(saved_ranking.percentage)}%")
-            
-            # Actualizar posición en el diccionario
             ranking_data['position'] = position
-        
-        # Sincronizar con Firebase si está disponible
-        try:
-            from .firebase import sync_rankings
-            sync_success = sync_rankings(competition_id, rankings_data)
-            print(f"Sincronización con Firebase: {'Exitosa' if sync_success else 'Fallida'}")
-        except ImportError:
-            print("Módulo Firebase no disponible. No se sincronizarán los rankings.")
-        except Exception as e:
-            logger.error(f"Error al sincronizar rankings con Firebase: {e}")
-            print(f"Error en sincronización Firebase: {str(e)}")
-        
-        return rankings_data
     
-    except Exception as e:
-        logger.error(f"Error al actualizar rankings: {e}")
-        import traceback
-        traceback.print_exc()
-        print(f"ERROR en update_participant_rankings: {str(e)}")
-        raise
+    return rankings_data
+
+
+def combine_judge_totals(judge_ids: List[int], judge_totals: Dict[int, Tuple[Any, int]],
+                         participant_id: int,
+                         participant_totals: Optional[Tuple[Any, int]] = None) -> Dict[str, Any]:
+    """
+    Combina sumas y conteos por juez en el ranking final de un participante.
+    Reproduce la misma aritmética que calculate_judge_ranking y calculate_final_ranking,
+    de modo que ambos caminos producen exactamente los mismos valores.
+
+    Args:
+        judge_ids: IDs de los jueces asignados a la competencia (ordenados por asignación)
+        judge_totals: Diccionario {judge_id: (suma de calculated_result, cantidad)}
+        participant_id: ID del participante
+        participant_totals: Suma y cantidad de todas sus calificaciones (opcional, para
+            el caso en que ningún juez asignado lo haya calificado)
+
+    Returns:
+        Dict: Ranking final del participante
+    """
+    judge_rankings = []
+    for judge_id in judge_ids:
+        total, count = judge_totals.get(judge_id, (0, 0))
+
+        if not count:
+            judge_rankings.append({
+                'judge_id': judge_id,
+                'average': Decimal('0.00'),
+                'percentage': Decimal('0.00'),
+                'scores_count': 0,
+                'total': Decimal('0')
+            })
+            continue
+
+        average = Decimal(str(float(total) / count))
+        judge_rankings.append({
+            'judge_id': judge_id,
+            'average': average,
+            'percentage': (average / Decimal('10')) * Decimal('100'),
+            'scores_count': count,
+            'total': total
+        })
+
+    if not judge_rankings:
+        avg_percentage = Decimal('0.00')
+        final_average = Decimal('0.00')
+    else:
+        total_percentage = sum(float(jr['percentage']) for jr in judge_rankings)
+        avg_percentage = Decimal(str(total_percentage / len(judge_rankings)))
+        final_average = (avg_percentage / Decimal('100')) * Decimal('10')
+
+    # Mismo respaldo que update_participant_rankings: si ningún juez asignado
+    # calificó pero existen calificaciones, usar el promedio de todas ellas
+    if float(avg_percentage) == 0 and participant_totals and participant_totals[1]:
+        total, count = participant_totals
+        avg = float(total) / count
+        avg_percentage = Decimal(str((avg / 10) * 100))
+
+    return {
+        'participant_id': participant_id,
+        'average': final_average,
+        'percentage': avg_percentage,
+        'judge_count': len(judge_rankings),
+        'judge_rankings': judge_rankings
+    }
+
+
+def save_rankings(competition_id: int, rankings_data: List[Dict[str, Any]],
+                  update_fields: Tuple[str, ...] = ('average_score', 'percentage', 'position')) -> int:
+    """
+    Guarda los rankings de una competencia con un único upsert por lotes
+    (INSERT ... ON CONFLICT (competition, participant) DO UPDATE).
+
+    Args:
+        competition_id: ID de la competencia
+        rankings_data: Rankings calculados (participant_id, average, percentage y position)
+        update_fields: Campos que se sobrescriben cuando la fila ya existe
+
+    Returns:
+        int: Número de rankings guardados
+    """
+    from .models import Ranking
+
+    rankings = [
+        Ranking(
+            competition_id=competition_id,
+            participant_id=ranking_data['participant_id'],
+            average_score=ranking_data['average'],
+            percentage=ranking_data['percentage'],
+            position=ranking_data.get('position') or 0
+        )
+        for ranking_data in rankings_data
+    ]
+    if not rankings:
+        return 0
+
+    Ranking.objects.bulk_create(
+        rankings,
+        update_conflicts=True,
+        unique_fields=['competition', 'participant'],
+        update_fields=list(update_fields) + ['updated_at']
+    )
+
+    # Nueva versión del ranking en caché al confirmar
+    from .snapshots import invalidate_ranking_snapshot
+    invalidate_ranking_snapshot(competition_id)
+
+    return len(rankings)
+
+
+def update_ranking_positions(competition_id: int) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """
+    Reordena en memoria los rankings de una competencia y guarda con una sola
+    actualización por lotes las posiciones que cambiaron.
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        Tuple: Posiciones nuevas y anteriores {participant_id: posición}
+    """
+    from .models import Ranking
+
+    rows = list(
+        Ranking.objects.filter(
+            competition_id=competition_id,
+            participant__is_withdrawn=False
+        ).only('id', 'participant_id', 'percentage', 'position', 'participant__order')
+        .select_related('participant')
+    )
+    rows.sort(key=lambda r: ranking_sort_key(r.percentage, r.participant.order, r.participant_id))
+
+    changed = []
+    positions = {}
+    previous_positions = {}
+    for position, ranking in enumerate(rows, 1):
+        positions[ranking.participant_id] = position
+        previous_positions[ranking.participant_id] = ranking.position
+        if ranking.position != position:
+            ranking.position = position
+            changed.append(ranking)
+
+    if changed:
+        Ranking.objects.bulk_update(changed, ['position'], batch_size=len(changed))
+
+        from .snapshots import invalidate_ranking_snapshot
+        invalidate_ranking_snapshot(competition_id)
+
+    return positions, previous_positions
+
+
+@transaction.atomic
+def update_participant_ranking(competition_id: int, participant_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Actualiza de forma incremental el ranking de un solo participante tras un cambio
+    en sus calificaciones y reordena las posiciones de la competencia en memoria.
+
+    Solo se leen los agregados por juez del participante afectado; el resto de
+    participantes conserva su ranking guardado.
+    Para reparar una competencia completa usar update_participant_rankings.
+
+    Args:
+        competition_id: ID de la competencia
+        participant_id: ID del participante cuya calificación cambió
+
+    Returns:
+        Dict: Ranking actualizado del participante, o None si está retirado o
+        ya no tiene calificaciones (su ranking se elimina)
+    """
+    from competitions.models import Participant, CompetitionJudge
+
+    with ranking_span(competition_id, 'load', participant_id=participant_id):
+        participant = Participant.objects.select_related(
+            'rider', 'horse', 'category'
+        ).get(id=participant_id, competition_id=competition_id)
+
+        if participant.is_withdrawn:
+            return None
+
+        judge_ids = list(
+            CompetitionJudge.objects.filter(
+                competition_id=competition_id
+            ).order_by('id').values_list('judge_id', flat=True)
+        )
+
+        judge_totals = get_judge_totals(competition_id, participant_id).get(participant_id, {})
+        participant_total = sum((total for total, _ in judge_totals.values()), Decimal('0'))
+        participant_count = sum(count for _, count in judge_totals.values())
+
+    from .models import Ranking
+    from .snapshots import invalidate_ranking_snapshot
+    from .tasks import enqueue_ranking_sync
+
+    if not participant_count:
+        # Se eliminó su última calificación: sale del ranking y se reordena el resto
+        with ranking_span(competition_id, 'persist', participant_id=participant_id):
+            if Ranking.objects.filter(competition_id=competition_id, participant_id=participant_id).delete()[0]:
+                invalidate_ranking_snapshot(competition_id)
+                update_ranking_positions(competition_id)
+        with ranking_span(competition_id, 'sync'):
+            enqueue_ranking_sync(competition_id)
+        return None
+
+    with ranking_span(competition_id, 'compute', participant_id=participant_id):
+        final_ranking = combine_judge_totals(
+            judge_ids, judge_totals, participant_id,
+            participant_totals=(participant_total, participant_count)
+        )
+
+    with ranking_span(competition_id, 'persist', participant_id=participant_id):
+        # Las filas nuevas entran con posición 0 hasta reordenar
+        save_rankings(competition_id, [final_ranking], update_fields=('average_score', 'percentage'))
+
+        # Reordenar con los porcentajes ya guardados (redondeados a 2 decimales)
+        positions, previous_positions = update_ranking_positions(competition_id)
+        previous_position = previous_positions.get(participant_id) or None
+
+    final_ranking['participant'] = participant
+    final_ranking['previous_position'] = previous_position
+    final_ranking['position'] = positions.get(participant_id, 0)
+
+    # Encolar sincronización con Firebase y notificación WebSocket
+    with ranking_span(competition_id, 'sync'):
+        enqueue_ranking_sync(competition_id)
+
+    return final_ranking
+
 
 def calculate_judge_scoring_statistics(judge_id: int, competition_id: int = None) -> dict:
     """
@@ -497,41 +726,43 @@ def compare_judge_scores(competition_id: int, participant_id: int) -> dict:
         competition_id=competition_id
     ).select_related('parameter').order_by('order')
     
-    # Obtener calificaciones para cada juez
+    # Calificaciones del participante en una sola consulta
     judge_scores = {}
-    for judge in judges:
-        scores = Score.objects.filter(
-            competition_id=competition_id,
-            participant_id=participant_id,
-            judge=judge.judge
-        ).select_related('parameter', 'parameter__parameter')
-        
-        judge_scores[judge.judge.id] = {
-            'judge_id': judge.judge.id,
-            'judge_name': f"{judge.judge.first_name} {judge.judge.last_name}",
-            'is_head_judge': judge.is_head_judge,
-            'scores': {score.parameter.parameter_id: float(score.value) for score in scores}
-        }
+    for judge_id, parameter_id, value in Score.objects.filter(
+        competition_id=competition_id,
+        participant_id=participant_id
+    ).values_list('judge_id', 'parameter__parameter_id', 'value'):
+        judge_scores.setdefault(judge_id, {})[parameter_id] = float(value)
     
-    # Calcular promedio por parámetro
-    param_averages = {}
-    for param in parameters:
-        scores = Score.objects.filter(
+    # Promedio por parámetro
+    param_averages = {
+        row['parameter__parameter_id']: float(row['avg']) if row['avg'] else 0
+        for row in Score.objects.filter(
             competition_id=competition_id,
-            participant_id=participant_id,
-            parameter=param
-        ).aggregate(avg=Avg('value'))
-        
-        param_averages[param.parameter.id] = float(scores['avg']) if scores['avg'] else 0
+            participant_id=participant_id
+        ).values('parameter__parameter_id').annotate(avg=Avg('value')).order_by()
+    }
+    
+    # Suma, cantidad y promedio de resultados por juez (tabla de agregados)
+    from .processors import fei_processor, to_tenths
+    judge_totals = get_judge_totals(competition_id, participant_id).get(participant_id, {})
+    judge_averages = fei_processor.calculate_totals_batch({
+        judge_id: (to_tenths(total), count) for judge_id, (total, count) in judge_totals.items()
+    })
     
     # Preparar datos de respuesta
     judges_data = []
     for judge in judges:
+        total, count = judge_totals.get(judge.judge_id, (Decimal('0'), 0))
+        average = judge_averages.get(judge.judge_id, {}).get('average', Decimal('0'))
         judges_data.append({
             'id': judge.judge.id,
             'name': f"{judge.judge.first_name} {judge.judge.last_name}",
             'is_head_judge': judge.is_head_judge,
-            'scores': judge_scores.get(judge.judge.id, {}).get('scores', {})
+            'scores': judge_scores.get(judge.judge_id, {}),
+            'total': float(total),
+            'scores_count': count,
+            'average': float(average)
         })
     
     parameters_data = []
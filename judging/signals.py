@@ -2,19 +2,28 @@
 Señales para actualización automática de calificaciones y rankings.
 Este módulo asegura que los cálculos FEI y los rankings se actualicen automáticamente.
 """
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
 from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.core.exceptions import ObjectDoesNotExist
 import logging
 
-from .models import Score, Ranking, FirebaseSync
+from competitions.models import Category, Competition, Horse, Participant, Rider
+from .aggregates import apply_score_delta
+from .final_results import freeze_competition_results, get_final_results, unfreeze_competition_results
+from .models import Score, CompetitionParameter, EvaluationParameter
+from .parameters import invalidate_competition_parameters, invalidate_parameter_competitions
+from .pipeline import competition_deleting, score_changed
+from .snapshots import invalidate_participant_competitions, invalidate_ranking_snapshot
 
 logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=Score)
 def update_ranking_on_score_change(sender, instance, created, **kwargs):
     """
-    Actualiza el ranking cuando se guarda una calificación.
+    Registra el cambio cuando se guarda una calificación.
+    El recálculo de rankings y la sincronización se despachan una sola vez
+    al confirmarse la transacción (ver pipeline.score_changed).
     
     Args:
         sender: Modelo que envía la señal
@@ -22,60 +31,26 @@ def update_ranking_on_score_change(sender, instance, created, **kwargs):
         created: Si la instancia fue creada o actualizada
     """
     try:
-        # Evitar recursión infinita si estamos dentro de otra transacción
-        if hasattr(transaction, 'get_autocommit') and not transaction.get_autocommit():
-            return
-        
-        # Obtener IDs necesarios
-        competition_id = instance.competition_id
-        participant_id = instance.participant_id
-        
-        # Actualizar ranking para este participante
-        with transaction.atomic():
-            # Calcular ranking del participante
-            Ranking.calculate_for_participant(competition_id, participant_id)
-            
-            # Actualizar posiciones de todos los participantes
-            Ranking.update_positions(competition_id)
-            
-            # Marcar para sincronización con Firebase
-            FirebaseSync.objects.update_or_create(
-                competition_id=competition_id,
-                defaults={'is_synced': False}
-            )
-        
-        # Intentar sincronizar con Firebase
-        try:
-            from .firebase import sync_participant_scores, sync_rankings
-            
-            # Sincronizar la calificación específica
-            sync_participant_scores(competition_id, participant_id, instance.judge_id)
-            
-            # Sincronizar rankings
-            sync_rankings(competition_id)
-            
-            # Marcar como sincronizado
-            FirebaseSync.objects.update_or_create(
-                competition_id=competition_id,
-                defaults={'is_synced': True, 'error_message': None}
-            )
-        except Exception as e:
-            logger.error(f"Error al sincronizar con Firebase: {e}")
-            
-            # Registrar error pero no propagarlo
-            FirebaseSync.objects.update_or_create(
-                competition_id=competition_id,
-                defaults={'is_synced': False, 'error_message': str(e)}
-            )
-            
-        # Notificar a clientes WebSocket
-        try:
-            from .consumers import notify_rankings_update
-            notify_rankings_update(competition_id)
-        except Exception as e:
-            logger.error(f"Error al notificar rankings via WebSocket: {e}")
+        score_changed(
+            instance.competition_id, instance.participant_id, instance.judge_id,
+            score_id=instance.id
+        )
     except Exception as e:
-        logger.error(f"Error al actualizar ranking después de guardar calificación: {e}")
+        logger.error(f"Error al registrar cambio después de guardar calificación: {e}")
+
+
+@receiver(post_delete, sender=Score)
+def update_aggregates_on_score_delete(sender, instance, **kwargs):
+    """
+    Descuenta la calificación eliminada del agregado del juez (en la misma transacción).
+    
+    Args:
+        sender: Modelo que envía la señal
+        instance: Instancia del modelo eliminada
+    """
+    state = getattr(instance, '_aggregate_state', None) or instance.get_aggregate_state()
+    if state is not None:
+        apply_score_delta(*state[0], -state[1], -1)
 
 
 @receiver(post_delete, sender=Score)
@@ -88,72 +63,142 @@ def update_ranking_on_score_delete(sender, instance, **kwargs):
         instance: Instancia del modelo eliminada
     """
     try:
-        # Evitar recursión infinita si estamos dentro de otra transacción
-        if hasattr(transaction, 'get_autocommit') and not transaction.get_autocommit():
-            return
-        
-        # Obtener IDs necesarios
         competition_id = instance.competition_id
         participant_id = instance.participant_id
         
-        # Actualizar ranking para este participante
-        with transaction.atomic():
-            # Verificar si todavía hay calificaciones para este participante
-            has_scores = Score.objects.filter(
-                competition_id=competition_id,
-                participant_id=participant_id
-            ).exists()
-            
-            if has_scores:
-                # Calcular ranking del participante
-                Ranking.calculate_for_participant(competition_id, participant_id)
-            else:
-                # No hay más calificaciones, eliminar ranking
-                Ranking.objects.filter(
-                    competition_id=competition_id,
-                    participant_id=participant_id
-                ).delete()
-            
-            # Actualizar posiciones de todos los participantes
-            Ranking.update_positions(competition_id)
-            
-            # Marcar para sincronización con Firebase
-            FirebaseSync.objects.update_or_create(
-                competition_id=competition_id,
-                defaults={'is_synced': False}
-            )
-        
-        # Intentar sincronizar con Firebase
-        try:
-            from .firebase import sync_rankings, delete_competition_data
-            
-            # Sincronizar rankings
-            sync_rankings(competition_id)
-            
-            # Marcar como sincronizado
-            FirebaseSync.objects.update_or_create(
-                competition_id=competition_id,
-                defaults={'is_synced': True, 'error_message': None}
-            )
-        except Exception as e:
-            logger.error(f"Error al sincronizar con Firebase después de eliminar calificación: {e}")
-            
-            # Registrar error pero no propagarlo
-            FirebaseSync.objects.update_or_create(
-                competition_id=competition_id,
-                defaults={'is_synced': False, 'error_message': str(e)}
-            )
-            
-        # Notificar a clientes WebSocket
+        # Nodo de Firebase a borrar (el parámetro puede haberse eliminado en cascada)
         try:
-            from .consumers import notify_rankings_update
-            notify_rankings_update(competition_id)
-        except Exception as e:
-            logger.error(f"Error al notificar rankings via WebSocket: {e}")
+            deleted_node = f"{participant_id}/{instance.judge_id}/{instance.parameter.parameter_id}"
+        except ObjectDoesNotExist:
+            deleted_node = None
+        
+        # Recálculo completo para reordenar las posiciones; si era su última
+        # calificación el participante sale del ranking (ver update_participant_rankings)
+        score_changed(competition_id, deleted_node=deleted_node)
     except Exception as e:
         logger.error(f"Error al actualizar ranking después de eliminar calificación: {e}")
 
 
+@receiver(post_save, sender=Participant)
+def invalidate_rankings_on_participant_change(sender, instance, **kwargs):
+    """
+    Invalida el ranking en caché cuando cambian los datos de un participante
+    (dorsal, orden, retiro).
+    
+    Args:
+        sender: Modelo que envía la señal
+        instance: Participante guardado
+    """
+    invalidate_ranking_snapshot(instance.competition_id)
+
+
+@receiver(post_save, sender=Rider)
+def invalidate_rankings_on_rider_change(sender, instance, created, **kwargs):
+    """
+    Invalida el ranking en caché de las competencias del jinete (nombre, nacionalidad).
+    
+    Args:
+        sender: Modelo que envía la señal
+        instance: Jinete guardado
+        created: Si el jinete fue creado
+    """
+    if not created:
+        invalidate_participant_competitions(rider_id=instance.id)
+
+
+@receiver(post_save, sender=Horse)
+def invalidate_rankings_on_horse_change(sender, instance, created, **kwargs):
+    """
+    Invalida el ranking en caché de las competencias del caballo.
+    
+    Args:
+        sender: Modelo que envía la señal
+        instance: Caballo guardado
+        created: Si el caballo fue creado
+    """
+    if not created:
+        invalidate_participant_competitions(horse_id=instance.id)
+
+
+@receiver(post_save, sender=Category)
+def invalidate_rankings_on_category_change(sender, instance, created, **kwargs):
+    """
+    Invalida el ranking en caché de las competencias con participantes de la categoría.
+    
+    Args:
+        sender: Modelo que envía la señal
+        instance: Categoría guardada
+        created: Si la categoría fue creada
+    """
+    if not created:
+        invalidate_participant_competitions(category_id=instance.id)
+
+
+@receiver(pre_delete, sender=Competition)
+def mark_competition_deleting(sender, instance, **kwargs):
+    """
+    Marca la competencia antes del borrado en cascada de sus calificaciones,
+    para que no encolen tareas de sincronización ni recálculos.
+    
+    Args:
+        sender: Modelo que envía la señal
+        instance: Competencia que se va a eliminar
+    """
+    competition_deleting(instance.id)
+
+
+def _freeze_completed_competition(competition_id):
+    """Congela los resultados tras confirmarse la transacción que finalizó la competencia"""
+    try:
+        freeze_competition_results(competition_id)
+    except Exception as e:
+        logger.error(f"Error al congelar resultados de competencia {competition_id}: {e}")
+
+
+@receiver(post_save, sender=Competition)
+def freeze_results_on_completion(sender, instance, **kwargs):
+    """
+    Congela los resultados al finalizar una competencia y los descarta si
+    la competencia deja de estar finalizada.
+    
+    Args:
+        sender: Modelo que envía la señal
+        instance: Competencia guardada
+    """
+    if instance.is_completed:
+        competition_id = instance.id
+        transaction.on_commit(lambda: _freeze_completed_competition(competition_id))
+    elif get_final_results(instance.id) is not None:
+        unfreeze_competition_results(instance.id)
+
+
+@receiver(post_save, sender=CompetitionParameter)
+@receiver(post_delete, sender=CompetitionParameter)
+def invalidate_parameters_on_change(sender, instance, **kwargs):
+    """
+    Invalida la lista de parámetros en caché de la competencia.
+    
+    Args:
+        sender: Modelo que envía la señal
+        instance: Parámetro de competencia guardado o eliminado
+    """
+    invalidate_competition_parameters(instance.competition_id)
+
+
+@receiver(post_save, sender=EvaluationParameter)
+def invalidate_parameters_on_definition_change(sender, instance, created, **kwargs):
+    """
+    Invalida la lista de parámetros de las competencias que usan el parámetro.
+    
+    Args:
+        sender: Modelo que envía la señal
+        instance: Parámetro de evaluación guardado
+        created: Si el parámetro fue creado
+    """
+    if not created:
+        invalidate_parameter_competitions(instance.id)
+
+
 def connect_signals():
     """
     Conecta todas las señales. Llamar desde apps.py ready().
@@ -0,0 +1,325 @@
+"""
+Caché versionada del ranking de cada competencia.
+El ranking se construye una vez por versión, se guarda serializado (bytes) en la
+caché de Django y lo reutilizan la API REST, los WebSockets y Firebase.
+La versión cambia cada vez que se recalculan los rankings.
+"""
+import hashlib
+import json
+import time
+import logging
+from typing import Any, Dict, List, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Formatos disponibles: 'live' para WebSocket/Firebase, 'api' para la API REST
+SNAPSHOT_FORMATS = ('live', 'api')
+
+# Tiempo de vida de cada versión en caché (segundos)
+SNAPSHOT_TIMEOUT = 60 * 60
+
+def _version_key(competition_id: int) -> str:
+    return f'rankings:{competition_id}:version'
+
+
+def _snapshot_key(competition_id: int, version: int, fmt: str) -> str:
+    return f'rankings:{competition_id}:v{version}:{fmt}'
+
+
+def _broadcast_key(competition_id: int) -> str:
+    return f'rankings:{competition_id}:broadcast'
+
+
+def get_ranking_version(competition_id: int) -> int:
+    """
+    Devuelve la versión actual del ranking de una competencia.
+    Si la caché perdió el contador se crea uno nuevo a partir del reloj, de modo
+    que nunca se reutilice una versión antigua que siga en caché.
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        int: Versión del ranking
+    """
+    version = cache.get(_version_key(competition_id))
+    if version is None:
+        cache.add(_version_key(competition_id), int(time.time() * 1000), None)
+        version = cache.get(_version_key(competition_id))
+    return version
+
+
+def bump_ranking_version(competition_id: int) -> int:
+    """
+    Invalida el ranking en caché pasando a una nueva versión.
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        int: Nueva versión
+    """
+    try:
+        return cache.incr(_version_key(competition_id))
+    except ValueError:
+        # El contador no existe: crear uno nuevo
+        return get_ranking_version(competition_id)
+
+
+def invalidate_ranking_snapshot(competition_id: int):
+    """
+    Invalida el ranking en caché cuando se confirme la transacción actual,
+    para que nadie guarde datos sin confirmar bajo la nueva versión.
+
+    Args:
+        competition_id: ID de la competencia
+    """
+    transaction.on_commit(lambda: bump_ranking_version(competition_id))
+
+
+def invalidate_participant_competitions(**filters):
+    """
+    Invalida el ranking en caché de todas las competencias con participantes
+    que cumplen el filtro (p. ej. rider_id=...), cuyos nombres muestra el ranking.
+
+    Args:
+        **filters: Filtro sobre Participant
+    """
+    from competitions.models import Participant
+
+    competition_ids = Participant.objects.filter(**filters).values_list(
+        'competition_id', flat=True
+    ).distinct()
+
+    for competition_id in competition_ids:
+        invalidate_ranking_snapshot(competition_id)
+
+
+def _build_live_rankings(rankings) -> List[Dict[str, Any]]:
+    """Formato usado por WebSocket y Firebase"""
+    result = []
+    for ranking in rankings:
+        participant = ranking.participant
+        rider = participant.rider
+        horse = participant.horse
+        category = participant.category
+
+        result.append({
+            'id': ranking.id,
+            'participant_id': participant.id,
+            'position': ranking.position,
+            'average': float(ranking.average_score),
+            'percentage': float(ranking.percentage),
+            'rider': {
+                'id': rider.id,
+                'first_name': rider.first_name,
+                'last_name': rider.last_name,
+                'name': f"{rider.first_name} {rider.last_name}",
+                'nationality': rider.nationality or ''
+            },
+            'horse': {
+                'id': horse.id,
+                'name': horse.name,
+                'breed': horse.breed or '',
+                'color': horse.color or ''
+            },
+            'category': {
+                'id': category.id,
+                'name': category.name,
+                'code': category.code
+            } if category else None,
+            'number': participant.number,
+            'order': participant.order,
+            'withdrawn': participant.is_withdrawn
+        })
+    return result
+
+
+def _build_api_rankings(rankings) -> List[Dict[str, Any]]:
+    """Formato de la API REST (RankingSerializer)"""
+    from rest_framework.utils.encoders import JSONEncoder
+    from .serializers import RankingSerializer
+
+    data = RankingSerializer(rankings, many=True).data
+    # Normalizar fechas y decimales a tipos JSON
+    return json.loads(json.dumps(data, cls=JSONEncoder))
+
+
+def build_ranking_snapshot(competition_id: int, fmt: str = 'live') -> List[Dict[str, Any]]:
+    """
+    Construye el ranking de una competencia desde la base de datos.
+
+    Args:
+        competition_id: ID de la competencia
+        fmt: Formato ('live' o 'api')
+
+    Returns:
+        List[Dict]: Rankings ordenados por posición
+    """
+    from .models import Ranking
+
+    rankings = Ranking.objects.filter(
+        competition_id=competition_id
+    ).select_related(
+        'participant', 'participant__rider', 'participant__horse', 'participant__category'
+    ).order_by('position')
+
+    if fmt == 'api':
+        return _build_api_rankings(rankings)
+    return _build_live_rankings(rankings)
+
+
+def get_ranking_snapshot_bytes(competition_id: int, fmt: str = 'live') -> Tuple[int, bytes]:
+    """
+    Devuelve el ranking serializado de la versión actual, construyéndolo si no está en caché.
+
+    Args:
+        competition_id: ID de la competencia
+        fmt: Formato ('live' o 'api')
+
+    Returns:
+        Tuple[int, bytes]: Versión y JSON {"version", "competition_id", "rankings"}
+    """
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Formato de ranking desconocido: {fmt}")
+
+    # Los consumidores WebSocket reciben el ID de la URL como texto
+    competition_id = int(competition_id)
+
+    version = get_ranking_version(competition_id)
+    key = _snapshot_key(competition_id, version, fmt)
+
+    payload = cache.get(key)
+    if payload is None:
+        rankings = build_ranking_snapshot(competition_id, fmt)
+        payload = json.dumps({
+            'version': version,
+            'competition_id': competition_id,
+            'rankings': rankings
+        }).encode('utf-8')
+        cache.set(key, payload, SNAPSHOT_TIMEOUT)
+        logger.debug("Ranking %s de la competencia %s construido (versión %s)", fmt, competition_id, version)
+
+    return version, payload
+
+
+def get_ranking_snapshot(competition_id: int, fmt: str = 'live') -> Dict[str, Any]:
+    """
+    Devuelve el ranking de la versión actual ya decodificado.
+
+    Args:
+        competition_id: ID de la competencia
+        fmt: Formato ('live' o 'api')
+
+    Returns:
+        Dict: {'version', 'competition_id', 'rankings'}
+    """
+    _, payload = get_ranking_snapshot_bytes(competition_id, fmt)
+    return json.loads(payload)
+
+
+def get_ranking_frame(competition_id: int, message_type: str = 'rankings_update') -> str:
+    """
+    Devuelve el mensaje WebSocket del ranking ya codificado, una vez por versión.
+    Los consumidores lo reenvían tal cual sin volver a serializarlo.
+
+    Args:
+        competition_id: ID de la competencia
+        message_type: Tipo de mensaje ('rankings_update' o 'current_rankings')
+
+    Returns:
+        str: Mensaje JSON {"type", "version", "competition_id", "rankings"}
+    """
+    competition_id = int(competition_id)
+    version, payload = get_ranking_snapshot_bytes(competition_id)
+    key = f'{_snapshot_key(competition_id, version, "live")}:frame:{message_type}'
+
+    frame = cache.get(key)
+    if frame is None:
+        frame = json.dumps({'type': message_type, **json.loads(payload)})
+        cache.set(key, frame, SNAPSHOT_TIMEOUT)
+
+    return frame
+
+
+def row_fingerprint(row: Dict[str, Any]) -> str:
+    """
+    Huella de una fila completa del ranking: cualquier cambio (posición,
+    puntaje, nombres, categoría, dorsal o retiro) la incluye en el delta.
+    """
+    encoded = json.dumps(row, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def build_ranking_delta(previous: Dict[str, str], rankings: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Compara el ranking con el último difundido.
+
+    Args:
+        previous: Último ranking difundido {participant_id: huella de la fila}
+        rankings: Ranking actual (formato 'live')
+
+    Returns:
+        Tuple: Filas nuevas o modificadas y IDs de participantes que ya no están
+    """
+    changed = []
+    current_ids = set()
+
+    for row in rankings:
+        participant_id = str(row['participant_id'])
+        current_ids.add(participant_id)
+        if previous.get(participant_id) != row_fingerprint(row):
+            changed.append(row)
+
+    removed = sorted(int(participant_id) for participant_id in previous if participant_id not in current_ids)
+    return changed, removed
+
+
+def get_ranking_broadcast_frame(competition_id: int) -> Tuple[int, str]:
+    """
+    Devuelve el mensaje a difundir para la versión actual del ranking.
+    Si los clientes ya recibieron una versión anterior se envía un mensaje
+    'rankings_delta' solo con las filas que cambiaron en cualquier campo (ver
+    row_fingerprint); los clientes que no tengan esa versión base piden el ranking completo.
+
+    Args:
+        competition_id: ID de la competencia
+
+    Returns:
+        Tuple[int, str]: Versión y mensaje 'rankings_delta' o 'rankings_update'
+        (completo) ya codificado
+    """
+    competition_id = int(competition_id)
+    version, payload = get_ranking_snapshot_bytes(competition_id)
+    rankings = json.loads(payload)['rankings']
+
+    last = cache.get(_broadcast_key(competition_id))
+    cache.set(_broadcast_key(competition_id), {
+        'version': version,
+        'rows': {
+            str(row['participant_id']): row_fingerprint(row)
+            for row in rankings
+        }
+    }, SNAPSHOT_TIMEOUT)
+
+    # Sin difusión previa (o de la misma versión): enviar el ranking completo
+    if last is None or last['version'] >= version:
+        return version, get_ranking_frame(competition_id)
+
+    changed, removed = build_ranking_delta(last['rows'], rankings)
+
+    # Si cambió la mayoría de filas el mensaje completo es igual de pequeño
+    if len(changed) + len(removed) > len(rankings) // 2:
+        return version, get_ranking_frame(competition_id)
+
+    return version, json.dumps({
+        'type': 'rankings_delta',
+        'version': version,
+        'base_version': last['version'],
+        'competition_id': competition_id,
+        'changed': changed,
+        'removed': removed
+    })
@@ -0,0 +1,226 @@
+"""
+Stream de rankings con Server-Sent Events (solo lectura) para espectadores.
+Usa el mismo grupo del channel layer que RankingConsumer (`rankings_{id}`) y
+reenvía los mensajes ya codificados (completos o delta). Cada evento lleva la
+versión del ranking como `id`, de modo que el navegador reanuda con
+`Last-Event-ID` tras una reconexión: si esa versión ya no es la actual, el
+stream empieza con el ranking completo.
+
+Un 'rankings_delta' cuyo `base_version` no es la versión que tiene el cliente
+indica un hueco (mensajes perdidos). El stream es de solo lectura y no puede
+pedir el ranking completo: el cliente debe cerrar el EventSource y reconectar
+(con ?last_event_id=<versión>), lo que le envía el ranking completo.
+
+Al ser una aplicación ASGI fuera de Django, las cabeceras CORS se calculan
+aquí con la misma configuración de django-cors-headers que usa la API.
+
+Cada espectador es una sola corrutina en espera: sin hilos ni consultas
+mientras no cambie el ranking.
+"""
+import asyncio
+import logging
+import re
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+# Milisegundos que el navegador espera antes de reconectar
+SSE_RETRY_MS = 3000
+
+
+def format_event(data: str, event_id=None) -> bytes:
+    """
+    Codifica un evento SSE.
+
+    Args:
+        data: Mensaje JSON (una sola línea)
+        event_id: Identificador del evento (versión del ranking)
+
+    Returns:
+        bytes: Evento listo para enviar
+    """
+    if event_id is None:
+        return f"data: {data}\n\n".encode('utf-8')
+    return f"id: {event_id}\ndata: {data}\n\n".encode('utf-8')
+
+
+def get_last_event_id(scope) -> Optional[str]:
+    """Versión recibida por el cliente (cabecera Last-Event-ID o ?last_event_id=)"""
+    last_event_id = get_header(scope, b'last-event-id')
+    if last_event_id is not None:
+        return last_event_id
+
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    if query.get('last_event_id'):
+        return query['last_event_id'][0]
+    return None
+
+
+def get_header(scope, name: bytes) -> Optional[str]:
+    """Valor de una cabecera de la petición ASGI"""
+    for header, value in scope.get('headers', []):
+        if header == name:
+            return value.decode('latin-1').strip()
+    return None
+
+
+def get_cors_headers(scope, preflight: bool = False) -> List[Tuple[bytes, bytes]]:
+    """
+    Cabeceras CORS para la petición según la configuración de django-cors-headers
+    (CORS_ALLOWED_ORIGINS, CORS_ALLOWED_ORIGIN_REGEXES, CORS_ALLOW_ALL_ORIGINS...).
+
+    Args:
+        scope: Scope ASGI de la petición
+        preflight: Si es True, agrega las cabeceras de respuesta a OPTIONS
+
+    Returns:
+        List: Cabeceras a agregar (vacía si el origen no está permitido)
+    """
+    from corsheaders.conf import conf
+
+    origin = get_header(scope, b'origin')
+    if not origin:
+        return []
+
+    allowed = (
+        conf.CORS_ALLOW_ALL_ORIGINS
+        or origin in conf.CORS_ALLOWED_ORIGINS
+        or any(re.match(regex, origin) for regex in conf.CORS_ALLOWED_ORIGIN_REGEXES)
+    )
+    if not allowed:
+        return []
+
+    if conf.CORS_ALLOW_ALL_ORIGINS and not conf.CORS_ALLOW_CREDENTIALS:
+        headers = [(b'access-control-allow-origin', b'*')]
+    else:
+        headers = [(b'access-control-allow-origin', origin.encode('latin-1')), (b'vary', b'origin')]
+    if conf.CORS_ALLOW_CREDENTIALS:
+        headers.append((b'access-control-allow-credentials', b'true'))
+
+    if preflight:
+        headers += [
+            (b'access-control-allow-methods', b'GET, OPTIONS'),
+            (b'access-control-allow-headers', ', '.join(
+                list(conf.CORS_ALLOW_HEADERS) + ['last-event-id']
+            ).encode('latin-1')),
+        ]
+        if conf.CORS_PREFLIGHT_MAX_AGE:
+            headers.append((b'access-control-max-age', str(conf.CORS_PREFLIGHT_MAX_AGE).encode('latin-1')))
+    return headers
+
+
+@database_sync_to_async
+def get_initial_event(competition_id: int, last_event_id: Optional[str]) -> Tuple[int, Optional[str]]:
+    """
+    Ranking inicial del stream: nada si el cliente ya tiene la versión actual,
+    el ranking completo en cualquier otro caso.
+    """
+    from .snapshots import get_ranking_frame, get_ranking_version
+
+    version = get_ranking_version(competition_id)
+    if last_event_id == str(version):
+        return version, None
+    return version, get_ranking_frame(competition_id, 'current_rankings')
+
+
+class RankingEventStream:
+    """
+    Aplicación ASGI que sirve `GET /sse/rankings/<competition_id>/`.
+
+    Eventos (campo data, JSON): current_rankings, rankings_update y
+    rankings_delta, con el mismo formato que RankingConsumer.
+    """
+
+    # Segundos entre comentarios de mantenimiento (evitan cortes de proxies)
+    keepalive = 15
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+
+        method = scope.get('method', 'GET')
+        if method == 'OPTIONS':
+            # Preflight CORS
+            await send({
+                'type': 'http.response.start', 'status': 200,
+                'headers': get_cors_headers(scope, preflight=True) + [(b'content-length', b'0')]
+            })
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        if method != 'GET':
+            await send({
+                'type': 'http.response.start', 'status': 405,
+                'headers': [(b'allow', b'GET, OPTIONS')] + get_cors_headers(scope)
+            })
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        competition_id = int(scope['url_route']['kwargs']['competition_id'])
+        group_name = f'rankings_{competition_id}'
+        channel_layer = get_channel_layer()
+        channel_name = await channel_layer.new_channel()
+        await channel_layer.group_add(group_name, channel_name)
+
+        try:
+            await self.stream(scope, receive, send, competition_id, channel_layer, channel_name)
+        finally:
+            await channel_layer.group_discard(group_name, channel_name)
+
+    async def stream(self, scope, receive, send, competition_id, channel_layer, channel_name):
+        """Envía el ranking inicial y reenvía los mensajes del grupo hasta que el cliente se desconecta"""
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ] + get_cors_headers(scope)
+        })
+
+        version, frame = await get_initial_event(competition_id, get_last_event_id(scope))
+        body = f"retry: {SSE_RETRY_MS}\n\n".encode('utf-8')
+        if frame is not None:
+            body += format_event(frame, version)
+        await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+        disconnect = asyncio.ensure_future(receive())
+        message = None
+        try:
+            while True:
+                if message is None:
+                    message = asyncio.ensure_future(channel_layer.receive(channel_name))
+
+                done, _ = await asyncio.wait(
+                    {disconnect, message},
+                    timeout=self.keepalive,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if disconnect in done:
+                    if disconnect.result().get('type') == 'http.disconnect':
+                        break
+                    disconnect = asyncio.ensure_future(receive())
+
+                if message in done:
+                    event = message.result()
+                    message = None
+                    if event.get('type') == 'rankings_update' and 'text' in event:
+                        chunk = format_event(event['text'], event.get('version'))
+                    else:
+                        continue
+                elif not done:
+                    chunk = b": keepalive\n\n"
+                else:
+                    continue
+
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            for task in (disconnect, message):
+                if task is not None and not task.done():
+                    task.cancel()
@@ -0,0 +1,376 @@
+"""
+Cola persistente (outbox) de sincronización con Firebase.
+Las escrituras de calificaciones solo encolan tareas; un worker
+(`python manage.py run_sync_worker`) las ejecuta con reintentos y espera exponencial.
+Las notificaciones WebSocket se envían desde el proceso web (ver enqueue_ranking_sync).
+"""
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Registro de funciones que ejecutan cada tipo de tarea
+TASK_HANDLERS: Dict[str, Callable] = {}
+
+
+class SyncTaskError(Exception):
+    """Error recuperable al ejecutar una tarea de sincronización"""
+    pass
+
+
+def task_handler(kind: str):
+    """
+    Decorador para registrar la función que ejecuta un tipo de tarea.
+
+    Args:
+        kind: Tipo de tarea (SyncTask.kind)
+    """
+    def decorator(func):
+        TASK_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+@task_handler('sync_score')
+def handle_sync_score(competition_id: int, score_id: int):
+    """Sube una calificación a Firebase"""
+    from .firebase import sync_scores
+
+    try:
+        sync_scores(score_id)
+    except ObjectDoesNotExist:
+        # La calificación se eliminó antes de sincronizarse: nada que subir
+        logger.info(f"Calificación {score_id} ya no existe, se omite la sincronización")
+
+
+@task_handler('sync_participant_scores')
+def handle_sync_participant_scores(competition_id: int, participant_id: int, judge_id: Optional[int] = None):
+    """Sube las calificaciones de un participante a Firebase"""
+    from .firebase import sync_participant_scores
+    sync_participant_scores(competition_id, participant_id, judge_id)
+
+
+@task_handler('sync_score_batch')
+def handle_sync_score_batch(competition_id: int, score_ids: List[int], deleted: Optional[List[str]] = None):
+    """Sube un lote de calificaciones a Firebase en una sola escritura"""
+    from .firebase import sync_score_batch
+    sync_score_batch(competition_id, score_ids=score_ids, deleted=deleted)
+
+
+@task_handler('sync_rankings')
+def handle_sync_rankings(competition_id: int):
+    """Sube los rankings de una competencia a Firebase"""
+    from .firebase import sync_rankings
+    from .tracing import ranking_span
+
+    with ranking_span(competition_id, 'sync'):
+        synced = sync_rankings(competition_id)
+    if not synced:
+        raise SyncTaskError(f"No se pudieron sincronizar los rankings de la competencia {competition_id}")
+
+
+@task_handler('recalculate_rankings')
+def handle_recalculate_rankings(competition_id: int):
+    """
+    Recalcula los rankings de una competencia cuyo recálculo en proceso no
+    llegó a ejecutarse (marca durable de scheduler.build_dirty_mark).
+    """
+    from .services import update_participant_rankings
+
+    logger.warning(f"Recuperando recálculo de rankings pendiente de la competencia {competition_id}")
+    update_participant_rankings(competition_id)
+
+
+def broadcast_rankings(competition_id: int):
+    """
+    Notifica los rankings de una competencia a los clientes WebSocket y SSE.
+    Se ejecuta en el proceso web: con InMemoryChannelLayer (desarrollo) solo
+    los clientes de este proceso reciben el mensaje.
+
+    Args:
+        competition_id: ID de la competencia
+    """
+    from .consumers import notify_rankings_update
+    from .tracing import ranking_span
+
+    with ranking_span(competition_id, 'broadcast'):
+        notify_rankings_update(competition_id)
+
+
+@task_handler('notify_rankings')
+def handle_notify_rankings(competition_id: int):
+    """
+    Notifica los rankings desde el worker. Ya no se encola (ver
+    enqueue_ranking_sync); se conserva para las tareas que queden en la cola.
+    """
+    broadcast_rankings(competition_id)
+
+
+def build_dedup_key(kind: str, competition_id: int, payload: Dict) -> str:
+    """Clave que identifica tareas equivalentes (mismo tipo, competencia y datos)"""
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+    return f"{kind}:{competition_id}:{digest}"
+
+
+def enqueue_sync_task(kind: str, competition_id: int, **payload):
+    """
+    Encola una tarea de sincronización.
+    Si ya hay una tarea equivalente pendiente no se crea otra: las tareas leen
+    el estado actual al ejecutarse, por lo que una sola basta.
+
+    Args:
+        kind: Tipo de tarea (SyncTask.kind)
+        competition_id: ID de la competencia
+        **payload: Argumentos para la función de la tarea
+
+    Returns:
+        SyncTask: Tarea creada o la pendiente equivalente
+    """
+    from .models import SyncTask
+
+    if kind not in TASK_HANDLERS:
+        raise ValueError(f"Tipo de tarea desconocido: {kind}")
+
+    dedup_key = build_dedup_key(kind, competition_id, payload)
+
+    existing = SyncTask.objects.filter(dedup_key=dedup_key, status='pending').first()
+    if existing:
+        return existing
+
+    return SyncTask.objects.create(
+        kind=kind,
+        competition_id=competition_id,
+        payload=payload,
+        dedup_key=dedup_key
+    )
+
+
+def enqueue_sync_tasks(tasks: List[Tuple[str, int, Dict]]) -> int:
+    """
+    Encola varias tareas comprobando duplicados y creándolas en bloque
+    (una consulta de lectura y, si hace falta, una inserción).
+
+    Args:
+        tasks: Lista de (tipo, ID de competencia, datos)
+
+    Returns:
+        int: Número de tareas creadas
+    """
+    from .models import SyncTask
+
+    new_tasks = {}
+    for kind, competition_id, payload in tasks:
+        if kind not in TASK_HANDLERS:
+            raise ValueError(f"Tipo de tarea desconocido: {kind}")
+        dedup_key = build_dedup_key(kind, competition_id, payload)
+        new_tasks.setdefault(dedup_key, SyncTask(
+            kind=kind,
+            competition_id=competition_id,
+            payload=payload,
+            dedup_key=dedup_key
+        ))
+
+    if not new_tasks:
+        return 0
+
+    pending = set(
+        SyncTask.objects.filter(
+            dedup_key__in=list(new_tasks), status='pending'
+        ).values_list('dedup_key', flat=True)
+    )
+
+    created = SyncTask.objects.bulk_create([
+        task for dedup_key, task in new_tasks.items()
+        if dedup_key not in pending
+    ])
+    return len(created)
+
+
+def enqueue_ranking_sync(competition_id: int):
+    """
+    Encola la sincronización de rankings con Firebase y programa la
+    notificación WebSocket en este proceso al confirmarse la transacción.
+    Solo la escritura en Firebase (red, reintentos) pasa por la cola: la
+    difusión por el channel layer es local y barata, y desde el worker no
+    llegaría a los clientes con InMemoryChannelLayer.
+
+    Args:
+        competition_id: ID de la competencia
+    """
+    enqueue_sync_task('sync_rankings', competition_id)
+    transaction.on_commit(lambda: broadcast_rankings(competition_id))
+
+
+def get_retry_delay(attempts: int) -> float:
+    """
+    Calcula la espera antes del siguiente intento (exponencial con límite).
+
+    Args:
+        attempts: Intentos realizados
+
+    Returns:
+        float: Segundos de espera
+    """
+    base = getattr(settings, 'SYNC_TASK_RETRY_BASE', 2)
+    maximum = getattr(settings, 'SYNC_TASK_RETRY_MAX', 300)
+    return min(base * (2 ** max(attempts - 1, 0)), maximum)
+
+
+def requeue_stale_tasks() -> int:
+    """
+    Devuelve a la cola las tareas "en proceso" abandonadas por un worker caído.
+
+    Returns:
+        int: Número de tareas reencoladas
+    """
+    from .models import SyncTask
+
+    timeout = getattr(settings, 'SYNC_TASK_TIMEOUT', 300)
+    now = timezone.now()
+
+    requeued = SyncTask.objects.filter(
+        status='running',
+        updated_at__lt=now - timedelta(seconds=timeout)
+    ).update(status='pending', available_at=now, updated_at=now)
+
+    if requeued:
+        logger.warning(f"{requeued} tareas de sincronización abandonadas se reencolaron")
+
+    return requeued
+
+
+def claim_sync_tasks(limit: int = 50) -> List:
+    """
+    Reserva tareas pendientes para este worker.
+    Cada tarea se reserva con una actualización condicional, de modo que
+    varios workers pueden drenar la misma cola sin ejecutar una tarea dos veces.
+
+    Args:
+        limit: Número máximo de tareas
+
+    Returns:
+        List[SyncTask]: Tareas reservadas
+    """
+    from .models import SyncTask
+
+    now = timezone.now()
+    candidate_ids = list(
+        SyncTask.objects.filter(
+            status='pending',
+            available_at__lte=now
+        ).order_by('available_at', 'id').values_list('id', flat=True)[:limit]
+    )
+
+    claimed_ids = [
+        task_id for task_id in candidate_ids
+        if SyncTask.objects.filter(id=task_id, status='pending').update(
+            status='running', attempts=F('attempts') + 1, updated_at=now
+        )
+    ]
+
+    return list(SyncTask.objects.filter(id__in=claimed_ids).order_by('available_at', 'id'))
+
+
+def run_sync_task(task) -> bool:
+    """
+    Ejecuta una tarea reservada y registra su resultado.
+    Si falla se reprograma con espera exponencial hasta SYNC_TASK_MAX_ATTEMPTS.
+
+    Args:
+        task: Tarea reservada (SyncTask)
+
+    Returns:
+        bool: True si la tarea se completó
+    """
+    from .models import SyncTask
+
+    try:
+        TASK_HANDLERS[task.kind](task.competition_id, **task.payload)
+    except Exception as e:
+        max_attempts = getattr(settings, 'SYNC_TASK_MAX_ATTEMPTS', 8)
+        now = timezone.now()
+
+        if task.attempts >= max_attempts:
+            logger.error(f"Tarea de sincronización {task.id} ({task.kind}) fallida tras {task.attempts} intentos: {e}")
+            SyncTask.objects.filter(id=task.id).update(
+                status='failed', last_error=str(e), updated_at=now
+            )
+        else:
+            delay = get_retry_delay(task.attempts)
+            logger.warning(f"Tarea de sincronización {task.id} ({task.kind}) reintentará en {delay}s: {e}")
+            SyncTask.objects.filter(id=task.id).update(
+                status='pending',
+                last_error=str(e),
+                available_at=now + timedelta(seconds=delay),
+                updated_at=now
+            )
+        return False
+
+    SyncTask.objects.filter(id=task.id).update(status='done', last_error=None, updated_at=timezone.now())
+    return True
+
+
+def _run_sync_task_in_thread(task) -> bool:
+    """Ejecuta una tarea desde un hilo del pool con su propia conexión"""
+    close_old_connections()
+    try:
+        return run_sync_task(task)
+    finally:
+        connection.close()
+
+
+def process_sync_tasks(limit: int = 50, workers: int = 1) -> Dict[str, int]:
+    """
+    Reserva y ejecuta un lote de tareas pendientes.
+
+    Args:
+        limit: Número máximo de tareas del lote
+        workers: Hilos que ejecutan las tareas en paralelo
+
+    Returns:
+        Dict: Tareas procesadas, completadas y fallidas
+    """
+    requeue_stale_tasks()
+    tasks = claim_sync_tasks(limit)
+
+    if workers > 1 and len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_sync_task_in_thread, tasks))
+    else:
+        results = [run_sync_task(task) for task in tasks]
+
+    completed = sum(1 for result in results if result)
+    return {
+        'processed': len(results),
+        'completed': completed,
+        'failed': len(results) - completed
+    }
+
+
+def purge_finished_tasks(older_than_hours: int = 24) -> int:
+    """
+    Elimina las tareas completadas más antiguas que el plazo indicado.
+
+    Args:
+        older_than_hours: Antigüedad mínima en horas
+
+    Returns:
+        int: Número de tareas eliminadas
+    """
+    from .models import SyncTask
+
+    deleted, _ = SyncTask.objects.filter(
+        status='done',
+        updated_at__lt=timezone.now() - timedelta(hours=older_than_hours)
+    ).delete()
+    return deleted
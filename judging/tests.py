@@ -1,4 +1,6 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
+from unittest import mock
+import json
 from decimal import Decimal
 from .processors import fei_processor
 
@@ -35,4 +37,2046 @@ class FEICalculationTests(TestCase):
         with self.assertRaises(ValueError):
             fei_processor.validate_score(-1)
         with self.assertRaises(ValueError):
-            fei_processor.validate_score(11)
\ No newline at end of file
+            fei_processor.validate_score(11)
+
+class FEIBatchKernelTests(TestCase):
+    def test_batch_matches_scalar_path(self):
+        """El cálculo por lotes en décimas es idéntico al cálculo Decimal por calificación"""
+        import random
+        from .processors import FEIScoreProcessor, to_tenths
+        
+        rng = random.Random(2024)
+        for _ in range(200):
+            max_value = rng.choice([5, 10, 10, 20])
+            processor = FEIScoreProcessor(max_value=max_value)
+            size = rng.randint(1, 40)
+            values = [Decimal(rng.randint(0, max_value * 10)) / 10 for _ in range(size)]
+            coefficients = [rng.randint(1, 5) for _ in range(size)]
+            judges = [rng.randint(1, 4) for _ in range(size)]
+            
+            batch = processor.calculate_batch([to_tenths(v) for v in values], coefficients, judges)
+            expected = [processor.calculate_result(v, c) for v, c in zip(values, coefficients)]
+            self.assertEqual(batch['results'], expected)
+            
+            for judge, ranking in batch['judges'].items():
+                results = [r for r, j in zip(expected, judges) if j == judge]
+                average = processor.calculate_average(results)
+                percentage = processor.calculate_percentage(average)
+                self.assertEqual(ranking['count'], len(results))
+                self.assertEqual(ranking['average'].as_tuple(), average.as_tuple())
+                self.assertEqual(ranking['percentage'].as_tuple(), percentage.as_tuple())
+    
+    def test_batch_rejects_invalid_input(self):
+        """Valores fuera de rango, coeficientes no positivos y más de un decimal se rechazan"""
+        from .processors import to_tenths
+        
+        with self.assertRaises(ValueError):
+            fei_processor.calculate_results_batch([105], [1])
+        with self.assertRaises(ValueError):
+            fei_processor.calculate_results_batch([50], [0])
+        with self.assertRaises(ValueError):
+            to_tenths('7.25')
+        self.assertEqual([to_tenths(7.5), to_tenths('6'), to_tenths(Decimal('8.0'))], [75, 60, 80])
+
+
+class RankingTestDataMixin:
+    """Crea una competencia con jueces, parámetros y participantes para las pruebas de rankings"""
+    
+    @classmethod
+    def setUpClass(cls):
+        # Sin ventanas de agrupación: recálculos y difusiones corren en el hilo
+        # de la prueba y ningún temporizador lee la base de datos en segundo plano
+        windows = override_settings(RANKING_RECALC_WINDOW=0, SCORE_BROADCAST_WINDOW=0)
+        windows.enable()
+        cls.addClassCleanup(windows.disable)
+        super().setUpClass()
+    
+    def create_competition_data(self, participants=3, judges=2, parameters=3):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from competitions.assignments import clear_competition_judges
+        from competitions.models import (
+            Competition, Category, CompetitionJudge, Rider, Horse, Participant
+        )
+        from .models import EvaluationParameter, CompetitionParameter
+        
+        User = get_user_model()
+        
+        # Los IDs se reutilizan entre pruebas: descartar rankings y asignaciones en caché
+        cache.clear()
+        clear_competition_judges()
+        
+        self.admin = User.objects.create_user(
+            email='admin@apsan.org', password='test123',
+            first_name='Admin', last_name='Test', role='admin'
+        )
+        self.competition = Competition.objects.create(
+            name='Competencia de prueba', location='La Paz',
+            start_date='2025-05-01', end_date='2025-05-02',
+            status='active', creator=self.admin
+        )
+        self.category = Category.objects.create(name='Adultos', code='ADU')
+        
+        self.judges = []
+        for i in range(judges):
+            judge = User.objects.create_user(
+                email=f'juez{i}@apsan.org', password='test123',
+                first_name='Juez', last_name=str(i), role='judge'
+            )
+            CompetitionJudge.objects.create(competition=self.competition, judge=judge)
+            self.judges.append(judge)
+        
+        self.parameters = []
+        for i in range(parameters):
+            parameter = EvaluationParameter.objects.create(name=f'Parámetro {i}', coefficient=1 + i % 2)
+            self.parameters.append(CompetitionParameter.objects.create(
+                competition=self.competition, parameter=parameter, order=i + 1
+            ))
+        
+        self.participants = []
+        for i in range(participants):
+            rider = Rider.objects.create(first_name='Jinete', last_name=str(i))
+            horse = Horse.objects.create(name=f'Caballo {i}')
+            self.participants.append(Participant.objects.create(
+                competition=self.competition, rider=rider, horse=horse,
+                category=self.category, number=i + 1, order=i + 1
+            ))
+    
+    def score(self, participant, judge, parameter, value):
+        from .models import Score
+        
+        score, _ = Score.objects.update_or_create(
+            competition=self.competition, participant=participant,
+            judge=judge, parameter=parameter,
+            defaults={'value': Decimal(str(value))}
+        )
+        return score
+    
+    def score_all(self, seed=0):
+        import random
+        
+        rng = random.Random(seed)
+        for participant in self.participants:
+            for judge in self.judges:
+                for parameter in self.parameters:
+                    self.score(participant, judge, parameter, rng.randint(0, 20) / 2)
+
+
+class IncrementalRankingTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        self.create_competition_data()
+        self.score_all()
+    
+    def ranking_table(self):
+        from .models import Ranking
+        
+        return list(Ranking.objects.filter(
+            competition=self.competition
+        ).order_by('participant_id').values_list(
+            'participant_id', 'average_score', 'percentage', 'position'
+        ))
+    
+    def test_incremental_matches_full_recalculation(self):
+        """El modo incremental debe dejar la misma tabla que un recálculo completo"""
+        from .services import update_participant_rankings, update_participant_ranking
+        
+        update_participant_rankings(self.competition.id)
+        
+        # Cambiar una calificación y aplicar solo el participante afectado
+        last = self.participants[-1]
+        for parameter in self.parameters:
+            self.score(last, self.judges[0], parameter, 10)
+        result = update_participant_ranking(self.competition.id, last.id)
+        incremental = self.ranking_table()
+        
+        update_participant_rankings(self.competition.id)
+        self.assertEqual(incremental, self.ranking_table())
+        self.assertEqual(result['position'], dict(
+            (row[0], row[3]) for row in incremental
+        )[last.id])
+    
+    def test_incremental_creates_missing_ranking(self):
+        """Un participante sin ranking previo recibe su fila y posición"""
+        from .models import Ranking
+        from .services import update_participant_ranking
+        
+        participant = self.participants[0]
+        result = update_participant_ranking(self.competition.id, participant.id)
+        
+        ranking = Ranking.objects.get(competition=self.competition, participant=participant)
+        self.assertEqual(ranking.position, 1)
+        self.assertIsNone(result['previous_position'])
+    
+    def test_incremental_query_count_does_not_depend_on_field_size(self):
+        """El número de consultas no depende de la cantidad de participantes"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .services import update_participant_rankings, update_participant_ranking
+        
+        update_participant_rankings(self.competition.id)
+        with CaptureQueriesContext(connection) as small:
+            update_participant_ranking(self.competition.id, self.participants[0].id)
+        
+        from competitions.models import Rider, Horse, Participant
+        for i in range(10):
+            rider = Rider.objects.create(first_name='Extra', last_name=str(i))
+            horse = Horse.objects.create(name=f'Extra {i}')
+            participant = Participant.objects.create(
+                competition=self.competition, rider=rider, horse=horse,
+                category=self.category, number=100 + i, order=100 + i
+            )
+            for judge in self.judges:
+                self.score(participant, judge, self.parameters[0], 5)
+        update_participant_rankings(self.competition.id)
+        
+        with CaptureQueriesContext(connection) as large:
+            update_participant_ranking(self.competition.id, self.participants[0].id)
+        
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class SetBasedRankingTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        self.create_competition_data(participants=5, judges=3, parameters=4)
+        self.score_all(seed=7)
+    
+    def test_matches_per_participant_calculation(self):
+        """La agregación agrupada debe dar los mismos números que la fórmula FEI por participante"""
+        from .services import calculate_final_ranking, calculate_competition_rankings
+        
+        # Un juez sin calificaciones para un participante cuenta como 0%
+        from .models import Score
+        Score.objects.filter(participant=self.participants[1], judge=self.judges[2]).delete()
+        
+        rankings = calculate_competition_rankings(self.competition.id)
+        self.assertEqual(len(rankings), len(self.participants))
+        
+        for ranking in rankings:
+            expected = calculate_final_ranking(self.competition.id, ranking['participant_id'])
+            self.assertEqual(ranking['average'], expected['average'])
+            self.assertEqual(ranking['percentage'], expected['percentage'])
+            self.assertEqual(
+                [jr['percentage'] for jr in ranking['judge_rankings']],
+                [jr['percentage'] for jr in expected['judge_rankings']]
+            )
+    
+    def test_positions_follow_percentage(self):
+        """Las posiciones guardadas siguen el porcentaje de mayor a menor"""
+        from .models import Ranking
+        from .services import update_participant_rankings
+        
+        update_participant_rankings(self.competition.id)
+        percentages = list(Ranking.objects.filter(
+            competition=self.competition
+        ).order_by('position').values_list('percentage', flat=True))
+        
+        self.assertEqual(percentages, sorted(percentages, reverse=True))
+    
+    def test_ties_are_ordered_alike_by_full_and_incremental_paths(self):
+        """Empates al guardarse con 2 decimales: ambos caminos desempatan por orden de salida e ID"""
+        from .models import Ranking, Score
+        from .services import update_participant_ranking, update_participant_rankings
+        
+        Score.objects.filter(competition=self.competition).delete()
+        judges, parameters = self.judges[:2], self.parameters[:3]
+        # Sumas por juez 19 + 21 y 20 + 20: 66.666...66 y 66.666...67 sin redondear
+        cards = {
+            self.participants[0]: [(5, 4, 6), (7, 4, 6)],
+            self.participants[1]: [(6, 4, 6), (6, 4, 6)],
+            self.participants[2]: [(6, 4, 6), (6, 4, 6)],
+        }
+        for participant, values in cards.items():
+            for judge, card in zip(judges, values):
+                for parameter, value in zip(parameters, card):
+                    self.score(participant, judge, parameter, value)
+        Score.objects.filter(competition=self.competition).exclude(
+            judge__in=judges, parameter__in=parameters
+        ).delete()
+        expected = [participant.id for participant in self.participants[:3]]
+        
+        def positions():
+            return list(Ranking.objects.filter(
+                competition=self.competition, participant_id__in=expected
+            ).order_by('position').values_list('participant_id', flat=True))
+        
+        update_participant_rankings(self.competition.id)
+        self.assertEqual(positions(), expected)
+        
+        Ranking.objects.filter(competition=self.competition).update(position=0)
+        for participant in reversed(self.participants):
+            update_participant_ranking(self.competition.id, participant.id)
+        self.assertEqual(positions(), expected)
+    
+    def test_query_count_does_not_depend_on_field_size(self):
+        """El recálculo completo usa un número fijo de consultas"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .services import update_participant_rankings
+        
+        update_participant_rankings(self.competition.id)
+        with CaptureQueriesContext(connection) as queries:
+            update_participant_rankings(self.competition.id)
+        
+        # 8 consultas de cálculo y guardado + 1 para encolar la sincronización
+        self.assertLessEqual(len(queries.captured_queries), 9)
+
+
+class RankingPersistenceTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        self.create_competition_data(participants=4)
+        self.score_all(seed=3)
+    
+    def add_participants(self, count):
+        from competitions.models import Rider, Horse, Participant
+        
+        for i in range(count):
+            rider = Rider.objects.create(first_name='Extra', last_name=str(i))
+            horse = Horse.objects.create(name=f'Extra {i}')
+            participant = Participant.objects.create(
+                competition=self.competition, rider=rider, horse=horse,
+                category=self.category, number=200 + i, order=200 + i
+            )
+            for judge in self.judges:
+                self.score(participant, judge, self.parameters[0], i % 10)
+    
+    def test_recalculation_round_trips_are_constant(self):
+        """Guardar los rankings cuesta lo mismo con 4 o con 24 participantes"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .services import update_participant_rankings
+        
+        update_participant_rankings(self.competition.id)
+        with CaptureQueriesContext(connection) as small:
+            update_participant_rankings(self.competition.id)
+        
+        self.add_participants(20)
+        update_participant_rankings(self.competition.id)
+        with CaptureQueriesContext(connection) as large:
+            update_participant_rankings(self.competition.id)
+        
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+    
+    def test_update_positions_single_batch(self):
+        """update_positions reescribe todas las posiciones en una sola actualización"""
+        from .models import Ranking
+        from .services import update_participant_rankings
+        
+        update_participant_rankings(self.competition.id)
+        Ranking.objects.filter(competition=self.competition).update(position=0)
+        
+        with self.assertNumQueries(2):
+            count = Ranking.update_positions(self.competition.id)
+        
+        self.assertEqual(count, len(self.participants))
+        self.assertEqual(
+            sorted(Ranking.objects.filter(competition=self.competition).values_list('position', flat=True)),
+            list(range(1, len(self.participants) + 1))
+        )
+
+
+class RankingSchedulerTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        self.create_competition_data()
+        self.score_all(seed=5)
+    
+    def test_burst_is_coalesced_into_one_recalculation(self):
+        """Una ráfaga de eventos de la misma competencia produce un solo recálculo"""
+        from unittest import mock
+        from . import services
+        from .models import Ranking
+        from .scheduler import RankingRecalculationScheduler
+        
+        scheduler = RankingRecalculationScheduler(window=60)
+        with mock.patch.object(services, 'update_participant_rankings',
+                               wraps=services.update_participant_rankings) as full:
+            for participant in self.participants:
+                for judge in self.judges:
+                    scheduler.mark_dirty(self.competition.id, participant.id)
+            
+            metrics = scheduler.get_metrics()
+            self.assertEqual(metrics['events'], 6)
+            self.assertEqual(metrics['merged'], 5)
+            self.assertEqual(metrics['pending'], 1)
+            
+            scheduler.flush()
+        
+        self.assertEqual(full.call_count, 1)
+        self.assertEqual(scheduler.get_metrics()['runs'], 1)
+        self.assertEqual(scheduler.get_metrics()['last_batch_size'], 6)
+        self.assertEqual(Ranking.objects.filter(competition=self.competition).count(), 3)
+    
+    def test_single_participant_uses_incremental_update(self):
+        """Si solo cambió un participante se usa el modo incremental"""
+        from unittest import mock
+        from .scheduler import RankingRecalculationScheduler
+        
+        scheduler = RankingRecalculationScheduler(window=0)
+        with mock.patch('judging.services.update_participant_ranking') as incremental:
+            scheduler.mark_dirty(self.competition.id, self.participants[0].id)
+        
+        incremental.assert_called_once_with(self.competition.id, self.participants[0].id)
+    
+    def test_schedule_runs_after_commit(self):
+        """El recálculo se programa solo cuando la transacción se confirma"""
+        from unittest import mock
+        from .scheduler import schedule_ranking_update, ranking_scheduler
+        
+        with mock.patch.object(ranking_scheduler, 'mark_dirty') as mark_dirty:
+            with self.captureOnCommitCallbacks(execute=True):
+                schedule_ranking_update(self.competition.id, self.participants[0].id)
+                mark_dirty.assert_not_called()
+        
+        mark_dirty.assert_called_once_with(self.competition.id, self.participants[0].id)
+
+
+@override_settings(FIREBASE_BACKEND='stub')
+class SyncTaskQueueTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from .firebase_stub import firebase_stub
+        
+        from .models import SyncTask
+        
+        self.create_competition_data()
+        self.score_all(seed=5)
+        # Las calificaciones iniciales dejan su sincronización en la cola
+        SyncTask.objects.all().delete()
+        self.stub = firebase_stub
+        self.stub.reset()
+    
+    def test_recalculation_only_enqueues_sync(self):
+        """El recálculo encola Firebase, notifica los WebSocket en el proceso web y el worker sincroniza contra el stub"""
+        from .models import SyncTask
+        from .services import update_participant_rankings
+        from .tasks import process_sync_tasks
+        
+        with mock.patch('judging.consumers.notify_rankings_update') as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                update_participant_rankings(self.competition.id)
+                update_participant_rankings(self.competition.id)
+                notify.assert_not_called()
+        self.assertEqual(notify.call_count, 2)
+        
+        self.assertEqual(self.stub.operations, [])
+        self.assertEqual(
+            list(SyncTask.objects.filter(status='pending').values_list('kind', flat=True)),
+            ['sync_rankings']
+        )
+        
+        with mock.patch('judging.consumers.notify_rankings_update') as notify:
+            result = process_sync_tasks(workers=1)
+        notify.assert_not_called()
+        
+        self.assertEqual(result, {'processed': 1, 'completed': 1, 'failed': 0})
+        rankings = self.stub.reference(f'rankings/{self.competition.id}').get()
+        self.assertEqual(len(rankings), 3)
+        self.assertFalse(SyncTask.objects.exclude(status='done').exists())
+    
+    def test_score_sync_tasks_are_deduplicated(self):
+        """Una tarea equivalente pendiente no se duplica"""
+        from .models import SyncTask
+        from .tasks import enqueue_sync_task, process_sync_tasks
+        
+        participant = self.participants[0]
+        for judge in self.judges:
+            for _ in range(3):
+                enqueue_sync_task(
+                    'sync_participant_scores', self.competition.id,
+                    participant_id=participant.id, judge_id=judge.id
+                )
+        
+        self.assertEqual(SyncTask.objects.count(), 2)
+        process_sync_tasks(workers=1)
+        
+        scores = self.stub.reference(f'scores/{self.competition.id}/{participant.id}').get()
+        self.assertEqual(set(scores), {str(judge.id) for judge in self.judges})
+    
+    @override_settings(SYNC_TASK_MAX_ATTEMPTS=2, SYNC_TASK_RETRY_BASE=10)
+    def test_failed_task_is_retried_with_backoff(self):
+        """Las tareas fallidas se reprograman y se abandonan al agotar los intentos"""
+        from datetime import timedelta
+        from unittest import mock
+        from django.utils import timezone
+        from .models import SyncTask
+        from . import tasks
+        
+        task = tasks.enqueue_sync_task('sync_rankings', self.competition.id)
+        
+        with mock.patch.dict(tasks.TASK_HANDLERS, {'sync_rankings': mock.Mock(side_effect=Exception('sin conexión'))}):
+            tasks.process_sync_tasks()
+            task.refresh_from_db()
+            self.assertEqual(task.status, 'pending')
+            self.assertEqual(task.attempts, 1)
+            self.assertGreater(task.available_at, timezone.now() + timedelta(seconds=5))
+            
+            # Aún no disponible: no se reserva
+            self.assertEqual(tasks.claim_sync_tasks(), [])
+            
+            SyncTask.objects.filter(id=task.id).update(available_at=timezone.now())
+            tasks.process_sync_tasks()
+        
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'failed')
+        self.assertEqual(task.last_error, 'sin conexión')
+    
+    def test_task_is_claimed_once(self):
+        """Una tarea reservada no se entrega a otro worker"""
+        from .tasks import enqueue_sync_task, claim_sync_tasks
+        
+        enqueue_sync_task('notify_rankings', self.competition.id)
+        
+        self.assertEqual(len(claim_sync_tasks()), 1)
+        self.assertEqual(claim_sync_tasks(), [])
+    
+    def test_worker_command_drains_queue(self):
+        """El comando run_sync_worker --once vacía la cola"""
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import SyncTask
+        from .tasks import enqueue_ranking_sync
+        
+        enqueue_ranking_sync(self.competition.id)
+        out = StringIO()
+        call_command('run_sync_worker', '--once', '--workers', '1', stdout=out)
+        
+        self.assertIn('Tareas procesadas: 1', out.getvalue())
+        self.assertEqual(SyncTask.objects.filter(status='done').count(), 1)
+
+
+@override_settings(FIREBASE_BACKEND='stub')
+class ScoreChangePipelineTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from . import pipeline
+        from .models import SyncTask
+        
+        self.create_competition_data()
+        self.score_all(seed=7)
+        
+        # Los datos iniciales pertenecen a la transacción de la prueba, que nunca se confirma
+        pipeline._local.batch = None
+        SyncTask.objects.all().delete()
+    
+    def edit_scores(self, participants, value=8):
+        for participant in participants:
+            for judge in self.judges:
+                for parameter in self.parameters:
+                    self.score(participant, judge, parameter, value)
+    
+    def test_one_recompute_and_broadcast_per_transaction(self):
+        """Muchas ediciones en una transacción producen un recálculo y una difusión"""
+        from unittest import mock
+        from . import services
+        
+        with mock.patch.object(services, 'update_participant_rankings',
+                               wraps=services.update_participant_rankings) as full, \
+                mock.patch.object(services, 'update_participant_ranking',
+                                  wraps=services.update_participant_ranking) as incremental, \
+                mock.patch('judging.consumers.notify_rankings_update') as notify:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.edit_scores(self.participants[:2])
+        
+        from .pipeline import ScoreChangeBatch
+        flushes = [cb for cb in callbacks if isinstance(getattr(cb, '__self__', None), ScoreChangeBatch)]
+        self.assertEqual(len(flushes), 1)
+        self.assertEqual(full.call_count, 1)
+        self.assertEqual(incremental.call_count, 0)
+        notify.assert_called_once_with(self.competition.id)
+    
+    def test_single_participant_edit_is_incremental(self):
+        """Si en la transacción solo cambió un participante el recálculo es incremental"""
+        from unittest import mock
+        from . import services
+        
+        with mock.patch.object(services, 'update_participant_ranking',
+                               wraps=services.update_participant_ranking) as incremental:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.edit_scores(self.participants[:1])
+        
+        incremental.assert_called_once_with(self.competition.id, self.participants[0].id)
+    
+    def test_tasks_are_written_in_the_transaction(self):
+        """Las tareas se escriben con las calificaciones (y se revierten con ellas); el despacho tiene coste fijo"""
+        from django.db import connection, transaction
+        from django.test.utils import CaptureQueriesContext
+        from .models import SyncTask
+        from .pipeline import score_changed
+        
+        try:
+            with transaction.atomic():
+                score_changed(self.competition.id, self.participants[0].id, self.judges[0].id)
+                self.assertEqual(SyncTask.objects.filter(kind='sync_participant_scores').count(), 1)
+                self.assertEqual(SyncTask.objects.filter(kind='recalculate_rankings').count(), 1)
+                raise RuntimeError('revertir')
+        except RuntimeError:
+            pass
+        self.assertFalse(SyncTask.objects.exists())
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            for participant in self.participants:
+                for judge in self.judges:
+                    score_changed(self.competition.id, participant.id, judge.id)
+            
+            # Antes de confirmar, la cola ya tiene una tarea por participante y juez
+            self.assertEqual(
+                SyncTask.objects.filter(kind='sync_participant_scores').count(),
+                len(self.participants) * len(self.judges)
+            )
+        
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        
+        # Un recálculo completo, sin importar cuántas calificaciones cambiaron
+        self.assertLessEqual(len(queries.captured_queries), 18)
+    
+    def test_recalculation_mark_survives_a_lost_process(self):
+        """La marca durable se completa al recalcular en proceso; si el proceso cae, la ejecuta el worker"""
+        from datetime import timedelta
+        from unittest import mock
+        from django.utils import timezone
+        from .models import Ranking, SyncTask
+        from .pipeline import score_changed
+        from .scheduler import ranking_scheduler
+        from .tasks import process_sync_tasks
+        
+        marks = SyncTask.objects.filter(kind='recalculate_rankings')
+        
+        # Recalculado en proceso: la marca queda completada
+        with self.captureOnCommitCallbacks(execute=True):
+            score_changed(self.competition.id, self.participants[0].id, self.judges[0].id)
+            score_changed(self.competition.id, self.participants[1].id, self.judges[0].id)
+            self.assertEqual(marks.filter(status='pending').count(), 1)
+            self.assertGreater(marks.get().available_at, timezone.now())
+        self.assertEqual(marks.get().status, 'done')
+        
+        # El proceso se pierde antes de recalcular: la marca sigue pendiente
+        Ranking.objects.filter(competition=self.competition).delete()
+        with mock.patch.object(ranking_scheduler, 'mark_dirty'):
+            with self.captureOnCommitCallbacks(execute=True):
+                score_changed(self.competition.id, self.participants[0].id, self.judges[0].id)
+        pending = marks.filter(status='pending')
+        self.assertEqual(pending.count(), 1)
+        
+        # Pasado el plazo de recuperación, el worker recalcula
+        SyncTask.objects.exclude(kind='recalculate_rankings').delete()
+        pending.update(available_at=timezone.now() - timedelta(seconds=1))
+        process_sync_tasks()
+        self.assertFalse(marks.filter(status='pending').exists())
+        self.assertEqual(Ranking.objects.filter(competition=self.competition).count(), 3)
+    
+    def test_participant_without_scores_leaves_the_ranking(self):
+        """Al eliminar su última calificación el participante sale del ranking tras el recálculo agrupado"""
+        from .models import Ranking, Score
+        from .services import update_participant_ranking
+        
+        participant = self.participants[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            Score.objects.filter(participant=participant).delete()
+        
+        rankings = Ranking.objects.filter(competition=self.competition)
+        self.assertFalse(rankings.filter(participant=participant).exists())
+        self.assertEqual(sorted(rankings.values_list('position', flat=True)), [1, 2])
+        
+        # El recálculo incremental aplica la misma regla
+        other = self.participants[1]
+        Score.objects.filter(participant=other).delete()
+        self.assertIsNone(update_participant_ranking(self.competition.id, other.id))
+        self.assertEqual(list(rankings.values_list('position', flat=True)), [1])
+    
+    def test_rolled_back_savepoint_is_not_dispatched(self):
+        """Los cambios de un savepoint revertido no se despachan y no bloquean los siguientes"""
+        from unittest import mock
+        from django.db import transaction
+        from .scheduler import ranking_scheduler
+        
+        with mock.patch.object(ranking_scheduler, 'mark_dirty') as mark_dirty:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        self.edit_scores(self.participants[:1])
+                        raise RuntimeError('revertir')
+                except RuntimeError:
+                    pass
+            mark_dirty.assert_not_called()
+            
+            with self.captureOnCommitCallbacks(execute=True):
+                self.edit_scores(self.participants[1:2])
+        
+        mark_dirty.assert_called_once_with(self.competition.id, self.participants[1].id)
+
+
+@override_settings(FIREBASE_BACKEND='stub')
+class CompetitionDeleteTests(RankingTestDataMixin, TransactionTestCase):
+    def test_deleting_scored_competition_commits(self):
+        """El borrado en cascada de las calificaciones no encola tareas de la competencia eliminada"""
+        from competitions.models import Competition
+        from .models import Score, SyncTask
+        
+        self.create_competition_data()
+        self.score_all(seed=3)
+        self.assertTrue(Score.objects.filter(competition=self.competition).exists())
+        
+        competition_id = self.competition.id
+        self.competition.delete()
+        
+        self.assertFalse(Competition.objects.filter(id=competition_id).exists())
+        self.assertFalse(Score.objects.filter(competition_id=competition_id).exists())
+        self.assertFalse(SyncTask.objects.filter(competition_id=competition_id).exists())
+
+
+@override_settings(FIREBASE_BACKEND='stub', FIREBASE_RANKINGS_SYNC_MODE='delta')
+class DeltaRankingSyncTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from .firebase_stub import firebase_stub
+        from .services import update_participant_rankings
+        
+        self.create_competition_data()
+        self.score_all(seed=11)
+        update_participant_rankings(self.competition.id)
+        self.stub = firebase_stub
+        self.stub.reset()
+    
+    def test_first_sync_is_full_and_metadata_is_separate(self):
+        """El primer envío reemplaza los nodos y separa los metadatos del participante"""
+        from .firebase import sync_rankings
+        
+        self.assertTrue(sync_rankings(self.competition.id))
+        
+        self.assertEqual([op['op'] for op in self.stub.operations], ['set', 'set'])
+        participant_id = str(self.participants[0].id)
+        rankings = self.stub.reference(f'rankings/{self.competition.id}').get()
+        participants = self.stub.reference(f'participants/{self.competition.id}').get()
+        self.assertNotIn('rider', rankings[participant_id])
+        self.assertEqual(participants[participant_id]['number'], self.participants[0].number)
+    
+    def test_unchanged_ranking_sends_nothing(self):
+        """Si nada cambió no se escribe en Firebase"""
+        from .firebase import sync_rankings
+        
+        sync_rankings(self.competition.id)
+        self.stub.operations.clear()
+        
+        self.assertTrue(sync_rankings(self.competition.id))
+        self.assertEqual(self.stub.operations, [])
+    
+    def test_concurrent_sync_discards_the_snapshot(self):
+        """Si otro worker guarda un snapshot durante el envío, se descarta la base y se encola un envío completo"""
+        from unittest import mock
+        from django.db.models import F
+        from . import firebase
+        from .models import FirebaseSync, SyncTask
+        
+        self.assertTrue(firebase.sync_rankings(self.competition.id))
+        record = FirebaseSync.objects.get(competition=self.competition)
+        self.assertEqual(record.snapshot_version, 1)
+        self.assertIsNotNone(record.rankings_snapshot)
+        
+        def concurrent_push(path):
+            # Otro worker guarda su snapshot mientras este envía
+            FirebaseSync.objects.filter(id=record.id).update(snapshot_version=F('snapshot_version') + 1)
+            return self.stub.reference(path)
+        
+        SyncTask.objects.all().delete()
+        with mock.patch.object(firebase, 'get_firebase_ref', side_effect=concurrent_push):
+            self.assertTrue(firebase.sync_rankings(self.competition.id, full=True))
+        
+        record.refresh_from_db()
+        self.assertIsNone(record.rankings_snapshot)
+        self.assertEqual(list(SyncTask.objects.values_list('kind', flat=True)), ['sync_rankings'])
+        
+        # El siguiente envío es completo y vuelve a guardar la base
+        self.stub.operations.clear()
+        self.assertTrue(firebase.sync_rankings(self.competition.id))
+        self.assertEqual([op['op'] for op in self.stub.operations], ['set', 'set'])
+        record.refresh_from_db()
+        self.assertIsNotNone(record.rankings_snapshot)
+    
+    def test_changed_score_sends_only_changed_leaves(self):
+        """Un cambio de puntuación envía solo las hojas modificadas en un update()"""
+        from .firebase import sync_rankings
+        from .services import update_participant_rankings
+        
+        sync_rankings(self.competition.id)
+        self.stub.operations.clear()
+        
+        participant = self.participants[0]
+        for parameter in self.parameters:
+            self.score(participant, self.judges[0], parameter, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_participant_rankings(self.competition.id)
+        sync_rankings(self.competition.id)
+        
+        self.assertEqual(len(self.stub.operations), 1)
+        operation = self.stub.operations[0]
+        self.assertEqual(operation['op'], 'update')
+        self.assertTrue(all(path.startswith(f'rankings/{self.competition.id}/') for path in operation['value']))
+        self.assertIn(f'rankings/{self.competition.id}/{participant.id}/percentage', operation['value'])
+        
+        # El estado resultante coincide con un envío completo
+        delta_state = self.stub.reference(f'rankings/{self.competition.id}').get()
+        sync_rankings(self.competition.id, full=True)
+        full_state = self.stub.reference(f'rankings/{self.competition.id}').get()
+        self.assertEqual(
+            {key: {k: v for k, v in node.items() if k != 'previousPosition'} for key, node in delta_state.items()},
+            {key: {k: v for k, v in node.items() if k != 'previousPosition'} for key, node in full_state.items()}
+        )
+    
+    def test_diff_nodes_deletes_removed_entries(self):
+        """Los participantes y hojas que desaparecen se eliminan con None"""
+        from .firebase import diff_nodes
+        
+        previous = {'1': {'position': 1, 'previousPosition': 2}, '2': {'position': 2}}
+        current = {'1': {'position': 1}}
+        
+        self.assertEqual(diff_nodes(previous, current, 'rankings/5'), {
+            'rankings/5/2': None,
+            'rankings/5/1/previousPosition': None
+        })
+
+
+@override_settings(FIREBASE_BACKEND='stub')
+class BatchedScoreSyncTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from . import pipeline
+        from .firebase_stub import firebase_stub
+        
+        self.create_competition_data()
+        pipeline._local.batch = None
+        self.stub = firebase_stub
+        self.stub.reset()
+    
+    def test_scorecard_is_one_multi_path_update(self):
+        """Una tarjeta completa se envía en una sola escritura con el esquema de nodos existente"""
+        from .firebase import get_score_sync_metrics
+        from .models import SyncTask
+        from .tasks import process_sync_tasks
+        
+        participant = self.participants[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            for judge in self.judges:
+                for parameter in self.parameters:
+                    self.score(participant, judge, parameter, 7)
+        
+        self.assertEqual(SyncTask.objects.filter(kind='sync_score_batch').count(), 1)
+        
+        batches = get_score_sync_metrics()['batches']
+        with mock.patch('judging.consumers.notify_rankings_update'):
+            process_sync_tasks()
+        
+        score_writes = [
+            op for op in self.stub.operations
+            if any(path.startswith('scores/') for path in op['value'] or {})
+        ]
+        self.assertEqual(len(score_writes), 1)
+        self.assertEqual(len(score_writes[0]['value']), len(self.judges) * len(self.parameters))
+        
+        judge, parameter = self.judges[0], self.parameters[0]
+        node = self.stub.reference(
+            f'scores/{self.competition.id}/{participant.id}/{judge.id}/{parameter.parameter_id}'
+        ).get()
+        self.assertEqual(node['value'], 7.0)
+        
+        metrics = get_score_sync_metrics()
+        self.assertEqual(metrics['batches'], batches + 1)
+        self.assertIsNotNone(metrics['last_latency_ms'])
+    
+    def test_deleted_score_removes_node(self):
+        """Eliminar una calificación borra su nodo en el mismo lote"""
+        from .tasks import process_sync_tasks
+        
+        participant, judge, parameter = self.participants[0], self.judges[0], self.parameters[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            score = self.score(participant, judge, parameter, 5)
+        with mock.patch('judging.consumers.notify_rankings_update'):
+            process_sync_tasks()
+        
+        path = f'scores/{self.competition.id}/{participant.id}/{judge.id}/{parameter.parameter_id}'
+        self.assertIsNotNone(self.stub.reference(path).get())
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            score.delete()
+        with mock.patch('judging.consumers.notify_rankings_update'):
+            process_sync_tasks()
+        
+        self.assertIsNone(self.stub.reference(path).get())
+
+
+class RankingSnapshotTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from .services import update_participant_rankings
+        
+        self.create_competition_data()
+        self.score_all(seed=13)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_participant_rankings(self.competition.id)
+    
+    def test_snapshot_is_built_once_per_version(self):
+        """Las lecturas repetidas de la misma versión no consultan la base de datos"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .snapshots import get_ranking_snapshot_bytes
+        
+        version, payload = get_ranking_snapshot_bytes(self.competition.id)
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_ranking_snapshot_bytes(self.competition.id), (version, payload))
+            self.assertEqual(get_ranking_snapshot_bytes(str(self.competition.id))[0], version)
+        
+        self.assertEqual(len(queries.captured_queries), 0)
+        self.assertIsInstance(payload, bytes)
+    
+    def test_recalculation_creates_new_version(self):
+        """El recálculo invalida el ranking en caché al confirmarse"""
+        from .services import update_participant_rankings
+        from .snapshots import get_ranking_snapshot
+        
+        before = get_ranking_snapshot(self.competition.id)
+        participant = self.participants[-1]
+        for judge in self.judges:
+            for parameter in self.parameters:
+                self.score(participant, judge, parameter, 10)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            update_participant_rankings(self.competition.id)
+            self.assertEqual(get_ranking_snapshot(self.competition.id)['version'], before['version'])
+        
+        after = get_ranking_snapshot(self.competition.id)
+        self.assertNotEqual(after['version'], before['version'])
+        self.assertEqual(after['rankings'][0]['participant_id'], participant.id)
+    
+    def test_rider_horse_and_category_changes_refresh_names(self):
+        """Editar jinete, caballo o categoría crea una nueva versión con los nombres actuales"""
+        from .snapshots import get_ranking_snapshot
+        
+        participant = self.participants[0]
+        
+        def row():
+            snapshot = get_ranking_snapshot(self.competition.id)
+            return snapshot['version'], next(
+                row for row in snapshot['rankings'] if row['participant_id'] == participant.id
+            )
+        
+        for instance, field, value, read in (
+            (participant.rider, 'last_name', 'Renombrado', lambda r: r['rider']['last_name']),
+            (participant.horse, 'name', 'Relámpago', lambda r: r['horse']['name']),
+            (participant.category, 'name', 'Juveniles', lambda r: r['category']['name']),
+        ):
+            version, _ = row()
+            setattr(instance, field, value)
+            with self.captureOnCommitCallbacks(execute=True):
+                instance.save()
+            
+            new_version, ranking = row()
+            self.assertNotEqual(new_version, version)
+            self.assertEqual(read(ranking), value)
+    
+    def test_rest_list_matches_serializer(self):
+        """La lista REST servida desde caché coincide con la serialización directa"""
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        url = reverse('competition-rankings', args=[self.competition.id])
+        
+        cached = client.get(url, secure=True).json()
+        direct = client.get(url, {'ordering': 'position'}, secure=True).json()
+        
+        self.assertEqual(cached['count'], 3)
+        self.assertEqual(cached['results'], direct['results'])
+    
+    def test_websocket_notification_uses_snapshot(self):
+        """La notificación WebSocket usa el ranking en caché"""
+        from .consumers import notify_rankings_update
+        from .snapshots import get_ranking_snapshot
+        
+        expected = get_ranking_snapshot(self.competition.id)['rankings']
+        with mock.patch('channels.layers.InMemoryChannelLayer.group_send') as group_send:
+            notify_rankings_update(self.competition.id)
+        
+        frame = json.loads(group_send.call_args[0][1]['text'])
+        self.assertEqual(frame['type'], 'rankings_update')
+        self.assertEqual(frame['rankings'], expected)
+
+
+class BroadcastFrameTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from .services import update_participant_rankings
+        
+        self.create_competition_data()
+        self.score_all(seed=17)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_participant_rankings(self.competition.id)
+    
+    def test_frame_is_encoded_once_per_version(self):
+        """El mensaje codificado se reutiliza mientras no cambie la versión"""
+        from .snapshots import get_ranking_frame, get_ranking_snapshot
+        
+        frame = get_ranking_frame(self.competition.id)
+        
+        with mock.patch('judging.snapshots.json.dumps') as dumps:
+            self.assertEqual(get_ranking_frame(self.competition.id), frame)
+        dumps.assert_not_called()
+        
+        decoded = json.loads(frame)
+        self.assertEqual(decoded['type'], 'rankings_update')
+        self.assertEqual(decoded['rankings'], get_ranking_snapshot(self.competition.id)['rankings'])
+    
+    def test_consumer_forwards_encoded_text(self):
+        """El consumidor reenvía el texto recibido sin volver a serializarlo"""
+        from asgiref.sync import async_to_sync
+        from .consumers import RankingConsumer
+        from .snapshots import get_ranking_frame
+        
+        frame = get_ranking_frame(self.competition.id)
+        consumer = RankingConsumer()
+        consumer.send = mock.AsyncMock()
+        
+        with mock.patch('judging.consumers.json.dumps') as dumps:
+            async_to_sync(consumer.rankings_update)({'type': 'rankings_update', 'text': frame})
+        
+        dumps.assert_not_called()
+        consumer.send.assert_awaited_once_with(text_data=frame)
+    
+    def test_benchmark_command_runs(self):
+        """El benchmark de difusión compara ambos modos"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        out = StringIO()
+        call_command('benchmark_broadcast', consumers='1,5', participants=3, repeat=1, stdout=out)
+        
+        self.assertIn('Precodificado', out.getvalue())
+
+
+class RankingDeltaProtocolTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from . import pipeline
+        from .services import update_participant_rankings
+        
+        self.create_competition_data()
+        self.score_all(seed=17)
+        # Las difusiones se ejecutan explícitamente en cada prueba
+        with mock.patch('judging.consumers.notify_rankings_update'), \
+                self.captureOnCommitCallbacks(execute=True):
+            update_participant_rankings(self.competition.id)
+        pipeline._local.batch = None
+    
+    def broadcast(self):
+        from .consumers import notify_rankings_update
+        
+        with mock.patch('channels.layers.InMemoryChannelLayer.group_send') as group_send:
+            notify_rankings_update(self.competition.id)
+        return json.loads(group_send.call_args[0][1]['text'])
+    
+    def test_first_broadcast_is_full(self):
+        """La primera difusión envía el ranking completo con su versión"""
+        from .snapshots import get_ranking_snapshot
+        
+        frame = self.broadcast()
+        snapshot = get_ranking_snapshot(self.competition.id)
+        
+        self.assertEqual(frame['type'], 'rankings_update')
+        self.assertEqual(frame['version'], snapshot['version'])
+        self.assertEqual(len(frame['rankings']), 3)
+    
+    def test_delta_contains_only_changed_rows(self):
+        """Tras un recálculo solo se envían las filas modificadas"""
+        from . import pipeline
+        from .models import Ranking
+        from .services import update_participant_rankings
+        
+        first = self.broadcast()
+        
+        # Bajar la nota del último clasificado: no cambia ninguna otra fila
+        last = Ranking.objects.filter(competition=self.competition).order_by('-position').first()
+        self.score(last.participant, self.judges[0], self.parameters[0], 0)
+        self.score(last.participant, self.judges[1], self.parameters[0], 0)
+        pipeline._local.batch = None
+        with mock.patch('judging.consumers.notify_rankings_update'), \
+                self.captureOnCommitCallbacks(execute=True):
+            update_participant_rankings(self.competition.id)
+        
+        delta = self.broadcast()
+        
+        self.assertEqual(delta['type'], 'rankings_delta')
+        self.assertEqual(delta['base_version'], first['version'])
+        self.assertGreater(delta['version'], first['version'])
+        self.assertEqual([row['participant_id'] for row in delta['changed']], [last.participant_id])
+        self.assertEqual(delta['removed'], [])
+    
+    def test_build_delta_reports_removed_participants(self):
+        """Los participantes que desaparecen del ranking se informan como eliminados"""
+        from .snapshots import build_ranking_delta, row_fingerprint
+        
+        rows = [{'participant_id': 1, 'position': 1, 'average': 8.0, 'percentage': 80.0}]
+        previous = {'1': row_fingerprint(rows[0]), '2': row_fingerprint({'participant_id': 2})}
+        
+        self.assertEqual(build_ranking_delta(previous, rows), ([], [2]))
+    
+    def test_delta_includes_rows_with_changed_names(self):
+        """Un cambio de nombre (sin cambio de puntaje) llega a los clientes en el delta"""
+        first = self.broadcast()
+        
+        participant = self.participants[1]
+        participant.rider.last_name = 'Renombrado'
+        with self.captureOnCommitCallbacks(execute=True):
+            participant.rider.save()
+        
+        delta = self.broadcast()
+        
+        self.assertEqual(delta['type'], 'rankings_delta')
+        self.assertEqual(delta['base_version'], first['version'])
+        self.assertEqual([row['participant_id'] for row in delta['changed']], [participant.id])
+        self.assertEqual(delta['changed'][0]['rider']['last_name'], 'Renombrado')
+
+
+# Ventana larga: las pruebas envían los lotes con flush()
+@override_settings(SCORE_BROADCAST_WINDOW=60)
+class ScoreStreamTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from . import pipeline
+        
+        self.create_competition_data()
+        self.score_all(seed=19)
+        pipeline._local.batch = None
+    
+    def tearDown(self):
+        from .score_stream import score_broadcaster
+        score_broadcaster.flush()
+    
+    def test_connect_joins_participant_group(self):
+        """El consumidor se une al grupo del participante y envía sus calificaciones"""
+        from asgiref.sync import async_to_sync
+        from .consumers import ScoreConsumer
+        
+        participant = self.participants[0]
+        consumer = ScoreConsumer()
+        consumer.scope = {'url_route': {'kwargs': {
+            'competition_id': str(self.competition.id), 'participant_id': str(participant.id)
+        }}}
+        consumer.channel_name = 'test.channel'
+        consumer.channel_layer = mock.Mock(group_add=mock.AsyncMock())
+        consumer.accept = mock.AsyncMock()
+        consumer.send = mock.AsyncMock()
+        
+        async_to_sync(consumer.connect)()
+        
+        consumer.channel_layer.group_add.assert_awaited_once_with(
+            f'scores_{self.competition.id}_{participant.id}', 'test.channel'
+        )
+        message = json.loads(consumer.send.call_args.kwargs['text_data'])
+        self.assertEqual(message['type'], 'current_scores')
+        self.assertEqual(message['participant_id'], participant.id)
+        self.assertEqual(len(message['scores']), len(self.judges))
+    
+    def test_scorecard_is_sent_as_one_frame(self):
+        """Una hoja completa llega al grupo del participante en un solo mensaje"""
+        from .score_stream import score_broadcaster
+        
+        participant = self.participants[1]
+        judge = self.judges[0]
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            for parameter in self.parameters:
+                self.score(participant, judge, parameter, 4)
+        
+        with mock.patch('channels.layers.InMemoryChannelLayer.group_send') as group_send:
+            score_broadcaster.flush(self.competition.id)
+        
+        self.assertEqual(group_send.call_count, 1)
+        group, event = group_send.call_args[0]
+        frame = json.loads(event['text'])
+        
+        self.assertEqual(group, f'scores_{self.competition.id}_{participant.id}')
+        self.assertEqual(frame['type'], 'scores_update')
+        self.assertEqual(len(frame['scores']), len(self.parameters))
+        self.assertTrue(all(score['value'] == 4 for score in frame['scores']))
+    
+    def test_window_merges_separate_transactions(self):
+        """Los cambios de varias transacciones dentro de la ventana se agrupan"""
+        from .score_stream import score_broadcaster
+        
+        participant = self.participants[2]
+        for judge in self.judges:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.score(participant, judge, self.parameters[0], 3)
+        
+        with mock.patch('channels.layers.InMemoryChannelLayer.group_send') as group_send:
+            score_broadcaster.flush(self.competition.id)
+        
+        self.assertEqual(group_send.call_count, 1)
+        frame = json.loads(group_send.call_args[0][1]['text'])
+        self.assertEqual({score['judge_id'] for score in frame['scores']}, {judge.id for judge in self.judges})
+
+
+class JudgeScoreSocketTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from . import pipeline
+        
+        self.create_competition_data()
+        pipeline._local.batch = None
+    
+    def run_session(self, user, messages=()):
+        """Conecta, envía los mensajes y devuelve (conectado, código, respuestas)"""
+        from asgiref.sync import async_to_sync
+        from asgiref.testing import ApplicationCommunicator
+        from channels.routing import URLRouter
+        from rest_framework.authtoken.models import Token
+        from .middleware import TokenAuthMiddlewareStack
+        from .routing import websocket_urlpatterns
+        
+        query = b''
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            query = f'token={token.key}'.encode()
+        
+        scope = {
+            'type': 'websocket', 'path': f'/ws/judging/{self.competition.id}/',
+            'query_string': query, 'headers': [], 'subprotocols': []
+        }
+        application = TokenAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+        
+        async def session():
+            communicator = ApplicationCommunicator(application, scope)
+            await communicator.send_input({'type': 'websocket.connect'})
+            response = await communicator.receive_output(timeout=5)
+            if response['type'] == 'websocket.close':
+                return False, response.get('code'), []
+            
+            replies = []
+            for message in messages:
+                await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps(message)})
+                replies.append(json.loads((await communicator.receive_output(timeout=5))['text']))
+            
+            await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await communicator.wait(timeout=5)
+            return True, None, replies
+        
+        return async_to_sync(session)()
+    
+    def test_rejects_anonymous_and_unassigned_users(self):
+        """Sin token o sin asignación la conexión se rechaza"""
+        from django.contrib.auth import get_user_model
+        
+        outsider = get_user_model().objects.create_user(
+            email='otro@apsan.org', password='test123',
+            first_name='Otro', last_name='Juez', role='judge'
+        )
+        
+        self.assertEqual(self.run_session(None)[:2], (False, 4401))
+        self.assertEqual(self.run_session(outsider)[:2], (False, 4403))
+    
+    def test_assigned_judge_gets_ack(self):
+        """El juez asignado recibe la confirmación con la calificación guardada"""
+        from .models import Score
+        
+        judge = self.judges[0]
+        participant = self.participants[0]
+        parameter = self.parameters[1]
+        
+        connected, _, replies = self.run_session(judge, [
+            {'type': 'score_update', 'request_id': 1, 'participant_id': participant.id,
+             'parameter_id': parameter.parameter_id, 'value': 7.5},
+            {'type': 'score_update', 'request_id': 2, 'participant_id': participant.id,
+             'parameter_id': 9999, 'value': 7.5},
+        ])
+        
+        self.assertTrue(connected)
+        ack, error = replies
+        self.assertEqual((ack['type'], ack['request_id']), ('score_ack', 1))
+        self.assertEqual(ack['score']['value'], 7.5)
+        self.assertEqual((error['type'], error['request_id']), ('score_error', 2))
+        
+        score = Score.objects.get(id=ack['score']['id'])
+        self.assertEqual((score.judge_id, score.participant_id), (judge.id, participant.id))
+    
+    def test_completed_competition_rejects_scores(self):
+        """Con la competencia finalizada el WebSocket rechaza las calificaciones"""
+        from .models import Score
+        
+        self.competition.status = 'completed'
+        self.competition.save()
+        
+        _, _, replies = self.run_session(self.judges[0], [
+            {'type': 'score_update', 'request_id': 1, 'participant_id': self.participants[0].id,
+             'parameter_id': self.parameters[0].parameter_id, 'value': 7},
+        ])
+        self.assertEqual(replies[0]['type'], 'score_error')
+        self.assertIn('finalizada', replies[0]['message'])
+        self.assertFalse(Score.objects.exists())
+    
+    def test_value_is_checked_against_effective_max_value(self):
+        """El límite es el valor máximo efectivo del parámetro (personalizado en la competencia)"""
+        parameter = self.parameters[0]
+        parameter.custom_max_value = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            parameter.save()
+        
+        def update(request_id, value):
+            return {'type': 'score_update', 'request_id': request_id, 'participant_id': self.participants[0].id,
+                    'parameter_id': parameter.parameter_id, 'value': value}
+        
+        _, _, replies = self.run_session(self.judges[0], [update(1, 7), update(2, 5)])
+        self.assertEqual([reply['type'] for reply in replies], ['score_error', 'score_ack'])
+        self.assertIn('entre 0 y 5', replies[0]['message'])
+
+
+class JudgeAssignmentCacheTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        self.create_competition_data()
+    
+    def test_lookup_is_cached(self):
+        """Tras la primera consulta las comprobaciones no acceden a la base de datos"""
+        from competitions.assignments import is_assigned_judge, is_head_judge
+        
+        judge = self.judges[0]
+        with self.assertNumQueries(1):
+            self.assertTrue(is_assigned_judge(self.competition.id, judge.id))
+        
+        with self.assertNumQueries(0):
+            self.assertTrue(is_assigned_judge(str(self.competition.id), judge.id))
+            self.assertFalse(is_assigned_judge(self.competition.id, self.admin.id))
+            self.assertFalse(is_head_judge(self.competition.id, judge.id))
+    
+    def test_changes_invalidate_cache(self):
+        """Guardar o eliminar una asignación invalida la caché de la competencia"""
+        from competitions.assignments import is_assigned_judge, is_head_judge
+        from competitions.models import CompetitionJudge
+        
+        judge, other = self.judges
+        self.assertTrue(is_assigned_judge(self.competition.id, judge.id))
+        
+        CompetitionJudge.objects.filter(competition=self.competition, judge=judge).delete()
+        assignment = CompetitionJudge.objects.get(competition=self.competition, judge=other)
+        assignment.is_head_judge = True
+        assignment.save()
+        
+        self.assertFalse(is_assigned_judge(self.competition.id, judge.id))
+        self.assertTrue(is_head_judge(self.competition.id, other.id))
+    
+    def test_permission_uses_cache(self):
+        """IsAssignedJudgeOrAdmin no consulta las asignaciones en cada petición"""
+        from competitions.assignments import is_assigned_judge
+        from .views import IsAssignedJudgeOrAdmin
+        
+        judge = self.judges[0]
+        request = mock.Mock(user=judge)
+        view = mock.Mock(kwargs={'competition_id': self.competition.id})
+        is_assigned_judge(self.competition.id, judge.id)
+        
+        with self.assertNumQueries(0):
+            self.assertTrue(IsAssignedJudgeOrAdmin().has_permission(request, view))
+
+
+class ScoreCardReadTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        
+        self.create_competition_data()
+        self.score_all(seed=23)
+        
+        self.participant = self.participants[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.judges[0])
+        self.url = reverse('judge-scorecard', args=[self.competition.id, self.participant.id])
+        self.query = {'judge_id': [judge.id for judge in self.judges]}
+    
+    def get(self, **headers):
+        return self.client.get(self.url, self.query, secure=True, **headers)
+    
+    def test_all_judges_in_constant_queries(self):
+        """Las calificaciones de todos los jueces se leen con una consulta"""
+        self.get()
+        
+        # Participante (con relaciones) y calificaciones; asignaciones y parámetros en caché
+        with self.assertNumQueries(2):
+            response = self.get()
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data['scores']), {str(judge.id) for judge in self.judges})
+        self.assertTrue(all(len(scores) == len(self.parameters) for scores in data['scores'].values()))
+        self.assertEqual(len(data['parameters']), len(self.parameters))
+        self.assertEqual(data['participant']['rider_details']['last_name'], '0')
+    
+    def test_etag_returns_not_modified_until_scores_change(self):
+        """If-None-Match devuelve 304 hasta que cambia una calificación"""
+        etag = self.get()['ETag']
+        
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        self.score(self.participant, self.judges[1], self.parameters[0], 0)
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_category_change_invalidates_etag(self):
+        """Renombrar la categoría del participante invalida el ETag"""
+        etag = self.get()['ETag']
+        
+        category = self.participant.category
+        category.name = 'Renombrada'
+        category.save()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_parameter_change_invalidates_cache(self):
+        """Modificar un parámetro de la competencia renueva la lista en caché"""
+        self.get()
+        
+        parameter = self.parameters[0]
+        parameter.custom_coefficient = 5
+        parameter.save()
+        
+        coefficients = {item['id']: item['coefficient'] for item in self.get().json()['parameters']}
+        self.assertEqual(coefficients[parameter.parameter_id], 5)
+
+
+class ConditionalGetTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from .services import update_participant_rankings
+        
+        self.create_competition_data()
+        self.score_all(seed=29)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_participant_rankings(self.competition.id)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+    
+    def assert_not_modified(self, url, queries=None):
+        """Devuelve el ETag tras comprobar que una segunda petición recibe 304"""
+        etag = self.client.get(url, secure=True)['ETag']
+        
+        if queries is None:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, secure=True)
+        else:
+            with self.assertNumQueries(queries):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, secure=True)
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        return etag
+    
+    def test_rankings_not_modified_without_queries(self):
+        """Las vistas de rankings responden 304 desde la versión en caché"""
+        from django.urls import reverse
+        from .snapshots import bump_ranking_version
+        
+        participant = self.participants[0]
+        urls = [
+            reverse('competition-rankings', args=[self.competition.id]),
+            reverse('competition-rankings', args=[self.competition.id]) + '?ordering=-percentage',
+            reverse('participant-ranking', args=[self.competition.id, participant.id]),
+        ]
+        etags = [self.assert_not_modified(url, queries=0) for url in urls]
+        self.assertEqual(len(set(etags)), len(urls))
+        
+        bump_ranking_version(self.competition.id)
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, secure=True)
+            self.assertEqual(response.status_code, 200)
+    
+    def test_competition_rankings_view(self):
+        """competition_rankings responde 304 con el ETag vigente"""
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from .views import competition_rankings
+        
+        def get(**headers):
+            request = APIRequestFactory().get('/', **headers)
+            force_authenticate(request, self.admin)
+            return competition_rankings(request, self.competition.id)
+        
+        etag = get()['ETag']
+        self.assertEqual(get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+    
+    def test_parameters_and_participants(self):
+        """Parámetros y participantes cambian de ETag al modificarse"""
+        from django.urls import reverse
+        
+        parameters_url = reverse('competition-parameters', args=[self.competition.id])
+        participants_url = reverse('competition_participants', args=[self.competition.id])
+        
+        parameters_etag = self.assert_not_modified(parameters_url, queries=0)
+        participants_etag = self.assert_not_modified(participants_url)
+        
+        parameter = self.parameters[0]
+        parameter.order = 9
+        parameter.save()
+        participant = self.participants[0]
+        participant.is_withdrawn = True
+        participant.save()
+        
+        response = self.client.get(parameters_url, HTTP_IF_NONE_MATCH=parameters_etag, secure=True)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(participants_url, HTTP_IF_NONE_MATCH=participants_etag, secure=True)
+        self.assertEqual(response.status_code, 200)
+
+
+class RankingEventStreamTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from .services import update_participant_rankings
+        
+        self.create_competition_data()
+        self.score_all(seed=31)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_participant_rankings(self.competition.id)
+    
+    def run_stream(self, headers=(), group_messages=()):
+        """Abre el stream, difunde los mensajes al grupo y devuelve (cabeceras, bloques, grupos restantes)"""
+        from asgiref.sync import async_to_sync
+        from asgiref.testing import ApplicationCommunicator
+        from channels.layers import get_channel_layer
+        from channels.routing import URLRouter
+        from .routing import http_urlpatterns
+        
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': f'/sse/rankings/{self.competition.id}/',
+            'query_string': b'', 'headers': list(headers)
+        }
+        group_name = f'rankings_{self.competition.id}'
+        
+        async def session():
+            channel_layer = get_channel_layer()
+            communicator = ApplicationCommunicator(URLRouter(http_urlpatterns), scope)
+            await communicator.send_input({'type': 'http.request', 'body': b''})
+            start = await communicator.receive_output(timeout=5)
+            chunks = [(await communicator.receive_output(timeout=5))['body']]
+            
+            for message in group_messages:
+                await channel_layer.group_send(group_name, message)
+                chunks.append((await communicator.receive_output(timeout=5))['body'])
+            
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(timeout=5)
+            return dict(start['headers']), chunks, channel_layer.groups.get(group_name, {})
+        
+        return async_to_sync(session)()
+    
+    def test_initial_snapshot_and_resume(self):
+        """El primer evento lleva la versión; con Last-Event-ID vigente no se reenvía"""
+        from .snapshots import get_ranking_version
+        
+        version = get_ranking_version(self.competition.id)
+        
+        headers, chunks, _ = self.run_stream()
+        self.assertEqual(headers[b'content-type'], b'text/event-stream')
+        event = chunks[0].decode()
+        self.assertIn(f'id: {version}\n', event)
+        data = json.loads(event.split('data: ', 1)[1])
+        self.assertEqual(data['type'], 'current_rankings')
+        self.assertEqual(len(data['rankings']), len(self.participants))
+        
+        _, chunks, _ = self.run_stream(headers=[(b'last-event-id', str(version).encode())])
+        self.assertNotIn(b'data: ', chunks[0])
+        
+        # Con una versión vencida (hueco) se reenvía el ranking completo
+        _, chunks, _ = self.run_stream(headers=[(b'last-event-id', str(version - 1).encode())])
+        data = json.loads(chunks[0].decode().split('data: ', 1)[1])
+        self.assertEqual(data['type'], 'current_rankings')
+    
+    @override_settings(CORS_ALLOWED_ORIGINS=['https://pantalla.apsan.org'], CORS_ALLOW_CREDENTIALS=True)
+    def test_cors_headers_follow_api_settings(self):
+        """El stream usa los orígenes permitidos de django-cors-headers, también en el preflight"""
+        from asgiref.sync import async_to_sync
+        from asgiref.testing import ApplicationCommunicator
+        from channels.routing import URLRouter
+        from .routing import http_urlpatterns
+        
+        headers, _, _ = self.run_stream(headers=[(b'origin', b'https://pantalla.apsan.org')])
+        self.assertEqual(headers[b'access-control-allow-origin'], b'https://pantalla.apsan.org')
+        self.assertEqual(headers[b'access-control-allow-credentials'], b'true')
+        
+        headers, _, _ = self.run_stream(headers=[(b'origin', b'https://otro.example')])
+        self.assertNotIn(b'access-control-allow-origin', headers)
+        
+        async def preflight():
+            communicator = ApplicationCommunicator(URLRouter(http_urlpatterns), {
+                'type': 'http', 'method': 'OPTIONS', 'path': f'/sse/rankings/{self.competition.id}/',
+                'query_string': b'', 'headers': [(b'origin', b'https://pantalla.apsan.org')]
+            })
+            await communicator.send_input({'type': 'http.request', 'body': b''})
+            start = await communicator.receive_output(timeout=5)
+            await communicator.receive_output(timeout=5)
+            return start
+        
+        start = async_to_sync(preflight)()
+        headers = dict(start['headers'])
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(headers[b'access-control-allow-origin'], b'https://pantalla.apsan.org')
+        self.assertIn(b'last-event-id', headers[b'access-control-allow-headers'])
+    
+    def test_forwards_group_messages(self):
+        """Los mensajes del grupo se reenvían con su versión y el canal se libera al desconectar"""
+        frame = json.dumps({'type': 'rankings_delta', 'version': 8})
+        
+        _, chunks, remaining = self.run_stream(group_messages=[
+            {'type': 'rankings_update', 'text': frame, 'version': 8}
+        ])
+        
+        self.assertEqual(chunks[1], f'id: 8\ndata: {frame}\n\n'.encode())
+        self.assertEqual(remaining, {})
+
+
+class RankingTraceTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from .tracing import ranking_tracer
+        
+        self.create_competition_data()
+        self.score_all(seed=37)
+        ranking_tracer.reset_metrics()
+    
+    def test_no_output_without_trace(self):
+        """Sin traza activada no se imprime ni se registra nada, pero se miden las fases"""
+        from .services import calculate_final_ranking, update_participant_rankings
+        from .tracing import ranking_tracer
+        
+        with mock.patch('builtins.print') as mocked_print, self.assertNoLogs('judging.tracing', 'INFO'):
+            calculate_final_ranking(self.competition.id, self.participants[0].id)
+            update_participant_rankings(self.competition.id)
+        
+        mocked_print.assert_not_called()
+        metrics = ranking_tracer.get_metrics()
+        self.assertEqual(set(metrics), {'load', 'compute', 'persist', 'sync'})
+        self.assertEqual(metrics['compute']['count'], 1)
+    
+    def test_trace_toggle_per_competition(self):
+        """La traza activada registra los mensajes y cada fase con su duración"""
+        from .services import update_participant_rankings
+        from .tracing import disable_ranking_trace, enable_ranking_trace
+        
+        enable_ranking_trace(self.competition.id)
+        with self.assertLogs('judging.tracing', 'INFO') as logs:
+            update_participant_rankings(self.competition.id)
+        
+        phases = [record.phase for record in logs.records if hasattr(record, 'phase')]
+        self.assertEqual(phases, ['load', 'compute', 'persist', 'sync'])
+        self.assertTrue(all(record.competition_id == self.competition.id for record in logs.records))
+        
+        disable_ranking_trace(self.competition.id)
+        with self.assertNoLogs('judging.tracing', 'INFO'):
+            update_participant_rankings(self.competition.id)
+
+
+class JudgeAggregateTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        self.create_competition_data()
+        self.score_all(seed=41)
+    
+    def test_maintained_on_save_and_delete(self):
+        """Crear, editar, mover y eliminar calificaciones mantiene los agregados"""
+        from .aggregates import check_judge_aggregates
+        from .models import JudgeParticipantAggregate, Score
+        
+        self.assertEqual(check_judge_aggregates(self.competition.id), [])
+        self.assertEqual(
+            JudgeParticipantAggregate.objects.filter(competition=self.competition).count(),
+            len(self.participants) * len(self.judges)
+        )
+        
+        participant, judge = self.participants[0], self.judges[0]
+        self.score(participant, judge, self.parameters[0], 2.5)
+        
+        score = Score.objects.filter(participant=self.participants[1], judge=judge).first()
+        score.participant = self.participants[2]
+        score.parameter = self.parameters[2]
+        Score.objects.filter(
+            participant=self.participants[2], judge=judge, parameter=self.parameters[2]
+        ).delete()
+        score.save()
+        
+        Score.objects.filter(participant=participant, judge=self.judges[1]).first().delete()
+        self.assertEqual(check_judge_aggregates(self.competition.id), [])
+    
+    def test_rankings_read_aggregates(self):
+        """El recálculo completo no recorre la tabla de calificaciones"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .services import calculate_competition_rankings, compare_judge_scores
+        
+        with CaptureQueriesContext(connection) as queries:
+            rankings = calculate_competition_rankings(self.competition.id)
+        self.assertEqual(len(rankings), len(self.participants))
+        self.assertFalse(any('judging_score' in query['sql'] for query in queries.captured_queries))
+        
+        participant = self.participants[0]
+        judges = compare_judge_scores(self.competition.id, participant.id)['judges']
+        for judge_data in judges:
+            scores = participant.scores.filter(judge_id=judge_data['id'])
+            self.assertEqual(judge_data['scores_count'], scores.count())
+            self.assertEqual(judge_data['total'], float(sum(s.calculated_result for s in scores)))
+    
+    def test_rebuild_command(self):
+        """El comando detecta diferencias y reconstruye la tabla"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from .aggregates import check_judge_aggregates
+        from .models import JudgeParticipantAggregate
+        
+        JudgeParticipantAggregate.objects.filter(competition=self.competition).first().delete()
+        JudgeParticipantAggregate.objects.filter(competition=self.competition).update(total=0)
+        
+        with self.assertRaises(CommandError):
+            call_command('rebuild_judge_aggregates', '--check', stdout=StringIO())
+        
+        call_command('rebuild_judge_aggregates', competition=self.competition.id, stdout=StringIO())
+        self.assertEqual(check_judge_aggregates(self.competition.id), [])
+
+
+class ResultsExportTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        import tempfile
+        from rest_framework.test import APIClient
+        from .services import update_participant_rankings
+        
+        self.create_competition_data()
+        self.score_all(seed=43)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_participant_rankings(self.competition.id)
+        
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        media = override_settings(MEDIA_ROOT=self.media_root.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+    
+    def get_export(self, file_format):
+        from django.urls import reverse
+        
+        url = reverse('export-results', args=[self.competition.id, file_format])
+        return self.client.get(url, secure=True)
+    
+    def test_csv_stream(self):
+        """El CSV se envía en streaming con una fila por participante y la matriz de calificaciones"""
+        import csv
+        import io
+        from .models import Ranking, Score
+        
+        response = self.get_export('csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        header, *rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(len(header), 5 + len(self.judges) * (len(self.parameters) + 1) + 2)
+        self.assertEqual(len(rows), len(self.participants))
+        
+        first = Ranking.objects.get(competition=self.competition, position=1)
+        self.assertEqual(rows[0][1], str(first.participant.number))
+        score = Score.objects.get(
+            participant=first.participant, judge=self.judges[0], parameter=self.parameters[0]
+        )
+        self.assertEqual(rows[0][5], str(score.value))
+    
+    def test_xlsx_stream(self):
+        """El XLSX es un ZIP válido con la hoja de resultados"""
+        import io
+        import zipfile
+        from xml.etree import ElementTree
+        
+        response = self.get_export('xlsx')
+        self.assertEqual(response.status_code, 200)
+        
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        namespace = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+        self.assertEqual(len(sheet.findall(f'{namespace}sheetData/{namespace}row')), len(self.participants) + 1)
+        
+        self.assertEqual(self.get_export('pdf').status_code, 400)
+    
+    async def test_asgi_export_streams_asynchronously(self):
+        """Bajo ASGI el contenido es un iterador asíncrono que se consume bloque a bloque"""
+        import csv
+        import io
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncClient
+        from django.urls import reverse
+        from rest_framework.authtoken.models import Token
+        
+        token, _ = await sync_to_async(Token.objects.get_or_create)(user=self.admin)
+        response = await AsyncClient().get(
+            reverse('export-results', args=[self.competition.id, 'csv']),
+            secure=True, headers={'authorization': f'Token {token.key}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(len(rows), len(self.participants) + 1)
+        
+        # Cada bloque se envía antes de generar el siguiente (sin acumular el archivo)
+        produced = []
+        
+        def iter_export(competition_id, file_format):
+            for i in range(3):
+                produced.append(i)
+                yield str(i).encode()
+        
+        with mock.patch('judging.exports.iter_export', iter_export):
+            response = await AsyncClient().get(
+                reverse('export-results', args=[self.competition.id, 'csv']),
+                secure=True, headers={'authorization': f'Token {token.key}'}
+            )
+            seen = [(chunk, len(produced)) async for chunk in response.streaming_content]
+        self.assertEqual(seen, [(b'0', 1), (b'1', 2), (b'2', 3)])
+    
+    def test_viewers_cannot_export(self):
+        """La exportación incluye las calificaciones de cada juez: solo administradores y jueces"""
+        from django.contrib.auth import get_user_model
+        
+        viewer = get_user_model().objects.create_user(
+            email='publico@apsan.org', password='test123',
+            first_name='Público', last_name='General', role='viewer'
+        )
+        self.client.force_authenticate(viewer)
+        self.assertEqual(self.get_export('csv').status_code, 403)
+        
+        self.client.force_authenticate(self.judges[0])
+        self.assertEqual(self.get_export('csv').status_code, 200)
+    
+    def test_completed_competition_serves_cached_file(self):
+        """Una competencia finalizada se sirve desde un archivo que se regenera solo si cambian los datos"""
+        self.competition.status = 'completed'
+        self.competition.save()
+        
+        first = b''.join(self.get_export('csv').streaming_content)
+        with mock.patch('judging.exports.iter_export') as iter_export:
+            cached = b''.join(self.get_export('csv').streaming_content)
+        iter_export.assert_not_called()
+        self.assertEqual(first, cached)
+        
+        self.score(self.participants[0], self.judges[0], self.parameters[0], 10)
+        updated = b''.join(self.get_export('csv').streaming_content)
+        self.assertNotEqual(first, updated)
+        
+        import os
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root.name, 'exports', 'results'))), 1)
+
+
+class FinalResultsTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from .services import update_participant_rankings
+        
+        self.create_competition_data(participants=4)
+        self.score_all(seed=31)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_participant_rankings(self.competition.id)
+        
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+    
+    def complete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.competition.status = 'completed'
+            self.competition.save()
+    
+    def test_completion_freezes_results(self):
+        """Al finalizar la competencia se congelan ranking, comparación por juez y parámetros"""
+        from django.urls import reverse
+        from .models import FinalResults, Ranking
+        from .services import compare_judge_scores
+        
+        participant = self.participants[0]
+        rankings_url = reverse('competition-rankings', args=[self.competition.id])
+        live = self.client.get(rankings_url, secure=True).json()['results']
+        comparison = compare_judge_scores(self.competition.id, participant.id)
+        
+        self.complete()
+        final = FinalResults.objects.get(competition=self.competition)
+        self.assertEqual(len(final.data['rankings']), len(self.participants))
+        
+        # Los cambios posteriores no alteran los resultados servidos
+        Ranking.objects.filter(competition=self.competition).update(percentage=0)
+        
+        response = self.client.get(rankings_url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertEqual(
+            [row['percentage'] for row in response.json()['results']],
+            [row['percentage'] for row in live]
+        )
+        with self.assertNumQueries(0):
+            response = self.client.get(rankings_url, HTTP_IF_NONE_MATCH=response['ETag'], secure=True)
+        self.assertEqual(response.status_code, 304)
+        
+        ordered = self.client.get(rankings_url + '?ordering=-average_score', secure=True).json()['results']
+        self.assertEqual(
+            [row['average_score'] for row in ordered],
+            sorted((row['average_score'] for row in live), reverse=True)
+        )
+        
+        detail = self.client.get(reverse('participant-ranking', args=[self.competition.id, participant.id]), secure=True)
+        self.assertEqual(detail.json()['participant'], participant.id)
+        
+        frozen = self.client.get(reverse('compare-judges', args=[self.competition.id, participant.id]), secure=True).json()
+        self.assertEqual(
+            [(judge['id'], judge['total'], judge['average']) for judge in frozen['judges']],
+            [(judge['id'], judge['total'], judge['average']) for judge in comparison['judges']]
+        )
+        self.assertEqual(
+            frozen['judges'][0]['scores'],
+            {str(key): value for key, value in comparison['judges'][0]['scores'].items()}
+        )
+    
+    def test_frozen_competition_is_not_recalculated(self):
+        """recalculate_rankings y force_sync no recalculan resultados congelados"""
+        from django.urls import reverse
+        
+        self.complete()
+        with mock.patch('judging.views.update_participant_rankings') as update:
+            response = self.client.post(reverse('recalculate-rankings', args=[self.competition.id]), secure=True)
+            self.assertEqual(response.status_code, 409)
+            
+            response = self.client.post(reverse('force-sync', args=[self.competition.id]), secure=True)
+            self.assertEqual(response.json()['rankings_count'], len(self.participants))
+        update.assert_not_called()
+    
+    def test_completed_competition_rejects_score_writes(self):
+        """Tras finalizar, la API rechaza guardar o eliminar calificaciones y el ranking no cambia"""
+        from django.urls import reverse
+        from .models import Ranking, Score, SyncTask
+        
+        self.complete()
+        SyncTask.objects.all().delete()
+        rankings = list(Ranking.objects.filter(competition=self.competition).values_list('percentage', flat=True))
+        participant, parameter = self.participants[0], self.parameters[0]
+        score = Score.objects.get(participant=participant, judge=self.judges[0], parameter=parameter)
+        card = {'scores': [{'parameter_id': parameter.parameter_id, 'value': 10}]}
+        
+        responses = [
+            self.client.post(
+                reverse('judge-scorecard', args=[self.competition.id, participant.id]),
+                card, format='json', secure=True
+            ),
+            self.client.post(reverse('score-bulk-submit'), {
+                'competition_id': self.competition.id, 'participant_id': participant.id, **card
+            }, format='json', secure=True),
+            self.client.patch(reverse('score-detail', args=[score.id]), {'value': 10}, format='json', secure=True),
+            self.client.delete(reverse('score-detail', args=[score.id]), secure=True),
+        ]
+        
+        self.assertEqual([response.status_code for response in responses], [400] * 4)
+        self.assertIn('finalizada', responses[0].json()['detail'])
+        score.refresh_from_db()
+        self.assertNotEqual(score.value, 10)
+        self.assertFalse(SyncTask.objects.exists())
+        self.assertEqual(
+            list(Ranking.objects.filter(competition=self.competition).values_list('percentage', flat=True)),
+            rankings
+        )
+    
+    def test_reopening_discards_results(self):
+        """Si la competencia vuelve a estar activa se sirve el ranking en vivo"""
+        import io
+        from django.core.management import CommandError, call_command
+        from django.urls import reverse
+        from .models import FinalResults
+        
+        self.complete()
+        self.competition.status = 'active'
+        self.competition.save()
+        self.assertFalse(FinalResults.objects.exists())
+        
+        response = self.client.post(reverse('recalculate-rankings', args=[self.competition.id]), secure=True)
+        self.assertEqual(response.status_code, 200)
+        
+        with self.assertRaises(CommandError):
+            call_command('freeze_results', self.competition.id, stdout=io.StringIO())
+
+
+class BulkScorecardTests(RankingTestDataMixin, TestCase):
+    def setUp(self):
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        
+        self.create_competition_data(participants=2, judges=1, parameters=30)
+        self.judge = self.judges[0]
+        self.participant = self.participants[0]
+        self.url = reverse('judge-scorecard', args=[self.competition.id, self.participant.id])
+        
+        self.client = APIClient()
+        self.client.force_authenticate(self.judge)
+    
+    def card(self, value):
+        return {'scores': [
+            {'parameter_id': parameter.parameter_id, 'value': str(value(i)), 'comments': ''}
+            for i, parameter in enumerate(self.parameters)
+        ], 'edit_reason': 'Corrección'}
+    
+    def test_card_in_constant_queries_with_one_ranking_pass(self):
+        """Una planilla de 30 parámetros se guarda en menos de 10 consultas y un solo recálculo"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .aggregates import check_judge_aggregates
+        from .bulk_scores import save_scorecard
+        from .models import Score
+        from .scheduler import ranking_scheduler
+        
+        entries = self.card(lambda i: i % 21 / 2)['scores']
+        with mock.patch.object(ranking_scheduler, 'mark_dirty') as mark_dirty:
+            with self.captureOnCommitCallbacks(execute=True):
+                with CaptureQueriesContext(connection) as queries:
+                    scores = save_scorecard(self.competition.id, self.participant.id, self.judge, entries)
+        
+        self.assertLess(len(queries), 10)
+        mark_dirty.assert_called_once_with(self.competition.id, self.participant.id)
+        self.assertEqual(len(scores), len(self.parameters))
+        self.assertEqual(check_judge_aggregates(self.competition.id), [])
+        
+        for score in Score.objects.filter(participant=self.participant).select_related('parameter__parameter'):
+            self.assertEqual(score.calculated_result, score.calculate_result())
+    
+    def test_resubmission_records_edits(self):
+        """Reenviar la planilla actualiza en bloque y registra solo los valores modificados"""
+        from .aggregates import check_judge_aggregates
+        from .models import Score, ScoreEdit
+        
+        response = self.client.post(self.url, self.card(lambda i: 5), format='json', secure=True)
+        self.assertEqual(response.status_code, 200)
+        
+        response = self.client.post(self.url, self.card(lambda i: 8 if i < 3 else 5), format='json', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['scores']), len(self.parameters))
+        self.assertEqual(len(response.json()['scores'][0]['edits']), 1)
+        
+        self.assertEqual(ScoreEdit.objects.count(), 3)
+        self.assertEqual(Score.objects.filter(is_edited=True, edit_reason='Corrección').count(), 3)
+        self.assertEqual(check_judge_aggregates(self.competition.id), [])
+        
+        unknown = self.card(lambda i: 5)
+        unknown['scores'][0]['parameter_id'] = 999999
+        response = self.client.post(self.url, unknown, format='json', secure=True)
+        self.assertEqual(response.status_code, 404)
+    
+    def test_bulk_submit_endpoint(self):
+        """bulk-submit ignora parámetros ajenos y rechaza valores fuera de rango"""
+        from django.urls import reverse
+        from .models import Score
+        
+        # El permiso solo valida la asignación con competition_id en la URL: enviar como administrador
+        self.client.force_authenticate(self.admin)
+        url = reverse('score-bulk-submit')
+        data = {
+            'competition_id': self.competition.id,
+            'participant_id': self.participant.id,
+            'scores': self.card(lambda i: 6)['scores'] + [{'parameter_id': 999999, 'value': 6}]
+        }
+        response = self.client.post(url, data, format='json', secure=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), len(self.parameters))
+        self.assertEqual(Score.objects.filter(participant=self.participant).count(), len(self.parameters))
+        
+        data['scores'] = [{'parameter_id': self.parameters[0].parameter_id, 'value': 11}]
+        self.assertEqual(self.client.post(url, data, format='json', secure=True).status_code, 400)
@@ -0,0 +1,163 @@
+"""
+Trazas del cálculo de rankings.
+Los mensajes de diagnóstico usan logging con formato diferido y solo se emiten
+para las competencias con la traza activada (RANKING_TRACE_COMPETITIONS en
+settings, o enable_ranking_trace en tiempo de ejecución). Cada fase del cálculo
+(load, compute, persist, sync, broadcast) se mide con ranking_span y se acumula
+en métricas por proceso, con la traza activada o no.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Fases del cálculo de rankings
+RANKING_PHASES = ('load', 'compute', 'persist', 'sync', 'broadcast')
+
+# Duración por defecto de la traza activada en tiempo de ejecución (segundos)
+TRACE_TIMEOUT = 60 * 60
+
+
+def _trace_key(competition_id: int) -> str:
+    return f'rankings:{competition_id}:trace'
+
+
+def enable_ranking_trace(competition_id: int, timeout: int = TRACE_TIMEOUT):
+    """
+    Activa la traza de una competencia en todos los procesos (vía caché).
+
+    Args:
+        competition_id: ID de la competencia
+        timeout: Segundos que permanece activa
+    """
+    cache.set(_trace_key(competition_id), True, timeout)
+
+
+def disable_ranking_trace(competition_id: int):
+    """
+    Desactiva la traza de una competencia activada con enable_ranking_trace.
+
+    Args:
+        competition_id: ID de la competencia
+    """
+    cache.delete(_trace_key(competition_id))
+
+
+def is_trace_enabled(competition_id: Optional[int]) -> bool:
+    """
+    Indica si se deben emitir las trazas de una competencia.
+    Si el logger no emite mensajes INFO no se consulta nada más.
+
+    Args:
+        competition_id: ID de la competencia (None si no se conoce)
+
+    Returns:
+        bool: True si la traza está activada
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return False
+
+    configured = getattr(settings, 'RANKING_TRACE_COMPETITIONS', ())
+    if configured == '*':
+        return True
+    if competition_id is None:
+        return False
+    if int(competition_id) in configured:
+        return True
+    return bool(cache.get(_trace_key(competition_id)))
+
+
+def trace(competition_id: Optional[int], message: str, *args):
+    """
+    Registra un mensaje de diagnóstico de una competencia.
+    Los argumentos se formatean solo si la traza está activada.
+
+    Args:
+        competition_id: ID de la competencia (None si no se conoce)
+        message: Mensaje con marcadores de formato de logging (%s)
+        *args: Argumentos del mensaje
+    """
+    if is_trace_enabled(competition_id):
+        logger.info(message, *args, extra={'competition_id': competition_id})
+
+
+class RankingTracer:
+    """
+    Mide la duración de las fases del cálculo de rankings.
+    Acumula cantidad, total y máximo por fase; con la traza activada registra
+    además cada medición.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def span(self, competition_id: Optional[int], phase: str, **fields):
+        """
+        Mide la duración del bloque como una fase del cálculo.
+
+        Args:
+            competition_id: ID de la competencia
+            phase: Fase (ver RANKING_PHASES)
+            **fields: Datos adicionales para la traza (p. ej. participantes)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.record(phase, elapsed)
+
+            if is_trace_enabled(competition_id):
+                logger.info(
+                    "Competencia %s, fase %s: %.2f ms %s",
+                    competition_id, phase, elapsed * 1000, fields,
+                    extra={
+                        'competition_id': competition_id,
+                        'phase': phase,
+                        'duration_ms': elapsed * 1000,
+                        **fields
+                    }
+                )
+
+    def record(self, phase: str, elapsed: float):
+        """Acumula una medición de la fase"""
+        with self._lock:
+            metrics = self._metrics.setdefault(phase, {'count': 0, 'total': 0.0, 'max': 0.0})
+            metrics['count'] += 1
+            metrics['total'] += elapsed
+            metrics['max'] = max(metrics['max'], elapsed)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Devuelve las métricas acumuladas por fase.
+
+        Returns:
+            Dict: {fase: {'count', 'total', 'max', 'average'}} con tiempos en segundos
+        """
+        with self._lock:
+            metrics = {phase: dict(values) for phase, values in self._metrics.items()}
+        for values in metrics.values():
+            values['average'] = values['total'] / values['count']
+        return metrics
+
+    def reset_metrics(self):
+        """Descarta las métricas acumuladas"""
+        with self._lock:
+            self._metrics.clear()
+
+
+# Instancia compartida para usar en el proyecto
+ranking_tracer = RankingTracer()
+
+
+def ranking_span(competition_id: Optional[int], phase: str, **fields):
+    """Mide una fase del cálculo de rankings con el trazador compartido"""
+    return ranking_tracer.span(competition_id, phase, **fields)
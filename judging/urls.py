@@ -40,6 +40,16 @@ urlpatterns = [
          views.recalculate_rankings, 
          name='recalculate-rankings'),
     
+    # Exportación de resultados (csv o xlsx)
+    path('rankings/<int:competition_id>/export/<str:file_format>/',
+         views.export_results,
+         name='export-results'),
+    
+    # Métricas del recálculo agrupado de rankings
+    path('rankings/scheduler-metrics/',
+         views.ranking_scheduler_metrics,
+         name='ranking-scheduler-metrics'),
+    
     # Estadísticas de jueces
     path('statistics/judge/<int:judge_id>/',
          views.judge_statistics,
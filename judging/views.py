@@ -7,10 +7,11 @@ from rest_framework import viewsets, status, permissions, generics, filters
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
 from django.db import transaction
-from django.db.models import Prefetch, Q, Count, Avg
+from django.db.models import Prefetch, Q, Count, Avg, prefetch_related_objects
 import logging
 
 # Importaciones de modelos
@@ -29,15 +30,18 @@ from .serializers import (
 
 # Importaciones de servicios
 from .services import (
-    calculate_parameter_score, update_participant_rankings, 
+    calculate_parameter_score, update_participant_rankings,
     calculate_judge_ranking, calculate_final_ranking,
     calculate_judge_scoring_statistics, compare_judge_scores
 )
 
+from .bulk_scores import save_scorecard
+from .final_results import CompetitionClosed, ensure_scores_editable, final_response, get_final_results
+from .scheduler import ranking_scheduler
+from .snapshots import get_ranking_snapshot
+
 # Importaciones de integración con Firebase
-from .firebase import (
-    sync_scores, sync_participant_scores, sync_rankings
-)
+from .firebase import sync_rankings
 
 from competitions.models import Competition, Participant
 from competitions.serializers import ParticipantSerializer
@@ -67,14 +71,9 @@ class IsAssignedJudgeOrAdmin(permissions.BasePermission):
         if not competition_id:
             return False
         
-        # Verificar si el usuario es juez asignado a la competencia
-        from competitions.models import CompetitionJudge
-        is_assigned = CompetitionJudge.objects.filter(
-            competition_id=competition_id,
-            judge=request.user
-        ).exists()
-        
-        return request.user.is_judge and is_assigned
+        # Verificar si el usuario es juez asignado a la competencia (caché de asignaciones)
+        from competitions.assignments import is_assigned_judge
+        return request.user.is_judge and is_assigned_judge(competition_id, request.user.id)
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -216,20 +215,17 @@ class ScoreViewSet(viewsets.ModelViewSet):
         return queryset
     
     def perform_create(self, serializer):
+        self.ensure_editable(serializer.validated_data['competition'])
         try:
             # El save() ya calcula el resultado automáticamente
-            score = serializer.save(judge=self.request.user)
-            
-            # Actualizar rankings
-            update_participant_rankings(score.competition_id)
-            
-            # Sincronizar con Firebase
-            sync_scores(score.id)
+            # El recálculo del ranking y la sincronización se despachan desde la señal
+            serializer.save(judge=self.request.user)
         except Exception as e:
             logger.error(f"Error al crear calificación: {e}")
             raise
     
     def perform_update(self, serializer):
+        self.ensure_editable(serializer.instance.competition)
         try:
             # Guardar valores anteriores para auditoría
             instance = self.get_object()
@@ -251,18 +247,23 @@ class ScoreViewSet(viewsets.ModelViewSet):
                     edit_reason=serializer.validated_data.get('edit_reason', 'Edición manual')
                 )
             
-            # Guardar cambios
-            score = serializer.save()
-            
-            # Actualizar rankings
-            update_participant_rankings(score.competition_id)
-            
-            # Sincronizar con Firebase
-            sync_scores(score.id)
+            # Guardar cambios (la señal despacha recálculo y sincronización)
+            serializer.save()
         except Exception as e:
             logger.error(f"Error al actualizar calificación: {e}")
             raise
 
+    def perform_destroy(self, instance):
+        self.ensure_editable(instance.competition)
+        super().perform_destroy(instance)
+    
+    def ensure_editable(self, competition):
+        """Rechaza cambios en calificaciones de competencias finalizadas"""
+        try:
+            ensure_scores_editable(competition)
+        except CompetitionClosed as e:
+            raise ValidationError({'detail': str(e)})
+
     @action(detail=False, methods=['post'], url_path='bulk-submit')
     def bulk_submit(self, request):
         """Enviar múltiples calificaciones en una sola operación"""
@@ -288,88 +289,35 @@ class ScoreViewSet(viewsets.ModelViewSet):
         
         # Verificar permisos
         if self.request.user.role != 'admin':
-            from competitions.models import CompetitionJudge
-            is_assigned = CompetitionJudge.objects.filter(
-                competition=competition,
-                judge=self.request.user
-            ).exists()
+            from competitions.assignments import is_assigned_judge
             
-            if not is_assigned:
+            if not is_assigned_judge(competition.id, self.request.user.id):
                 return Response(
                     {"detail": "No está asignado como juez a esta competencia"},
                     status=status.HTTP_403_FORBIDDEN
                 )
         
-        created_scores = []
-        with transaction.atomic():
-            for score_data in scores_data:
-                parameter_id = score_data.get('parameter_id')
-                value = score_data.get('value')
-                comments = score_data.get('comments', '')
-                
-                if not all([parameter_id, value is not None]):
-                    continue
-                
-                try:
-                    parameter = CompetitionParameter.objects.get(
-                        competition=competition,
-                        parameter_id=parameter_id
-                    )
-                except CompetitionParameter.DoesNotExist:
-                    continue
-                
-                # Verificar si ya existe una calificación
-                try:
-                    score = Score.objects.get(
-                        competition=competition,
-                        participant=participant,
-                        judge=self.request.user,
-                        parameter=parameter
-                    )
-                    
-                    # Si hay cambio en el valor, registrar la edición
-                    if float(score.value) != float(value):
-                        previous_value = score.value
-                        previous_result = score.calculated_result
-                        
-                        # Actualizar
-                        score.value = value
-                        score.comments = comments
-                        score.is_edited = True
-                        score.edit_reason = edit_reason
-                        score.save()
-                        
-                        # Crear registro de edición
-                        ScoreEdit.objects.create(
-                            score=score,
-                            editor=self.request.user,
-                            previous_value=previous_value,
-                            previous_result=previous_result,
-                            edit_reason=edit_reason
-                        )
-                    else:
-                        # Solo actualizar comentarios
-                        score.comments = comments
-                        score.save()
-                except Score.DoesNotExist:
-                    # Crear nueva calificación
-                    score = Score.objects.create(
-                        competition=competition,
-                        participant=participant,
-                        judge=self.request.user,
-                        parameter=parameter,
-                        value=value,
-                        comments=comments
-                    )
-                
-                created_scores.append(score)
-            
-            # Actualizar rankings
-            update_participant_rankings(competition.id)
-            
-            # Sincronizar con Firebase
-            sync_participant_scores(competition.id, participant.id, self.request.user.id)
+        try:
+            ensure_scores_editable(competition)
+        except CompetitionClosed as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Entradas incompletas se ignoran; los valores se validan igual que en la planilla
+        entries = [
+            score_data for score_data in scores_data
+            if score_data.get('parameter_id') and score_data.get('value') is not None
+        ]
+        submission = ScoreSubmissionSerializer(data=entries, many=True)
+        submission.is_valid(raise_exception=True)
+        
+        # Parámetros y calificaciones existentes en dos consultas, escritura en bloque
+        created_scores = save_scorecard(
+            competition.id, participant.id, self.request.user,
+            submission.validated_data, edit_reason=edit_reason, skip_unknown=True
+        )
+        prefetch_related_objects(created_scores, 'edits__editor')
         
+        # El recálculo del ranking y la sincronización se despachan una vez al confirmar la transacción
         serializer = ScoreSerializer(created_scores, many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -380,59 +328,77 @@ class JudgeScoreCardView(APIView):
     permission_classes = [IsAuthenticated, IsAssignedJudgeOrAdmin]
     
     def get(self, request, competition_id, participant_id):
-        """Obtener tarjeta de calificación para un participante"""
+        """
+        Obtener tarjeta de calificación para un participante.
+        Admite varios `judge_id` y responde 304 si el ETag enviado en
+        If-None-Match sigue vigente.
+        """
+        from .conditional import make_etag, not_modified, set_etag
+        from .parameters import get_competition_parameters
+        
+        # Participante con competencia, jinete, caballo y categoría en una sola consulta
+        participant = get_object_or_404(
+            Participant.objects.select_related('competition', 'rider', 'horse', 'category'),
+            pk=participant_id, competition_id=competition_id
+        )
+        competition = participant.competition
+        
         try:
-            # Verificar que existan
-            competition = get_object_or_404(Competition, pk=competition_id)
-            participant = get_object_or_404(Participant, pk=participant_id, competition=competition)
+            # Calificaciones de todos los jueces solicitados en una sola consulta
+            judge_ids = sorted({int(judge_id) for judge_id in request.GET.getlist('judge_id', [self.request.user.id])})
+            judge_scores = list(
+                Score.objects.filter(
+                    competition_id=competition.id,
+                    participant_id=participant.id,
+                    judge_id__in=judge_ids
+                ).values(
+                    'judge_id', 'parameter__parameter_id', 'value', 'calculated_result',
+                    'comments', 'updated_at', 'is_edited'
+                )
+            )
             
-            # Obtener parámetros de evaluación para esta competencia
-            parameters = CompetitionParameter.objects.filter(
-                competition=competition
-            ).select_related('parameter').order_by('order')
+            # Parámetros de evaluación (caché por competencia)
+            parameters = get_competition_parameters(competition.id)
             
-            # Obtener calificaciones existentes para este juez o los jueces solicitados
-            scores = {}
-            judge_ids = request.GET.getlist('judge_id', [self.request.user.id])
+            last_score_update = max((score['updated_at'] for score in judge_scores), default=None)
+            category_update = participant.category.updated_at if participant.category_id else None
+            etag = make_etag(
+                'scorecard', participant.id, judge_ids, len(judge_scores), last_score_update,
+                parameters['version'], competition.updated_at, participant.updated_at,
+                participant.rider.updated_at, participant.horse.updated_at, category_update
+            )
             
-            for judge_id in judge_ids:
-                judge_scores = Score.objects.filter(
-                    competition=competition,
-                    participant=participant,
-                    judge_id=judge_id
-                ).select_related('parameter', 'parameter__parameter')
-                
-                # Organizar por parámetro
-                scores[str(judge_id)] = {}
-                for score in judge_scores:
-                    scores[str(judge_id)][str(score.parameter.parameter.id)] = {
-                        'value': float(score.value),
-                        'calculated_result': float(score.calculated_result),
-                        'comments': score.comments,
-                        'updated_at': score.updated_at.isoformat() if score.updated_at else None,
-                        'is_edited': score.is_edited
-                    }
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+            
+            # Organizar por juez y parámetro
+            scores = {str(judge_id): {} for judge_id in judge_ids}
+            for score in judge_scores:
+                scores[str(score['judge_id'])][str(score['parameter__parameter_id'])] = {
+                    'value': float(score['value']),
+                    'calculated_result': float(score['calculated_result']),
+                    'comments': score['comments'],
+                    'updated_at': score['updated_at'].isoformat() if score['updated_at'] else None,
+                    'is_edited': score['is_edited']
+                }
             
             # Preparar datos de respuesta
             response_data = {
                 'competition': competition.id,
                 'competition_name': competition.name,
                 'participant': ParticipantSerializer(participant).data,
-                'parameters': [
-                    {
-                        'id': param.parameter.id,
-                        'name': param.parameter.name,
-                        'description': param.parameter.description,
-                        'coefficient': param.effective_coefficient,
-                        'max_value': param.effective_max_value,
-                        'order': param.order
-                    } for param in parameters
-                ],
+                'parameters': parameters['parameters'],
                 'scores': scores,
                 'last_updated': competition.updated_at.isoformat() if competition.updated_at else None
             }
             
-            return Response(response_data)
+            return set_etag(Response(response_data), etag)
+        except ValueError:
+            return Response(
+                {"detail": "judge_id debe ser numérico"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             logger.error(f"Error al obtener tarjeta de calificación: {e}")
             return Response(
@@ -444,84 +410,32 @@ class JudgeScoreCardView(APIView):
     def post(self, request, competition_id, participant_id):
         """Enviar calificaciones para un participante"""
         try:
-            # Verificar que existan
-            competition = get_object_or_404(Competition, pk=competition_id)
-            participant = get_object_or_404(Participant, pk=participant_id, competition=competition)
+            # Verificar que existan (participante y competencia en una sola consulta)
+            participant = get_object_or_404(
+                Participant.objects.select_related('competition'),
+                pk=participant_id, competition_id=competition_id
+            )
+            competition = participant.competition
+            try:
+                ensure_scores_editable(competition)
+            except CompetitionClosed as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
             # Validar datos
             serializer = JudgeScoreCardSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
             
-            # Procesar cada calificación
             scores_data = serializer.validated_data['scores']
             edit_reason = serializer.validated_data.get('edit_reason', '')
             
-            created_scores = []
-            for score_data in scores_data:
-                parameter_id = score_data['parameter_id']
-                value = score_data['value']
-                comments = score_data.get('comments', '')
-                
-                # Obtener parámetro de competencia
-                parameter = get_object_or_404(
-                    CompetitionParameter, 
-                    competition=competition, 
-                    parameter_id=parameter_id
+            # Parámetros y calificaciones existentes en dos consultas, escritura en bloque
+            try:
+                created_scores = save_scorecard(
+                    competition.id, participant.id, request.user, scores_data, edit_reason=edit_reason
                 )
-                
-                # Verificar si ya existe una calificación
-                try:
-                    score = Score.objects.get(
-                        competition=competition,
-                        participant=participant,
-                        judge=request.user,
-                        parameter=parameter
-                    )
-                    
-                    # Si hay cambio en el valor, registrar la edición
-                    if score.value != value:
-                        # Guardar valores anteriores
-                        previous_value = score.value
-                        previous_result = score.calculated_result
-                        
-                        # Actualizar
-                        score.value = value
-                        score.comments = comments
-                        score.is_edited = True
-                        score.edit_reason = edit_reason
-                        score.save()
-                        
-                        # Crear registro de edición
-                        ScoreEdit.objects.create(
-                            score=score,
-                            editor=request.user,
-                            previous_value=previous_value,
-                            previous_result=previous_result,
-                            edit_reason=edit_reason
-                        )
-                    else:
-                        # Solo actualizar comentarios
-                        score.comments = comments
-                        score.save()
-                        
-                except Score.DoesNotExist:
-                    # Crear nueva calificación
-                    score = Score.objects.create(
-                        competition=competition,
-                        participant=participant,
-                        judge=request.user,
-                        parameter=parameter,
-                        value=value,
-                        comments=comments
-                    )
-                    
-                created_scores.append(score)
-            
-            # Actualizar rankings
-            update_participant_rankings(competition.id)
-            
-            # Sincronizar con Firebase
-            sync_participant_scores(competition.id, participant.id, request.user.id)
+            except CompetitionParameter.DoesNotExist as e:
+                return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+            prefetch_related_objects(created_scores, 'edits__editor')
             
             return Response({
                 'detail': 'Calificaciones guardadas correctamente',
@@ -552,6 +466,47 @@ class RankingListView(generics.ListAPIView):
         ).select_related(
             'participant', 'participant__rider', 'participant__horse', 'participant__category'
         ).order_by('position')
+    
+    def list(self, request, *args, **kwargs):
+        from .conditional import not_modified, ranking_etag, set_etag
+        
+        # Competencia finalizada: resultados congelados
+        final = get_final_results(self.kwargs.get('competition_id'))
+        if final is not None:
+            return final_response(request, final, lambda: self.list_final(final), 'list')
+        
+        # Sin cambios en el ranking desde la última petición del cliente: 304
+        etag = ranking_etag(request, self.kwargs.get('competition_id'), 'list')
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        
+        # Con un orden personalizado se consulta la base de datos
+        if request.query_params.get('ordering'):
+            return set_etag(super().list(request, *args, **kwargs), etag)
+        
+        # Orden por posición: servir el ranking en caché
+        rankings = get_ranking_snapshot(self.kwargs.get('competition_id'), 'api')['rankings']
+        page = self.paginate_queryset(rankings)
+        if page is not None:
+            return set_etag(self.get_paginated_response(page), etag)
+        return set_etag(Response(rankings), etag)
+    
+    def list_final(self, final):
+        """Ordena y pagina en memoria el ranking congelado"""
+        rankings = final['data']['rankings']
+        
+        # Mismos campos y sintaxis que OrderingFilter, aplicados del último al primero
+        ordering = self.request.query_params.get('ordering', '')
+        for field in reversed([f.strip() for f in ordering.split(',') if f.strip()]):
+            name = field.lstrip('-')
+            if name in self.ordering_fields:
+                rankings = sorted(rankings, key=lambda row: row[name], reverse=field.startswith('-'))
+        
+        page = self.paginate_queryset(rankings)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rankings)
 
 
 class RankingDetailView(generics.RetrieveAPIView):
@@ -568,6 +523,25 @@ class RankingDetailView(generics.RetrieveAPIView):
             competition_id=competition_id, 
             participant_id=participant_id
         )
+    
+    def retrieve(self, request, *args, **kwargs):
+        from .conditional import not_modified, ranking_etag, set_etag
+        
+        final = get_final_results(self.kwargs.get('competition_id'))
+        if final is not None:
+            participant_id = int(self.kwargs.get('participant_id'))
+            for ranking in final['data']['rankings']:
+                if ranking['participant'] == participant_id:
+                    return final_response(request, final, ranking, 'detail', participant_id)
+            return Response({"detail": "No encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        
+        etag = ranking_etag(request, self.kwargs.get('competition_id'), 'detail', self.kwargs.get('participant_id'))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        
+        response = super().retrieve(request, *args, **kwargs)
+        return set_etag(response, etag)
 
 
 class OfflineDataView(APIView):
@@ -616,12 +590,6 @@ class OfflineDataView(APIView):
                         except CompetitionParameter.DoesNotExist:
                             continue
                     
-                    # Actualizar rankings
-                    update_participant_rankings(competition_id)
-                    
-                    # Sincronizar con Firebase
-                    sync_participant_scores(competition_id, participant_id, request.user.id)
-                    
                     # Marcar como sincronizado
                     offline_data.is_synced = True
                     offline_data.save()
@@ -681,6 +649,19 @@ class OfflineDataSyncListView(generics.ListCreateAPIView):
 @permission_classes([IsAuthenticated])
 def competition_parameters(request, competition_id):
     """Obtener parámetros de evaluación para una competencia"""
+    from .conditional import make_etag, not_modified, set_etag
+    from .parameters import get_competition_parameters
+    
+    final = get_final_results(competition_id)
+    if final is not None:
+        return final_response(request, final, final['data']['parameters'], 'parameters')
+    
+    # La versión de la lista de parámetros en caché identifica la respuesta
+    etag = make_etag('parameters', competition_id, get_competition_parameters(competition_id)['version'])
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    
     try:
         competition = get_object_or_404(Competition, pk=competition_id)
         parameters = CompetitionParameter.objects.filter(
@@ -688,7 +669,7 @@ def competition_parameters(request, competition_id):
         ).select_related('parameter').order_by('order')
         
         serializer = CompetitionParameterSerializer(parameters, many=True)
-        return Response(serializer.data)
+        return set_etag(Response(serializer.data), etag)
     except Exception as e:
         logger.error(f"Error al obtener parámetros de competencia: {e}")
         return Response(
@@ -701,16 +682,22 @@ def competition_parameters(request, competition_id):
 @permission_classes([IsAuthenticated])
 def competition_rankings(request, competition_id):
     """Obtener rankings de una competencia"""
+    from .conditional import not_modified, ranking_etag, set_etag
+    
+    final = get_final_results(competition_id)
+    if final is not None:
+        return final_response(request, final, final['data']['rankings'], 'competition')
+    
+    etag = ranking_etag(request, competition_id, 'competition')
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    
     try:
         competition = get_object_or_404(Competition, pk=competition_id)
-        rankings = Ranking.objects.filter(
-            competition=competition
-        ).select_related(
-            'participant', 'participant__rider', 'participant__horse'
-        ).order_by('position')
         
-        serializer = RankingSerializer(rankings, many=True)
-        return Response(serializer.data)
+        # Ranking en caché (se reconstruye solo cuando cambia su versión)
+        return set_etag(Response(get_ranking_snapshot(competition.id, 'api')['rankings']), etag)
     except Exception as e:
         logger.error(f"Error al obtener rankings de competencia: {e}")
         return Response(
@@ -723,9 +710,14 @@ def competition_rankings(request, competition_id):
 @permission_classes([IsAuthenticated, IsAdminOrJudge])
 def recalculate_rankings(request, competition_id):
     """Recalcular rankings de una competencia"""
+    if get_final_results(competition_id) is not None:
+        return Response({
+            'detail': 'Los resultados de la competencia están congelados y no se recalculan'
+        }, status=status.HTTP_409_CONFLICT)
+    
     try:
-        rankings = update_participant_rankings(competition_id, recalculate_all=True)
-        sync_rankings(competition_id)
+        # La sincronización con Firebase queda encolada; los WebSocket se notifican al confirmar
+        rankings = update_participant_rankings(competition_id)
         
         return Response({
             'detail': 'Rankings recalculados correctamente',
@@ -738,6 +730,36 @@ def recalculate_rankings(request, competition_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminOrJudge])
+def export_results(request, competition_id, file_format):
+    """
+    Descargar los resultados de una competencia en CSV o XLSX.
+    Incluye las calificaciones de cada juez por parámetro, por lo que (igual
+    que compare_judges) solo está disponible para administradores y jueces.
+    """
+    from .exports import EXPORT_FORMATS, export_response
+    
+    if file_format not in EXPORT_FORMATS:
+        return Response({
+            'detail': f'Formato no soportado: {file_format}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    from django.core.handlers.asgi import ASGIRequest
+    
+    competition = get_object_or_404(Competition, id=competition_id)
+    return export_response(
+        competition, file_format, asynchronous=isinstance(request._request, ASGIRequest)
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminOrJudge])
+def ranking_scheduler_metrics(request):
+    """Obtener métricas del programador de recálculo de rankings"""
+    return Response(ranking_scheduler.get_metrics())
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminOrJudge])
 def judge_statistics(request, judge_id=None):
@@ -770,6 +792,13 @@ def judge_statistics(request, judge_id=None):
 @permission_classes([IsAuthenticated, IsAdminOrJudge])
 def compare_judges(request, competition_id, participant_id):
     """Comparar calificaciones entre jueces para un participante"""
+    final = get_final_results(competition_id)
+    if final is not None:
+        comparison = final['data']['comparisons'].get(str(participant_id))
+        if comparison is None:
+            return Response({"detail": "No encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        return final_response(request, final, comparison, 'compare', participant_id)
+    
     try:
         comparison = compare_judge_scores(competition_id, participant_id)
         return Response(comparison)
@@ -784,20 +813,29 @@ def compare_judges(request, competition_id, participant_id):
 @permission_classes([IsAuthenticated])
 def sync_status(request, competition_id):
     """Obtener estado de sincronización con Firebase"""
+    from .models import SyncTask
+    
     try:
         sync_record = FirebaseSync.objects.filter(competition_id=competition_id).first()
         
+        # Cambios aún en la cola de sincronización (escritos con las calificaciones)
+        pending_tasks = SyncTask.objects.filter(
+            competition_id=competition_id, status__in=('pending', 'running')
+        ).count()
+        
         if not sync_record:
             return Response({
                 'competition_id': competition_id,
                 'is_synced': False,
+                'pending_tasks': pending_tasks,
                 'last_sync': None,
                 'error_message': None
             })
         
         return Response({
             'competition_id': competition_id,
-            'is_synced': sync_record.is_synced,
+            'is_synced': sync_record.is_synced and not pending_tasks,
+            'pending_tasks': pending_tasks,
             'last_sync': sync_record.last_sync.isoformat() if sync_record.last_sync else None,
             'error_message': sync_record.error_message
         })
@@ -813,11 +851,17 @@ def sync_status(request, competition_id):
 def force_sync(request, competition_id):
     """Forzar sincronización con Firebase"""
     try:
-        # Recalcular rankings
-        rankings = update_participant_rankings(competition_id, recalculate_all=True)
-        
-        # Sincronizar con Firebase
-        sync_success = sync_rankings(competition_id)
+        final = get_final_results(competition_id)
+        if final is not None:
+            # Resultados congelados: se reenvían sin recalcular
+            rankings = final['data']['live']
+            sync_success = sync_rankings(competition_id, rankings=rankings, full=True)
+        else:
+            # Recalcular rankings
+            rankings = update_participant_rankings(competition_id)
+            
+            # Sincronizar con Firebase (envío completo, sin diferencias)
+            sync_success = sync_rankings(competition_id, full=True)
         
         # Actualizar registro de sincronización
         FirebaseSync.objects.update_or_create(
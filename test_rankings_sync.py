@@ -150,7 +150,7 @@ def update_rankings(competition_id):
         
         # Actualizar rankings
         print("Calculando rankings...")
-        rankings = update_participant_rankings(competition_id, recalculate_all=True)
+        rankings = update_participant_rankings(competition_id)
         print(f"Rankings actualizados: {len(rankings)}")
         
         # Verificar rankings en base de datos
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+    
+    def ready(self):
+        """Conectar señales cuando la aplicación está lista"""
+        from . import signals  # noqa: F401
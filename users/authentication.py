@@ -0,0 +1,67 @@
+"""
+Autenticación por token con caché.
+TokenAuthentication consulta authtoken_token y users_user en cada petición;
+este backend guarda el token resuelto (con su usuario) en la caché de Django
+durante TOKEN_AUTH_CACHE_TTL segundos.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+logger = logging.getLogger(__name__)
+
+
+def _token_cache_key(key: str) -> str:
+    """Clave de caché del token (sin guardar la clave en claro)"""
+    return f"auth:token:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
+def get_token_cache_ttl() -> int:
+    """Segundos que se reutiliza un token resuelto"""
+    return getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60)
+
+
+def invalidate_cached_token(key):
+    """
+    Elimina un token de la caché de autenticación.
+
+    Args:
+        key: Clave del token (o None)
+    """
+    if key:
+        cache.delete(_token_cache_key(str(key)))
+
+
+def invalidate_user_tokens(user):
+    """
+    Elimina de la caché los tokens de un usuario (p. ej. al desactivarlo o
+    cambiar su rol, para que las peticiones siguientes vean los datos nuevos).
+
+    Args:
+        user: Usuario
+    """
+    from rest_framework.authtoken.models import Token
+
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        invalidate_cached_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication que reutiliza el token y el usuario resueltos.
+    Los tokens inválidos o de usuarios inactivos no se guardan en caché.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = _token_cache_key(key)
+
+        token = cache.get(cache_key)
+        if token is not None:
+            return (token.user, token)
+
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, token, get_token_cache_ttl())
+        return (user, token)
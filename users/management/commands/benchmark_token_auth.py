@@ -0,0 +1,81 @@
+"""
+Compara peticiones por segundo y consultas por petición de una vista DRF
+autenticada con TokenAuthentication y con CachedTokenAuthentication.
+Crea un usuario y un token temporales dentro de una transacción que se revierte.
+
+Uso:
+    python manage.py benchmark_token_auth
+    python manage.py benchmark_token_auth --requests 2000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from users.authentication import CachedTokenAuthentication, invalidate_cached_token
+from users.models import User
+
+
+def build_view(authentication_class):
+    """Vista mínima autenticada con la clase indicada"""
+
+    class BenchmarkView(APIView):
+        authentication_classes = [authentication_class]
+        permission_classes = [IsAuthenticated]
+
+        def get(self, request):
+            return Response({'user': request.user.id})
+
+    return BenchmarkView.as_view()
+
+
+class Command(BaseCommand):
+    help = 'Mide peticiones por segundo con y sin caché de autenticación por token'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Peticiones por medición')
+
+    def handle(self, *args, **options):
+        total = max(options['requests'], 1)
+        factory = APIRequestFactory()
+
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email='benchmark-token@apsan.org', password='benchmark',
+                first_name='Benchmark', last_name='Token', role='judge'
+            )
+            token = Token.objects.create(user=user)
+            invalidate_cached_token(token.key)
+
+            self.stdout.write(f"{'Autenticación':>28} {'Peticiones/s':>14} {'Consultas/petición':>20}")
+            for name, authentication_class in (
+                ('TokenAuthentication', TokenAuthentication),
+                ('CachedTokenAuthentication', CachedTokenAuthentication),
+            ):
+                view = build_view(authentication_class)
+
+                # Primera petición fuera de la medición (llena la caché)
+                view(factory.get('/', HTTP_AUTHORIZATION=f'Token {token.key}'))
+
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    for _ in range(total):
+                        response = view(factory.get('/', HTTP_AUTHORIZATION=f'Token {token.key}'))
+                        if response.status_code != 200:
+                            raise RuntimeError(f"Respuesta inesperada: {response.status_code}")
+                    elapsed = time.perf_counter() - start
+
+                self.stdout.write(
+                    f"{name:>28} {total / elapsed:>14.0f} "
+                    f"{len(queries.captured_queries) / total:>20.2f}"
+                )
+
+            invalidate_cached_token(token.key)
+            transaction.set_rollback(True)
@@ -0,0 +1,24 @@
+"""
+Señales de la aplicación de usuarios.
+Mantienen al día la caché de autenticación por token.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_cached_token, invalidate_user_tokens
+from .models import User
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Un token eliminado deja de autenticar de inmediato"""
+    invalidate_cached_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_changed_user_tokens(sender, instance, created, update_fields=None, **kwargs):
+    """Los cambios del usuario (rol, estado, contraseña) se ven en la siguiente petición"""
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    invalidate_user_tokens(instance)
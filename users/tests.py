@@ -1,3 +1,69 @@
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory
 
-# Create your tests here.
+from .authentication import CachedTokenAuthentication
+from .models import User
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='juez@apsan.org', password='test123',
+            first_name='Juez', last_name='Prueba', role='judge'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    
+    def authenticate(self, key=None):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Token {key or self.token.key}')
+        return CachedTokenAuthentication().authenticate(request)
+    
+    def test_second_request_skips_database(self):
+        """Tras la primera petición el token se resuelve desde la caché"""
+        with self.assertNumQueries(1):
+            self.authenticate()
+        
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        
+        self.assertEqual((user.id, token.key), (self.user.id, self.token.key))
+    
+    def test_logout_invalidates_token(self):
+        """Cerrar sesión invalida el token en caché"""
+        from rest_framework.exceptions import AuthenticationFailed
+        
+        self.authenticate()
+        response = self.client.post('/api/users/logout/', secure=True)
+        
+        self.assertEqual(response.status_code, 200)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+    
+    def test_change_password_invalidates_token(self):
+        """Cambiar la contraseña invalida el token anterior"""
+        from rest_framework.exceptions import AuthenticationFailed
+        
+        self.authenticate()
+        response = self.client.post('/api/users/change-password/', {
+            'old_password': 'test123', 'new_password': 'NuevaClave123!', 'new_password2': 'NuevaClave123!'
+        }, format='json', secure=True)
+        
+        self.assertEqual(response.status_code, 200, response.content)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        self.assertEqual(self.authenticate(response.json()['token'])[0].id, self.user.id)
+    
+    def test_deactivated_user_is_rejected(self):
+        """Los cambios del usuario invalidan sus tokens en caché"""
+        from rest_framework.exceptions import AuthenticationFailed
+        
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
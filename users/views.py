@@ -7,6 +7,7 @@ from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 
+from .authentication import invalidate_cached_token, invalidate_user_tokens
 from .models import User, JudgeProfile
 from .serializers import (
     UserSerializer, JudgeProfileSerializer, JudgeDetailSerializer,
@@ -40,7 +41,8 @@ class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        # Eliminar token
+        # Eliminar token (y su copia en la caché de autenticación)
+        invalidate_cached_token(request.auth)
         try:
             request.user.auth_token.delete()
         except:
@@ -146,7 +148,8 @@ class ChangePasswordView(APIView):
             user.set_password(serializer.validated_data['new_password'])
             user.save()
             
-            # Actualizar token
+            # Actualizar token (las claves anteriores dejan de estar en caché)
+            invalidate_user_tokens(user)
             Token.objects.filter(user=user).delete()
             token = Token.objects.create(user=user)
             